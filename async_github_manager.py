@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步GitHub API管理模块
+"""
+
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Awaitable
+
+import aiohttp
+
+from github_manager import (ApiResponse, ResponseCache, RateLimiter, TokenPool, LazyLogArchive,
+                            shared_rate_limiter, shared_token_validity, format_created_filter,
+                            next_created_until, LOG_DOWNLOAD_CHUNK_SIZE, LOG_SPOOL_MAX_MEMORY)
+
+class AsyncGitHubManager:
+    """基于asyncio的GitHub API管理器
+    
+    提供 GitHubManager 中同名方法的异步版本（同名方法返回值一致，列表方法同样包含所有分页），
+    所有请求共享一个受并发上限约束的 aiohttp 会话，用于同步时一次性并行拉取多个仓库的数据。
+    只覆盖按仓库批量读取和基本操作所需的方法：任务列表与任务日志（list_workflow_run_jobs /
+    get_job_logs）、iter_* 流式分页以及触发后查找运行（get_workflow_run_after_trigger）
+    仍使用 GitHubManager。需要在 ``async with`` 中使用。
+    """
+    
+    def __init__(self, max_concurrency: int = 8, response_cache: ResponseCache = None,
+                 rate_limiter: RateLimiter = None, background: bool = False,
+                 token_pool: TokenPool = None):
+        self.base_url = "https://api.github.com"
+        self.token = None
+        self.max_concurrency = max(1, max_concurrency)
+        self.response_cache = response_cache or ResponseCache()
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.background = background
+        self.token_pool = token_pool
+        self.token_validity = shared_token_validity
+        self.logger = logging.getLogger(__name__)
+        self.session = None
+        self.semaphore = None
+        self.headers = {
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'GitHub-Action-Manager/1.0.0'
+        }
+        
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        self.session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+        return self
+        
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        
+    async def close(self):
+        """关闭会话"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+            
+    def set_token(self, token: str):
+        """设置GitHub Token"""
+        self.token = token
+        
+    def _auth_headers(self, token: str = None) -> Dict[str, str]:
+        token = token or self.token
+        return {'Authorization': f'token {token}'} if token else {}
+        
+    async def _acquire(self, token: str = None) -> bool:
+        """等待速率限制调度放行"""
+        delay = self.rate_limiter.get_delay(token or self.token, self.background)
+        if delay > self.rate_limiter.max_wait:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+        
+    def _record(self, response: aiohttp.ClientResponse, token: str = None):
+        """记录响应中的配额信息"""
+        self.rate_limiter.update(token or self.token, response.headers, response.status)
+        self.token_validity.observe(token or self.token, response.url, response.status, response.headers)
+        
+    @staticmethod
+    def _parse_links(response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        return {str(rel): {'url': str(link.get('url'))} for rel, link in response.links.items()}
+        
+    async def _get_json(self, url: str, params: Dict[str, Any] = None, repo: str = None) -> ApiResponse:
+        """只读JSON请求，设置Token池时按仓库选择Token"""
+        tokens = [self.token]
+        if self.token_pool and repo:
+            tokens = self.token_pool.candidates(repo) or tokens
+            
+        response = None
+        for token in tokens:
+            response = await self._get_json_as(url, params, token)
+            if not self._access_denied(token, response.status_code) or \
+                    not await self._repo_denied(token, repo, url, response.status_code):
+                break
+            self.token_pool.mark_denied(repo, token, response.status_code)
+        return response
+        
+    def _access_denied(self, token: str, status_code: int) -> bool:
+        """判断响应是否表示该Token无权访问（而不是速率限制）"""
+        if not self.token_pool or status_code not in (401, 403, 404):
+            return False
+        if status_code == 403 and self.rate_limiter.get_state(token)['remaining'] == 0:
+            return False
+        return True
+        
+    async def _repo_denied(self, token: str, repo: str, url: str, status_code: int) -> bool:
+        """确认Token对仓库无权访问：401、仓库本身的403/404，或子资源403/404后探测仓库仍被拒绝"""
+        repo_url = f"{self.base_url}/repos/{repo}"
+        if status_code == 401 or url.split('?')[0].rstrip('/') == repo_url:
+            return True
+        if not repo or self.token_pool.is_accessible(repo, token):
+            return False
+        probe = await self._get_json_as(repo_url, None, token)
+        if probe.status_code == 200:
+            self.token_pool.mark_accessible(repo, token)
+        return self._access_denied(token, probe.status_code)
+        
+    async def _get_json_as(self, url: str, params: Dict[str, Any], token: str) -> ApiResponse:
+        """发送带条件请求头的GET，304时返回缓存内容"""
+        key = self.response_cache.make_key(url, params, token)
+        headers = self._auth_headers(token)
+        headers.update(self.response_cache.conditional_headers(key))
+        
+        async with self.semaphore:
+            if not await self._acquire(token):
+                return ApiResponse(429, None, "请求因速率限制被推迟", {}, False)
+                
+            async with self.session.get(url, params=params, headers=headers) as response:
+                self._record(response, token)
+                if response.status == 304:
+                    entry = self.response_cache.get(key)
+                    if entry is not None:
+                        return ApiResponse(200, entry['data'], "", entry['links'], True)
+                        
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    links = self._parse_links(response)
+                    self.response_cache.store(key, response.headers, data, links)
+                    return ApiResponse(200, data, "", links, False)
+                    
+                if response.status != 304:
+                    return ApiResponse(response.status, None, await response.text(), {}, False)
+                    
+            # 缓存已被淘汰，重新发送无条件请求
+            async with self.session.get(url, params=params, headers=self._auth_headers(token)) as response:
+                self._record(response, token)
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    links = self._parse_links(response)
+                    self.response_cache.store(key, response.headers, data, links)
+                    return ApiResponse(200, data, "", links, False)
+                return ApiResponse(response.status, None, await response.text(), {}, False)
+                
+    async def _paginate(self, url: str, params: Dict[str, Any] = None, item_key: str = None,
+                        repo: str = None) -> List[Dict[str, Any]]:
+        """沿 Link: rel=next 依次请求所有页面，返回全部记录"""
+        items = []
+        while url:
+            response = await self._get_json(url, params=params, repo=repo)
+            if response.status_code != 200:
+                self.logger.error(f"分页请求失败: {response.status_code} - {response.text}")
+                break
+                
+            items.extend(response.data.get(item_key, []) if item_key else response.data)
+            # next链接已包含全部查询参数
+            url = response.links.get('next', {}).get('url')
+            params = None
+        return items
+        
+    async def gather(self, coroutines: Iterable[Awaitable]) -> List[Any]:
+        """并发执行多个请求，失败的请求返回None"""
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+        output = []
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"并发请求失败: {str(result)}")
+                output.append(None)
+            else:
+                output.append(result)
+        return output
+        
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取条件请求缓存命中统计"""
+        return self.response_cache.get_stats()
+        
+    async def test_connection(self) -> bool:
+        """测试GitHub连接"""
+        try:
+            if not self.token:
+                return False
+                
+            cached = self.token_validity.is_valid(self.token)
+            if cached is not None:
+                return cached
+                
+            response = await self._get_json(f"{self.base_url}/user")
+            return response.status_code == 200
+            
+        except Exception as e:
+            self.logger.error(f"测试GitHub连接失败: {str(e)}")
+            return False
+            
+    async def get_user_info(self) -> Optional[Dict[str, Any]]:
+        """获取用户信息"""
+        try:
+            if not self.token:
+                return None
+                
+            response = await self._get_json(f"{self.base_url}/user")
+            if response.status_code == 200:
+                return response.data
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"获取用户信息失败: {str(e)}")
+            return None
+            
+    async def list_workflows(self, repo: str, per_page: int = 100) -> List[Dict[str, Any]]:
+        """列出仓库的工作流（包含所有分页）"""
+        try:
+            if not self.token:
+                return []
+                
+            url = f"{self.base_url}/repos/{repo}/actions/workflows"
+            return await self._paginate(url, {"per_page": per_page}, 'workflows', repo=repo)
+            
+        except Exception as e:
+            self.logger.error(f"获取工作流列表失败: {str(e)}")
+            return []
+            
+    async def get_workflow(self, repo: str, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """获取特定工作流信息"""
+        try:
+            if not self.token:
+                return None
+                
+            url = f"{self.base_url}/repos/{repo}/actions/workflows/{workflow_id}"
+            response = await self._get_json(url, repo=repo)
+            
+            if response.status_code == 200:
+                return response.data
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"获取工作流信息失败: {str(e)}")
+            return None
+            
+    async def trigger_workflow(self, repo: str, workflow_id: str, ref: str = "main",
+                               inputs: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """触发工作流"""
+        try:
+            if not self.token:
+                return None
+                
+            url = f"{self.base_url}/repos/{repo}/actions/workflows/{workflow_id}/dispatches"
+            
+            data = {
+                "ref": ref
+            }
+            
+            if inputs:
+                data["inputs"] = inputs
+                
+            async with self.semaphore:
+                if not await self._acquire():
+                    self.logger.error("触发工作流失败: 速率限制")
+                    return None
+                    
+                async with self.session.post(url, json=data, headers=self._auth_headers()) as response:
+                    self._record(response)
+                    if response.status == 204:
+                        return {
+                            "success": True,
+                            "repo": repo,
+                            "workflow_id": workflow_id,
+                            "ref": ref,
+                            "triggered_at": datetime.now().isoformat()
+                        }
+                    self.logger.error(f"触发工作流失败: {response.status} - {await response.text()}")
+                    return None
+                    
+        except Exception as e:
+            self.logger.error(f"触发工作流失败: {str(e)}")
+            return None
+            
+    async def list_workflow_runs(self, repo: str, workflow_id: str = None,
+                                 per_page: int = 30) -> List[Dict[str, Any]]:
+        """列出工作流运行记录"""
+        try:
+            if not self.token:
+                return []
+                
+            if workflow_id:
+                url = f"{self.base_url}/repos/{repo}/actions/workflows/{workflow_id}/runs"
+            else:
+                url = f"{self.base_url}/repos/{repo}/actions/runs"
+                
+            params = {
+                "per_page": per_page
+            }
+            
+            response = await self._get_json(url, params=params, repo=repo)
+            
+            if response.status_code == 200:
+                return response.data.get('workflow_runs', [])
+            else:
+                self.logger.error(f"获取工作流运行记录失败: {response.status_code} - {response.text}")
+                return []
+                
+        except Exception as e:
+            self.logger.error(f"获取工作流运行记录失败: {str(e)}")
+            return []
+            
+    async def list_repository_runs(self, repo: str, created_since: datetime = None, per_page: int = 100,
+                                   max_pages: Optional[int] = 10,
+                                   status: str = None) -> Optional[List[Dict[str, Any]]]:
+        """列出仓库全部工作流的运行记录（created_since 之后创建的，最多 max_pages 页，None 表示全部）"""
+        try:
+            if not self.token:
+                return None
+                
+            base_url = f"{self.base_url}/repos/{repo}/actions/runs"
+            base_params = {"per_page": per_page}
+            if status:
+                base_params["status"] = status
+            if created_since:
+                base_params["created"] = format_created_filter(created_since)
+                
+            url, params = base_url, dict(base_params)
+            runs = []
+            query_start = 0
+            until = None
+            pages = 0
+            while url and (max_pages is None or pages < max_pages):
+                response = await self._get_json(url, params=params, repo=repo)
+                if response.status_code != 200:
+                    self.logger.error(f"获取仓库运行记录失败: {response.status_code} - {response.text}")
+                    return None
+                    
+                pages += 1
+                runs.extend(response.data.get('workflow_runs', []))
+                url = response.links.get('next', {}).get('url')
+                params = None
+                if not url:
+                    until = next_created_until(created_since, runs[query_start:],
+                                               response.data.get('total_count', 0), until)
+                    if until:
+                        url = base_url
+                        params = dict(base_params, created=format_created_filter(created_since, until))
+                        query_start = len(runs)
+            # 区间边界上的运行可能被两次查询同时返回
+            return list({run['id']: run for run in runs}.values())
+            
+        except Exception as e:
+            self.logger.error(f"获取仓库运行记录失败: {str(e)}")
+            return None
+            
+    async def get_workflow_run(self, repo: str, run_id: str) -> Optional[Dict[str, Any]]:
+        """获取特定工作流运行信息"""
+        try:
+            if not self.token:
+                return None
+                
+            url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}"
+            response = await self._get_json(url, repo=repo)
+            
+            if response.status_code == 200:
+                return response.data
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"获取工作流运行信息失败: {str(e)}")
+            return None
+            
+    async def cancel_workflow_run(self, repo: str, run_id: str) -> bool:
+        """取消工作流运行"""
+        try:
+            if not self.token:
+                return False
+                
+            url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}/cancel"
+            async with self.semaphore:
+                if not await self._acquire():
+                    return False
+                    
+                async with self.session.post(url, headers=self._auth_headers()) as response:
+                    self._record(response)
+                    return response.status == 202
+                    
+        except Exception as e:
+            self.logger.error(f"取消工作流运行失败: {str(e)}")
+            return False
+            
+    async def get_workflow_run_logs(self, repo: str, run_id: str) -> Optional[LazyLogArchive]:
+        """
+        获取工作流运行日志
+        返回按需解码的只读映射: { 'job1.txt': '内容...', 'job2.txt': '内容...' }
+        """
+        try:
+            if not self.token:
+                return None
+                
+            url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}/logs"
+            spool = tempfile.SpooledTemporaryFile(max_size=LOG_SPOOL_MAX_MEMORY)
+            try:
+                async with self.semaphore:
+                    if not await self._acquire():
+                        self.logger.error("获取日志失败: 速率限制")
+                        spool.close()
+                        return None
+                        
+                    async with self.session.get(url, headers=self._auth_headers()) as response:
+                        self._record(response)
+                        if response.status != 200:
+                            self.logger.error(f"获取日志失败: {response.status} - {await response.text()}")
+                            spool.close()
+                            return None
+                        async for chunk in response.content.iter_chunked(LOG_DOWNLOAD_CHUNK_SIZE):
+                            spool.write(chunk)
+                            
+                spool.seek(0)
+                return LazyLogArchive(spool)
+            except Exception as e:
+                spool.close()
+                self.logger.error(f"解压日志失败: {str(e)}")
+                return None
+                
+        except Exception as e:
+            self.logger.error(f"获取工作流运行日志失败: {str(e)}")
+            return None
+            
+    async def list_repositories(self, username: str = None, per_page: int = 100) -> List[Dict[str, Any]]:
+        """列出仓库（包含所有分页）"""
+        try:
+            if not self.token:
+                return []
+                
+            if username:
+                url = f"{self.base_url}/users/{username}/repos"
+            else:
+                url = f"{self.base_url}/user/repos"
+                
+            return await self._paginate(url, {"per_page": per_page})
+            
+        except Exception as e:
+            self.logger.error(f"获取仓库列表失败: {str(e)}")
+            return []
+            
+    async def get_repository(self, repo: str) -> Optional[Dict[str, Any]]:
+        """获取仓库信息"""
+        try:
+            if not self.token:
+                return None
+                
+            url = f"{self.base_url}/repos/{repo}"
+            response = await self._get_json(url, repo=repo)
+            
+            if response.status_code == 200:
+                return response.data
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"获取仓库信息失败: {str(e)}")
+            return None
+            
+    async def check_rate_limit(self) -> Optional[Dict[str, Any]]:
+        """检查API速率限制"""
+        try:
+            async with self.semaphore:
+                async with self.session.get(f"{self.base_url}/rate_limit",
+                                            headers=self._auth_headers()) as response:
+                    if response.status == 200:
+                        data = await response.json(content_type=None)
+                        core = data.get('resources', {}).get('core')
+                        if core:
+                            self.rate_limiter.seed(self.token, core)
+                        return data
+                    return None
+                    
+        except Exception as e:
+            self.logger.error(f"检查速率限制失败: {str(e)}")
+            return None
+            
+    async def get_latest_workflow_run(self, repo: str, workflow_file: str) -> Optional[Dict[str, Any]]:
+        """获取最新触发的workflow运行信息"""
+        try:
+            if not self.token:
+                return None
+                
+            url = f"{self.base_url}/repos/{repo}/actions/workflows/{workflow_file}/runs"
+            params = {
+                "per_page": 1
+            }
+            
+            response = await self._get_json(url, params=params, repo=repo)
+            
+            if response.status_code == 200:
+                runs = response.data.get('workflow_runs', [])
+                if runs:
+                    return runs[0]
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"获取最新workflow运行信息失败: {str(e)}")
+            return None
+            
\ No newline at end of file
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行记录内存基准
+
+在临时数据库中生成指定数量的运行记录，用 tracemalloc 比较三种读取方式常驻的内存：
+字典行（execute_query）、完整的 RunRecord（get_workflow_runs）、
+运行列表逐页加载到底后的 RunRecord（get_workflow_runs_page，只含列表列）。
+
+    python benchmark_runs.py --runs 100000
+"""
+
+import os
+import sys
+import gc
+import time
+import random
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+from database import DatabaseManager
+
+REPOS = [f"example-org/service-{index:02d}" for index in range(20)]
+WORKFLOWS = ["CI", "Build and Test", "Deploy", "Nightly", "Release"]
+BRANCHES = ["main", "develop", "release/2.x", "feature/login"]
+USERS = ["alice", "bob", "carol", "dave", "erin"]
+CONCLUSIONS = ["success", "success", "success", "failure", "cancelled"]
+
+def generate_runs(db: DatabaseManager, count: int, config_ids: list):
+    """生成 count 条与同步结果格式一致的运行记录"""
+    runs = []
+    for index in range(count):
+        repo = random.choice(REPOS)
+        run_id = str(10_000_000_000 + index)
+        created = f"2026-{random.randint(1, 9):02d}-{random.randint(10, 28)}T{random.randint(10, 23)}:{random.randint(10, 59)}:00Z"
+        runs.append({
+            'config_id': random.choice(config_ids),
+            'run_id': run_id,
+            'status': 'completed',
+            'conclusion': random.choice(CONCLUSIONS),
+            'html_url': f"https://github.com/{repo}/actions/runs/{run_id}",
+            'logs_url': f"https://api.github.com/repos/{repo}/actions/runs/{run_id}/logs",
+            'workflow_name': random.choice(WORKFLOWS),
+            'repo': repo,
+            'branch': random.choice(BRANCHES),
+            'trigger_user': random.choice(USERS),
+            'completed_at': created.replace(':00Z', ':45Z'),
+            'run_attempt': 1,
+            'queued_at': created,
+            'started_at': created.replace(':00Z', ':05Z'),
+        })
+    db.upsert_runs(runs)
+    
+def measure(load):
+    """返回 (结果, 常驻字节数, 耗时秒数)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    resident = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, resident, elapsed
+    
+def load_all_pages(db: DatabaseManager, page_size: int):
+    """模拟运行列表滚动到底：逐页加载并保留所有记录"""
+    runs, cursor = db.get_workflow_runs_page(None, page_size)
+    while cursor:
+        page, cursor = db.get_workflow_runs_page(cursor, page_size)
+        runs.extend(page)
+    return runs
+    
+def main():
+    parser = argparse.ArgumentParser(description="运行记录内存基准")
+    parser.add_argument('--runs', type=int, default=100_000, help="生成的运行记录数")
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(args.seed)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "benchmark.db"))
+        db.init_database()
+        db.start_writer()
+        config_ids = []
+        for index in range(10):
+            user_id = db.insert_user(USERS[index % len(USERS)] + str(index), "token")
+            for repo in REPOS[index::10]:
+                config_ids.append(db.insert_workflow_config(user_id, f"{repo} CI", repo, "ci.yml"))
+        print(f"生成 {args.runs} 条运行记录…")
+        generate_runs(db, args.runs, config_ids)
+        db.flush_writes()
+        
+        full_query = """
+            SELECT wr.*, wc.name as config_name, u.username as user_name
+            FROM workflow_runs wr
+            LEFT JOIN workflow_configs wc ON wr.config_id = wc.id
+            LEFT JOIN users u ON wc.user_id = u.id
+            ORDER BY wr.created_at DESC
+        """
+        cases = [
+            ("字典行 execute_query", lambda: db.execute_query(full_query)),
+            ("RunRecord get_workflow_runs", lambda: db.get_workflow_runs()),
+            ("RunRecord 运行列表分页", lambda: load_all_pages(db, args.page_size)),
+        ]
+        
+        baseline = None
+        print(f"{'方式':<32}{'条数':>10}{'常驻内存':>12}{'每条':>10}{'耗时':>10}{'倍数':>8}")
+        for name, load in cases:
+            result, resident, elapsed = measure(load)
+            baseline = baseline or resident
+            print(f"{name:<32}{len(result):>10}{resident / 1024 / 1024:>10.1f}MB"
+                  f"{resident / max(len(result), 1):>9.0f}B{elapsed:>9.2f}s{baseline / resident:>7.1f}x")
+            del result
+            
+        db.close()
+    return 0
+    
+if __name__ == "__main__":
+    sys.exit(main())
+    
\ No newline at end of file
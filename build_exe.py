@@ -52,6 +52,7 @@ a = Analysis(
         'PyQt5.QtGui', 
         'PyQt5.QtWidgets',
         'requests',
+        'aiohttp',
         'PyGithub',
         'cryptography',
         'sqlite3',
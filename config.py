@@ -59,13 +59,16 @@ class Config:
             "database": {
                 "path": "github_action_manager.db",
                 "backup_enabled": True,
-                "backup_interval": 24  # 小时
+                "backup_interval": 24,  # 小时
+                "backup_path": "backups",
+                "backup_keep": 5
             },
             "github": {
                 "api_base_url": "https://api.github.com",
                 "timeout": 30,
                 "retry_count": 3,
-                "rate_limit_check": True
+                "rate_limit_check": True,
+                "max_concurrency": 8
             },
             "ui": {
                 "theme": "default",
@@ -92,7 +95,32 @@ class Config:
             "workflow": {
                 "default_branch": "main",
                 "auto_save_config": True,
-                "max_configs_per_user": 50
+                "max_configs_per_user": 50,
+                "correlation_input": ""
+            },
+            "webhook": {
+                "enabled": False,
+                "host": "127.0.0.1",
+                "port": 8765,
+                "secret": ""
+            },
+            "log_cache": {
+                "enabled": True,
+                "path": "log_cache",
+                "max_size": 512  # MB
+            },
+            "log_index": {
+                "enabled": True,
+                "path": "log_index.db"
+            },
+            "retention": {
+                "enabled": False,
+                "run_days": 90,  # 0表示不按时间清理
+                "runs_per_config": 0,  # 0表示不限条数
+                "log_days": 30,
+                "archive_path": "github_action_manager_archive.db",
+                "batch_size": 500,
+                "interval": 6  # 小时
             }
         }
         
@@ -148,6 +176,14 @@ class Config:
         """获取备份间隔（小时）"""
         return self.get("database.backup_interval", 24)
         
+    def get_backup_path(self) -> str:
+        """获取数据库备份目录"""
+        return self.get("database.backup_path", "backups")
+        
+    def get_backup_keep(self) -> int:
+        """获取保留的数据库备份份数"""
+        return self.get("database.backup_keep", 5)
+        
     def get_github_api_url(self) -> str:
         """获取GitHub API URL"""
         return self.get("github.api_base_url", "https://api.github.com")
@@ -164,6 +200,10 @@ class Config:
         """是否启用速率限制检查"""
         return self.get("github.rate_limit_check", True)
         
+    def get_github_max_concurrency(self) -> int:
+        """获取GitHub并发请求上限"""
+        return self.get("github.max_concurrency", 8)
+        
     def get_ui_theme(self) -> str:
         """获取UI主题"""
         return self.get("ui.theme", "default")
@@ -228,6 +268,74 @@ class Config:
         """获取每个用户最大配置数量"""
         return self.get("workflow.max_configs_per_user", 50)
         
+    def get_correlation_input(self) -> str:
+        """获取用于关联触发与运行的输入参数名"""
+        return self.get("workflow.correlation_input", "")
+        
+    def is_webhook_enabled(self) -> bool:
+        """是否启用Webhook接收服务"""
+        return self.get("webhook.enabled", False)
+        
+    def get_webhook_host(self) -> str:
+        """获取Webhook监听地址"""
+        return self.get("webhook.host", "127.0.0.1")
+        
+    def get_webhook_port(self) -> int:
+        """获取Webhook监听端口"""
+        return self.get("webhook.port", 8765)
+        
+    def get_webhook_secret(self) -> str:
+        """获取Webhook签名密钥"""
+        return self.get("webhook.secret", "")
+        
+    def is_log_cache_enabled(self) -> bool:
+        """是否启用运行日志本地缓存"""
+        return self.get("log_cache.enabled", True)
+        
+    def get_log_cache_path(self) -> str:
+        """获取运行日志缓存目录"""
+        return self.get("log_cache.path", "log_cache")
+        
+    def get_log_cache_max_size(self) -> int:
+        """获取运行日志缓存大小上限（MB）"""
+        return self.get("log_cache.max_size", 512)
+        
+    def is_log_index_enabled(self) -> bool:
+        """是否为缓存的运行日志建立全文索引（需要启用日志缓存）"""
+        return self.get("log_index.enabled", True)
+        
+    def get_log_index_path(self) -> str:
+        """获取日志全文索引数据库路径"""
+        return self.get("log_index.path", "log_index.db")
+        
+    def is_retention_enabled(self) -> bool:
+        """是否启用数据保留策略"""
+        return self.get("retention.enabled", False)
+        
+    def get_retention_run_days(self) -> int:
+        """获取运行记录保留天数"""
+        return self.get("retention.run_days", 90)
+        
+    def get_retention_runs_per_config(self) -> int:
+        """获取每个配置保留的运行条数"""
+        return self.get("retention.runs_per_config", 0)
+        
+    def get_retention_log_days(self) -> int:
+        """获取系统日志保留天数"""
+        return self.get("retention.log_days", 30)
+        
+    def get_archive_path(self) -> str:
+        """获取归档数据库路径"""
+        return self.get("retention.archive_path", "github_action_manager_archive.db")
+        
+    def get_retention_batch_size(self) -> int:
+        """获取每批归档的行数"""
+        return self.get("retention.batch_size", 500)
+        
+    def get_retention_interval(self) -> int:
+        """获取保留策略执行间隔（小时）"""
+        return self.get("retention.interval", 6)
+        
     def reset_to_default(self) -> bool:
         """重置为默认配置"""
         try:
@@ -7,37 +7,690 @@
 
 import sqlite3
 import os
+import sys
+import json
+import time
+import queue
+import weakref
+import threading
 import logging
+from concurrent.futures import Future
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, Iterable, Iterator, Union
 
+# upsert_runs 接受的字段（run_id 必填，其余缺省为NULL）
+RUN_FIELDS = ('config_id', 'run_id', 'status', 'html_url', 'conclusion', 'logs_url',
+              'workflow_name', 'repo', 'branch', 'trigger_user', 'completed_at', 'run_attempt',
+              'queued_at', 'started_at')
+
+# 运行统计的维度: 维度名 -> 运行所属键的SQL表达式（{row} 为 NEW / OLD 或表别名）
+RUN_STATS_DIMENSIONS = {
+    'config': "CAST({row}.config_id AS TEXT)",
+    'repo': "{row}.repo",
+    'day': "substr(COALESCE({row}.queued_at, {row}.created_at), 1, 10)",
+}
+
+# 运行统计的累加列（秒数取整存储，增减都是整数运算，结果精确）
+RUN_STATS_COLUMNS = ('runs', 'queued_runs', 'queued_seconds', 'duration_runs', 'duration_seconds')
+
+# 影响运行统计的运行记录字段
+RUN_STATS_SOURCE_COLUMNS = ('config_id', 'repo', 'status', 'conclusion', 'created_at',
+                            'queued_at', 'started_at', 'completed_at')
+
+# 在线备份每步复制的页数和每步之间的等待（秒），每步结束后释放源库的锁
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.005
+
+# 分步备份期间源库被其他连接修改会从头开始，超过该次数后改为一步完成
+BACKUP_MAX_RESTARTS = 3
+
+# 备份失败后的重试间隔（秒）
+BACKUP_RETRY_INTERVAL = 600
+
+# 可归档的表及其在归档库中的唯一键
+ARCHIVE_TABLES = {'workflow_runs': 'run_id', 'system_logs': 'id'}
+
+# RunRecord 的列：workflow_runs 各列及关联查询带出的配置名、用户名
+RUN_RECORD_FIELDS = ('id', 'config_id', 'run_id', 'html_url', 'status', 'conclusion', 'created_at',
+                     'updated_at', 'completed_at', 'logs_url', 'workflow_name', 'repo', 'branch',
+                     'trigger_user', 'run_attempt', 'queued_at', 'started_at', 'config_name', 'user_name')
+
+# 取值种类很少的列，读取时驻留（sys.intern），所有记录共用同一个字符串对象
+RUN_INTERNED_FIELDS = frozenset(('status', 'conclusion', 'workflow_name', 'repo', 'branch',
+                                 'trigger_user', 'config_name', 'user_name'))
+
+# 运行列表分页只读取表格用到的列，其余列在首次访问时按 id 补读
+RUN_LIST_FIELDS = ('id', 'run_id', 'config_id', 'workflow_name', 'repo', 'branch', 'status',
+                   'conclusion', 'html_url', 'created_at')
+
+class RunRecord:
+    """一条运行记录
+    
+    用 __slots__ 代替字典保存各列，低基数字符串驻留后由所有记录共用。提供 get / [] / in /
+    keys / items / update，按字典使用运行记录的代码无需修改。查询只读取了部分列时，
+    首次访问未读取的列会通过 loader 按 id 补读整行。
+    """
+    
+    __slots__ = RUN_RECORD_FIELDS + ('_extra', '_loader')
+    
+    @classmethod
+    def builder(cls, columns: List[str],
+                loader: Callable[[int], Optional['RunRecord']] = None) -> Callable[[tuple], 'RunRecord']:
+        """按查询结果的列名生成把一行转换为 RunRecord 的函数（同名列以第一次出现的为准，与 sqlite3.Row 一致）"""
+        slots = []
+        extra = []
+        seen = set()
+        for index, name in enumerate(columns):
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in RUN_RECORD_FIELDS:
+                slots.append((index, getattr(cls, name).__set__, name in RUN_INTERNED_FIELDS))
+            else:
+                extra.append((index, name))
+        new = cls.__new__
+        intern = sys.intern
+        
+        def build(row: tuple) -> 'RunRecord':
+            record = new(cls)
+            record._extra = {name: row[index] for index, name in extra} if extra else None
+            record._loader = loader
+            for index, setter, interned in slots:
+                value = row[index]
+                if interned and type(value) is str:
+                    value = intern(value)
+                setter(record, value)
+            return record
+            
+        return build
+        
+    def __getitem__(self, key: str) -> Any:
+        try:
+            if key in RUN_RECORD_FIELDS:
+                return getattr(self, key)
+            return self._extra[key]
+        except (AttributeError, KeyError, TypeError):
+            pass
+        if self._load():
+            return self[key]
+        raise KeyError(key)
+        
+    def __setitem__(self, key: str, value: Any):
+        if key in RUN_RECORD_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+            
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+            
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+        
+    def __len__(self) -> int:
+        return len(self.keys())
+        
+    def __repr__(self) -> str:
+        return f"RunRecord({self.to_dict()!r})"
+        
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+            
+    def keys(self) -> List[str]:
+        """已读取的列名（不触发补读）"""
+        keys = [name for name in RUN_RECORD_FIELDS if hasattr(self, name)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+        
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+        
+    def update(self, other: Union['RunRecord', Dict[str, Any]]):
+        for key, value in other.items():
+            self[key] = value
+            
+    def to_dict(self) -> Dict[str, Any]:
+        """补读全部列后转换为字典"""
+        self._load()
+        return dict(self.items())
+        
+    def _load(self) -> bool:
+        """通过 loader 补读未读取的列，每条记录最多补读一次"""
+        loader, self._loader = self._loader, None
+        if loader is None or not hasattr(self, 'id'):
+            return False
+        full = loader(self.id)
+        if full is None:
+            return False
+        for key, value in full.items():
+            if key not in RUN_RECORD_FIELDS or not hasattr(self, key):
+                self[key] = value
+        return True
+        
+class _BackupRestarted(Exception):
+    """分步备份重新开始次数过多"""
+    
+class _ThreadConnection:
+    """线程持有的连接；线程结束、线程局部变量被回收时连接归还连接池"""
+    
+    __slots__ = ('connection', '__weakref__')
+    
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        
+class DatabaseWriter:
+    """单写线程
+    
+    写操作以 fn(connection) 的形式放入队列，由唯一的写线程在自己的连接上执行。
+    队列中的写操作合并到同一个事务中提交（攒满 batch_size 条或等待 flush_interval 秒；
+    批次中有调用方正在等待的写操作时，取完已排队的写操作即提交），提交成功后才完成
+    各自的Future；单个写操作失败只回滚它自己的保存点。
+    """
+    
+    def __init__(self, connect: Callable[[], sqlite3.Connection],
+                 batch_size: int = 200, flush_interval: float = 0.05):
+        self.connect = connect
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.connection = None
+        self.thread = None
+        self.running = False
+        self.stats = {'writes': 0, 'failed': 0, 'batches': 0}
+        self.logger = logging.getLogger(__name__)
+        
+    def start(self):
+        """启动写线程"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+        
+    def stop(self, timeout: float = 5.0):
+        """提交队列中剩余的写操作后停止写线程"""
+        if not self.running:
+            return
+        self.running = False
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+            
+    def is_running(self) -> bool:
+        return self.running
+        
+    def in_writer_thread(self) -> bool:
+        return threading.current_thread() is self.thread
+        
+    def submit(self, fn: Callable[[sqlite3.Connection], Any], urgent: bool = False) -> Future:
+        """提交写操作，返回在事务提交后完成的Future；urgent表示调用方会等待结果"""
+        future = Future()
+        self.queue.put((fn, future, urgent))
+        return future
+        
+    def flush(self, timeout: float = None) -> bool:
+        """等待此前提交的写操作全部提交"""
+        try:
+            self.submit(lambda connection: None, urgent=True).result(timeout)
+            return True
+        except Exception:
+            return False
+            
+    def get_stats(self) -> Dict[str, int]:
+        """获取写入统计"""
+        stats = dict(self.stats)
+        stats['pending'] = self.queue.qsize()
+        return stats
+        
+    def _next_batch(self) -> Tuple[list, bool]:
+        """取出一批写操作，返回 (写操作列表, 是否收到停止信号)"""
+        item = self.queue.get()
+        if item is None:
+            return [], True
+            
+        batch = [item]
+        urgent = item[2]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if urgent else deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            urgent = urgent or item[2]
+        return batch, False
+        
+    def _run(self):
+        self.connection = self.connect()
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    self._commit(batch)
+                    
+            # 停止前提交的写操作同样执行，不留下未完成的Future
+            leftover = []
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    leftover.append(item)
+            if leftover:
+                self._commit(leftover)
+                
+        except Exception as e:
+            self.logger.error(f"数据库写线程异常退出: {str(e)}")
+        finally:
+            self.running = False
+            
+    def _commit(self, batch: list):
+        """在一个事务中执行一批写操作"""
+        connection = self.connection
+        done = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for fn, future, _ in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                connection.execute("SAVEPOINT write_op")
+                try:
+                    result = fn(connection)
+                    connection.execute("RELEASE write_op")
+                    done.append((future, result))
+                except Exception as e:
+                    connection.execute("ROLLBACK TO write_op")
+                    connection.execute("RELEASE write_op")
+                    self.stats['failed'] += 1
+                    future.set_exception(e)
+            connection.commit()
+            
+        except Exception as e:
+            if connection.in_transaction:
+                connection.rollback()
+            self.logger.error(f"批量提交失败: {str(e)}")
+            for fn, future, _ in batch:
+                if not future.done():
+                    if not future.running():
+                        future.set_running_or_notify_cancel()
+                    future.set_exception(e)
+            self.stats['failed'] += len(batch)
+            return
+            
+        self.stats['batches'] += 1
+        self.stats['writes'] += len(done)
+        for future, result in done:
+            future.set_result(result)
+            
 class DatabaseManager:
-    """数据库管理器"""
+    """数据库管理器
+    
+    使用WAL日志模式，每个线程从连接池获得自己的连接，读操作不会被
+    后台同步的写操作阻塞，后台线程也无需重新初始化数据库。
+    """
     
-    def __init__(self, db_path: str = "github_action_manager.db"):
+    def __init__(self, db_path: str = "github_action_manager.db", pool_size: int = 4,
+                 busy_timeout: int = 5000, archive_path: str = None):
         self.db_path = db_path
-        self.connection = None
+        self.archive_path = archive_path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.initialized = False
+        self._local = threading.local()
+        self._idle = []
+        self._connections = []
+        self._lock = threading.Lock()
+        self.writer = None
+        self.backup_thread = None
+        self.backup_stop = threading.Event()
+        self.backup_status = {'last_backup': None, 'last_backup_at': None, 'duration': None,
+                              'steps': 0, 'last_error': None, 'running': False}
         self.logger = logging.getLogger(__name__)
         
+    @property
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """当前线程的数据库连接（未初始化或已关闭时为None）"""
+        if not self.initialized:
+            return None
+            
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self._connect()
+            holder = _ThreadConnection(connection)
+            weakref.finalize(holder, self._release, connection)
+            self._local.holder = holder
+        return holder.connection
+        
+    def _connect(self) -> sqlite3.Connection:
+        """创建新连接并设置WAL、同步级别和忙等待超时"""
+        # 连接只由持有它的线程使用，归还后可能交给其他线程，因此关闭同线程检查
+        connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000,
+                                     check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        # 归档库附加到每个连接，归档数据可直接用 archive.<表名> 查询
+        if self.archive_path:
+            connection.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+        
+    def _release(self, connection: sqlite3.Connection):
+        """把连接放回连接池，池满或已关闭时直接关闭连接"""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            with self._lock:
+                if self.initialized and len(self._idle) < self.pool_size:
+                    self._idle.append(connection)
+                    return
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            connection.close()
+        except sqlite3.Error:
+            pass
+            
+    def release_connection(self):
+        """归还当前线程的连接（后台线程结束前调用）"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None:
+            del self._local.holder
+            
+    def start_writer(self, batch_size: int = 200, flush_interval: float = 0.05) -> bool:
+        """启动单写线程，此后所有写操作经写队列批量提交"""
+        if not self.initialized:
+            return False
+        if self.writer and self.writer.is_running():
+            return True
+            
+        self.writer = DatabaseWriter(self._connect, batch_size, flush_interval)
+        self.writer.start()
+        self.logger.info("数据库写线程已启动")
+        return True
+        
+    def stop_writer(self):
+        """提交剩余写操作并停止写线程"""
+        writer = self.writer
+        if writer is None:
+            return
+        self.writer = None
+        writer.stop()
+        if writer.connection is not None:
+            self._release(writer.connection)
+        self.logger.info("数据库写线程已停止")
+        
+    def submit_write(self, fn: Callable[[sqlite3.Connection], Any], urgent: bool = False) -> Future:
+        """提交写操作 fn(connection)，返回事务提交后完成的Future
+        
+        fn 中不要提交或回滚事务；调用方会立即等待结果时传 urgent=True。写线程未启动时
+        在当前线程的连接上立即执行并提交；在写线程内部调用时并入当前批次的事务。
+        """
+        writer = self.writer
+        if writer and writer.is_running() and not writer.in_writer_thread():
+            return writer.submit(fn, urgent)
+            
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            if writer and writer.in_writer_thread():
+                result = fn(writer.connection)
+            else:
+                connection = self.connection
+                with connection:
+                    result = fn(connection)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+        return future
+        
+    def pending_writes(self) -> int:
+        """写队列中尚未执行的写操作数"""
+        writer = self.writer
+        return writer.queue.qsize() if writer and writer.is_running() else 0
+        
+    def flush_writes(self, timeout: float = None) -> bool:
+        """等待已提交的写操作全部提交"""
+        writer = self.writer
+        return writer.flush(timeout) if writer and writer.is_running() else True
+        
+    def _write(self, fn: Callable[[sqlite3.Connection], Any], wait: bool = True) -> Union[Any, Future]:
+        """执行写操作；wait为False时不等待提交，返回Future（失败时记录日志）"""
+        future = self.submit_write(fn, urgent=wait)
+        if wait:
+            return future.result()
+        future.add_done_callback(self._log_write_error)
+        return future
+        
+    def _log_write_error(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f"异步写入失败: {str(future.exception())}")
+            
+    def backup_database(self, backup_dir: str = "backups", keep: int = 5,
+                        pages: int = BACKUP_STEP_PAGES, step_sleep: float = BACKUP_STEP_SLEEP) -> Optional[str]:
+        """在线备份数据库，完整性校验通过后只保留最近 keep 份，返回备份文件路径
+        
+        使用 sqlite3 备份API按页分步复制，每步之间释放锁并等待 step_sleep 秒，
+        备份期间写线程照常提交。校验在调用线程中执行，应在后台线程调用。
+        """
+        temp_path = None
+        self.backup_status['running'] = True
+        try:
+            if not self.initialized:
+                return None
+                
+            os.makedirs(backup_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(self.db_path))[0]
+            backup_path = os.path.join(backup_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+            temp_path = backup_path + ".tmp"
+            
+            started = time.time()
+            steps = self._copy_database(temp_path, pages, step_sleep)
+            problem = self._check_integrity(temp_path)
+            if problem:
+                raise sqlite3.DatabaseError(f"完整性校验失败: {problem}")
+                
+            os.replace(temp_path, backup_path)
+            self._rotate_backups(backup_dir, name, keep)
+            
+            duration = time.time() - started
+            self.backup_status.update({'last_backup': backup_path, 'last_backup_at': time.time(),
+                                       'duration': duration, 'steps': steps, 'last_error': None})
+            self.logger.info(f"数据库备份完成: {backup_path} ({steps} 步，用时 {duration:.1f} 秒)")
+            return backup_path
+            
+        except Exception as e:
+            self.backup_status['last_error'] = str(e)
+            self.logger.error(f"数据库备份失败: {str(e)}")
+            return None
+        finally:
+            self.backup_status['running'] = False
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+                
+    def _copy_database(self, dest_path: str, pages: int, step_sleep: float) -> int:
+        """按页分步复制到 dest_path，返回步数
+        
+        其他连接在备份期间提交的修改会让备份从头开始；写入频繁导致多次重新开始时，
+        改为一步复制。WAL模式下一步复制只持有一个读快照，同样不阻塞写入。
+        """
+        state = {'steps': 0, 'restarts': 0, 'remaining': None}
+        
+        def progress(status, remaining, total):
+            state['steps'] += 1
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > BACKUP_MAX_RESTARTS:
+                    raise _BackupRestarted()
+            state['remaining'] = remaining
+            if remaining:
+                time.sleep(step_sleep)
+                
+        source = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000)
+        dest = sqlite3.connect(dest_path)
+        try:
+            try:
+                source.backup(dest, pages=pages, progress=progress)
+            except _BackupRestarted:
+                self.logger.warning(f"备份期间写入频繁，已重新开始 {state['restarts']} 次，改为一步复制")
+                source.backup(dest)
+                state['steps'] += 1
+            # 备份文件不使用WAL，保持为单个文件
+            dest.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dest.close()
+            source.close()
+        return state['steps']
+        
+    @staticmethod
+    def _check_integrity(path: str) -> Optional[str]:
+        """对备份文件执行 PRAGMA integrity_check，通过时返回None，否则返回第一条错误"""
+        connection = sqlite3.connect(path)
+        try:
+            result = connection.execute("PRAGMA integrity_check").fetchone()[0]
+            return None if result == 'ok' else result
+        finally:
+            connection.close()
+            
+    def _rotate_backups(self, backup_dir: str, name: str, keep: int):
+        """删除最近 keep 份之外的旧备份"""
+        for backup_path in self.list_backups(backup_dir, name)[keep:]:
+            os.remove(backup_path)
+            self.logger.info(f"删除旧备份: {backup_path}")
+            
+    def list_backups(self, backup_dir: str = "backups", name: str = None) -> List[str]:
+        """列出备份文件，最新的在前"""
+        if not os.path.isdir(backup_dir):
+            return []
+        name = name or os.path.splitext(os.path.basename(self.db_path))[0]
+        backups = [file_name for file_name in os.listdir(backup_dir)
+                   if file_name.startswith(f"{name}-") and file_name.endswith(".db")]
+        return [os.path.join(backup_dir, file_name) for file_name in sorted(backups, reverse=True)]
+        
+    def start_backup_scheduler(self, interval_hours: float = 24, backup_dir: str = "backups",
+                               keep: int = 5) -> bool:
+        """启动定时备份线程：最新备份超过间隔时立即备份，之后每隔 interval_hours 小时备份一次"""
+        if not self.initialized:
+            return False
+        if self.backup_thread and self.backup_thread.is_alive():
+            return True
+            
+        self.backup_stop.clear()
+        self.backup_thread = threading.Thread(target=self._backup_loop, args=(interval_hours * 3600, backup_dir, keep),
+                                              name="db-backup", daemon=True)
+        self.backup_thread.start()
+        self.logger.info(f"定时备份已启动: 每 {interval_hours} 小时，保留 {keep} 份")
+        return True
+        
+    def stop_backup_scheduler(self):
+        """停止定时备份线程（正在进行的备份完成后退出）"""
+        thread = self.backup_thread
+        if thread is None:
+            return
+        self.backup_thread = None
+        self.backup_stop.set()
+        thread.join(timeout=30)
+        self.logger.info("定时备份已停止")
+        
+    def _backup_loop(self, interval: float, backup_dir: str, keep: int):
+        while not self.backup_stop.is_set():
+            backups = self.list_backups(backup_dir)
+            last_backup_at = os.path.getmtime(backups[0]) if backups else None
+            wait = last_backup_at + interval - time.time() if last_backup_at else 0
+            if wait <= 0:
+                if self.backup_database(backup_dir, keep):
+                    wait = interval
+                else:
+                    wait = min(interval, BACKUP_RETRY_INTERVAL)
+            self.backup_stop.wait(wait)
+            
+    def get_backup_status(self) -> Dict[str, Any]:
+        """获取备份状态"""
+        status = dict(self.backup_status)
+        status['scheduled'] = self.backup_thread is not None and self.backup_thread.is_alive()
+        return status
+        
     def init_database(self):
         """初始化数据库"""
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
+            if self.initialized:
+                return True
+                
+            self.initialized = True
+            
+            # 按版本执行结构迁移
+            self._migrate()
             
-            # 创建表
-            self._create_tables()
+            if self.archive_path:
+                self._ensure_archive_schema()
             
             self.logger.info("数据库初始化成功")
             return True
             
         except Exception as e:
+            self.initialized = False
             self.logger.error(f"数据库初始化失败: {str(e)}")
             return False
             
-    def _create_tables(self):
+    def _migrations(self) -> List[Callable[[sqlite3.Cursor], None]]:
+        """结构迁移列表，第N项把数据库从版本N-1升级到版本N（只能追加，不能修改已发布的迁移）"""
+        return [
+            self._create_tables,
+            self._create_run_indexes,
+            self._create_run_page_indexes,
+            self._add_run_attempt,
+            self._create_run_stats,
+            self._create_retention_indexes,
+            self._create_run_time_index,
+            self._create_config_run_time_index,
+        ]
+        
+    def _migrate(self):
+        """执行尚未应用的迁移，当前版本记录在 PRAGMA user_version"""
+        connection = self.connection
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            # 新数据库在建表前启用增量回收，删除旧数据后可用 incremental_vacuum 归还空间
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        
+        for target, migration in enumerate(self._migrations(), 1):
+            if version >= target:
+                continue
+                
+            # 每个迁移连同版本号在一个事务中提交
+            cursor = connection.cursor()
+            cursor.execute("BEGIN")
+            try:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {target}")
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            self.logger.info(f"数据库已迁移到版本 {target}: {migration.__doc__}")
+            
+    def _create_tables(self, cursor: sqlite3.Cursor):
         """创建数据库表"""
-        cursor = self.connection.cursor()
         
         # 用户表
         cursor.execute("""
@@ -97,7 +750,242 @@ class DatabaseManager:
             )
         """)
         
-        self.connection.commit()
+        # 增量同步状态表 - 每个仓库的创建时间游标和未完成运行ID
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                scope TEXT PRIMARY KEY,
+                cursor TEXT,
+                active_run_ids TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+    def _create_run_indexes(self, cursor: sqlite3.Cursor):
+        """创建运行记录热点查询索引"""
+        # 运行列表按创建时间倒序
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_runs_created_at ON workflow_runs (created_at DESC)")
+        # 单个配置的运行列表
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_runs_config_created ON workflow_runs (config_id, created_at)")
+        # 按仓库和状态筛选
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_runs_repo_status ON workflow_runs (repo, status)")
+        # 未完成运行（部分索引，只包含极少量行）
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_workflow_runs_active ON workflow_runs (status)
+            WHERE status IS NOT 'completed'
+        """)
+        # 用户的工作流配置
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_configs_user ON workflow_configs (user_id, created_at)")
+        
+    def _create_run_page_indexes(self, cursor: sqlite3.Cursor):
+        """创建运行记录分页索引"""
+        # (created_at DESC) 索引隐含的rowid为升序，无法按 (created_at, id) 同时倒序翻页，
+        # 改为升序索引后反向扫描即可
+        cursor.execute("DROP INDEX IF EXISTS idx_workflow_runs_created_at")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_runs_created_id ON workflow_runs (created_at, id)")
+        # 按仓库筛选后翻页
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_runs_repo_created ON workflow_runs (repo, created_at)")
+        
+    def _add_run_attempt(self, cursor: sqlite3.Cursor):
+        """运行记录增加尝试次数（重新运行后日志随尝试次数变化）"""
+        cursor.execute("ALTER TABLE workflow_runs ADD COLUMN run_attempt INTEGER")
+        
+    def _create_run_stats(self, cursor: sqlite3.Cursor):
+        """创建运行统计表，由触发器随运行记录的写入在同一事务中增量维护"""
+        cursor.execute("ALTER TABLE workflow_runs ADD COLUMN queued_at TIMESTAMP")
+        cursor.execute("ALTER TABLE workflow_runs ADD COLUMN started_at TIMESTAMP")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS run_stats (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                conclusion TEXT NOT NULL,
+                runs INTEGER NOT NULL DEFAULT 0,
+                queued_runs INTEGER NOT NULL DEFAULT 0,
+                queued_seconds INTEGER NOT NULL DEFAULT 0,
+                duration_runs INTEGER NOT NULL DEFAULT 0,
+                duration_seconds INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, key, conclusion)
+            ) WITHOUT ROWID
+        """)
+        
+        add_new = ";\n".join(self._run_stats_upsert(d, "NEW", 1) for d in RUN_STATS_DIMENSIONS)
+        remove_old = ";\n".join(self._run_stats_upsert(d, "OLD", -1) for d in RUN_STATS_DIMENSIONS)
+        changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in RUN_STATS_SOURCE_COLUMNS)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_run_stats_insert AFTER INSERT ON workflow_runs
+            BEGIN {add_new}; END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_run_stats_update
+            AFTER UPDATE OF {', '.join(RUN_STATS_SOURCE_COLUMNS)} ON workflow_runs
+            WHEN {changed}
+            BEGIN {remove_old}; {add_new}; END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_run_stats_delete AFTER DELETE ON workflow_runs
+            BEGIN {remove_old}; END
+        """)
+        self._rebuild_run_stats(cursor)
+        
+    def _create_retention_indexes(self, cursor: sqlite3.Cursor):
+        """创建按时间清理系统日志的索引"""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_system_logs_created_at ON system_logs (created_at)")
+        
+    def _create_run_time_index(self, cursor: sqlite3.Cursor):
+        """创建按运行时间（GitHub创建时间，缺失时为写入时间）归档的表达式索引"""
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_workflow_runs_run_time ON workflow_runs (COALESCE(queued_at, created_at))"
+        )
+        
+    def _create_config_run_time_index(self, cursor: sqlite3.Cursor):
+        """创建按配置、运行时间选出每个配置最近N条运行的表达式索引"""
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_workflow_runs_config_run_time "
+            "ON workflow_runs (config_id, COALESCE(queued_at, created_at))"
+        )
+        
+    @staticmethod
+    def _run_stats_terms(row: str) -> Dict[str, str]:
+        """一条运行对各统计列的贡献（SQL表达式）"""
+        queued = f"(julianday({row}.started_at) - julianday({row}.queued_at)) * 86400"
+        duration = f"(julianday({row}.completed_at) - julianday({row}.started_at)) * 86400"
+        has_duration = f"{row}.status = 'completed' AND {duration} >= 0"
+        return {
+            'runs': "1",
+            'queued_runs': f"CASE WHEN {queued} >= 0 THEN 1 ELSE 0 END",
+            'queued_seconds': f"CASE WHEN {queued} >= 0 THEN CAST(ROUND({queued}) AS INTEGER) ELSE 0 END",
+            'duration_runs': f"CASE WHEN {has_duration} THEN 1 ELSE 0 END",
+            'duration_seconds': f"CASE WHEN {has_duration} THEN CAST(ROUND({duration}) AS INTEGER) ELSE 0 END",
+        }
+        
+    @classmethod
+    def _run_stats_upsert(cls, dimension: str, row: str, sign: int) -> str:
+        """把一条运行（NEW 或 OLD）计入（sign=1）或移出（sign=-1）某个维度的统计"""
+        key = RUN_STATS_DIMENSIONS[dimension].format(row=row)
+        terms = cls._run_stats_terms(row)
+        return f"""
+            INSERT INTO run_stats (dimension, key, conclusion, {', '.join(RUN_STATS_COLUMNS)})
+            SELECT '{dimension}', {key}, COALESCE({row}.conclusion, ''),
+                   {', '.join(f"{sign} * ({terms[c]})" for c in RUN_STATS_COLUMNS)}
+            WHERE {key} IS NOT NULL
+            ON CONFLICT (dimension, key, conclusion) DO UPDATE SET
+                {', '.join(f"{c} = {c} + excluded.{c}" for c in RUN_STATS_COLUMNS)}
+        """
+        
+    @classmethod
+    def _run_stats_aggregate(cls, source: str, where: str = "1", sign: int = 1) -> List[str]:
+        """把 source 表中满足 where 的运行按维度汇总后计入（sign=1）或移出（sign=-1）运行统计"""
+        terms = cls._run_stats_terms("wr")
+        statements = []
+        for dimension, key in RUN_STATS_DIMENSIONS.items():
+            key = key.format(row="wr")
+            statements.append(f"""
+                INSERT INTO run_stats (dimension, key, conclusion, {', '.join(RUN_STATS_COLUMNS)})
+                SELECT '{dimension}', {key}, COALESCE(wr.conclusion, ''),
+                       {', '.join(f"{sign} * SUM({terms[c]})" for c in RUN_STATS_COLUMNS)}
+                FROM {source} wr
+                WHERE {key} IS NOT NULL AND ({where})
+                GROUP BY 1, 2, 3
+                ON CONFLICT (dimension, key, conclusion) DO UPDATE SET
+                    {', '.join(f"{c} = {c} + excluded.{c}" for c in RUN_STATS_COLUMNS)}
+            """)
+        return statements
+        
+    @classmethod
+    def _rebuild_run_stats(cls, cursor: sqlite3.Cursor):
+        """从运行记录（含已归档的运行）全量重新计算运行统计"""
+        cursor.execute("DELETE FROM run_stats")
+        sources = ["main.workflow_runs"]
+        if cls._has_archive(cursor):
+            sources.append("archive.workflow_runs")
+        for source in sources:
+            for statement in cls._run_stats_aggregate(source):
+                cursor.execute(statement)
+                
+    @staticmethod
+    def _has_archive(cursor: Union[sqlite3.Cursor, sqlite3.Connection]) -> bool:
+        """连接是否附加了已建好表结构的归档库"""
+        if 'archive' not in [row[1] for row in cursor.execute("PRAGMA database_list")]:
+            return False
+        return cursor.execute(
+            "SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = 'workflow_runs'"
+        ).fetchone() is not None
+        
+    def rebuild_run_stats(self) -> bool:
+        """全量重建运行统计（统计表与运行记录不一致时使用）"""
+        try:
+            self._write(lambda connection: self._rebuild_run_stats(connection.cursor()))
+            self.logger.info("运行统计已重建")
+            return True
+        except Exception as e:
+            self.logger.error(f"重建运行统计失败: {str(e)}")
+            return False
+            
+    def check_query_plans(self) -> List[str]:
+        """用 EXPLAIN QUERY PLAN 检查热点查询，返回退化为全表扫描或临时排序的查询
+        
+        由 tests/test_query_plans.py 断言结果为空，不在启动时执行。
+        """
+        # (查询, 参数, 是否允许按索引顺序扫描)：无筛选的列表查询按索引顺序扫描即可，
+        # 带筛选条件的查询必须走索引查找（SEARCH）
+        hot_queries = {
+            'get_workflow_runs': ("""
+                SELECT wr.*, wc.name as config_name, u.username as user_name
+                FROM workflow_runs wr
+                LEFT JOIN workflow_configs wc ON wr.config_id = wc.id
+                LEFT JOIN users u ON wc.user_id = u.id
+                ORDER BY wr.created_at DESC
+            """, (), True),
+            'get_workflow_runs(config_id)': ("""
+                SELECT wr.*, wc.name as config_name, u.username as user_name
+                FROM workflow_runs wr
+                LEFT JOIN workflow_configs wc ON wr.config_id = wc.id
+                LEFT JOIN users u ON wc.user_id = u.id
+                WHERE wr.config_id = ?
+                ORDER BY wr.created_at DESC
+            """, (1,), False),
+            'get_workflow_runs_page': (
+                self._workflow_runs_page_query(['(wr.created_at, wr.id) < (?, ?)']), ('', 0, 100), False
+            ),
+            'get_workflow_runs_page(repo)': (
+                self._workflow_runs_page_query(['wr.repo = ?', '(wr.created_at, wr.id) < (?, ?)']),
+                ('o/r', '', 0, 100), False
+            ),
+            'get_workflow_runs_page(config_id)': (
+                self._workflow_runs_page_query(['wr.config_id = ?', '(wr.created_at, wr.id) < (?, ?)']),
+                (1, '', 0, 100), False
+            ),
+            'update_workflow_run_status': (
+                "UPDATE workflow_runs SET status = ? WHERE run_id = ?", ('completed', '1'), False
+            ),
+            'get_run_stats': (
+                "SELECT * FROM run_stats WHERE dimension = ? AND runs > 0", ('config',), False
+            ),
+            'get_active_workflow_runs': (
+                "SELECT run_id FROM workflow_runs WHERE status IS NOT 'completed'", (), True
+            ),
+            'workflow_runs(repo, status)': (
+                "SELECT run_id FROM workflow_runs WHERE repo = ? AND status = ?", ('o/r', 'queued'), False
+            ),
+            'get_workflow_configs_by_user': ("""
+                SELECT wc.*, u.username as user_name
+                FROM workflow_configs wc
+                LEFT JOIN users u ON wc.user_id = u.id
+                WHERE wc.user_id = ?
+                ORDER BY wc.created_at DESC
+            """, (1,), False),
+        }
+        
+        problems = []
+        for name, (query, params, allow_index_scan) in hot_queries.items():
+            for row in self.connection.execute(f"EXPLAIN QUERY PLAN {query}", params):
+                detail = row['detail']
+                if detail.startswith('SCAN '):
+                    scan_ok = allow_index_scan and ' USING ' in detail
+                    if not scan_ok:
+                        problems.append(f"{name}: {detail}")
+                elif 'USE TEMP B-TREE' in detail:
+                    problems.append(f"{name}: {detail}")
+        return problems
         
     def is_connected(self) -> bool:
         """检查数据库连接状态"""
@@ -120,12 +1008,21 @@ class DatabaseManager:
             self.logger.error(f"查询执行失败: {str(e)}")
             return []
             
-    def execute_update(self, query: str, params: tuple = ()) -> bool:
-        """执行更新操作"""
+    def query_runs(self, query: str, params: tuple = (),
+                   loader: Callable[[int], Optional[RunRecord]] = None) -> List[RunRecord]:
+        """执行返回运行记录的查询，每行构造为 RunRecord（loader 用于补读查询未包含的列）"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            self.connection.commit()
+            cursor = self.connection.execute(query, params)
+            build = RunRecord.builder([column[0] for column in cursor.description], loader)
+            return [build(row) for row in cursor]
+        except Exception as e:
+            self.logger.error(f"查询运行记录失败: {str(e)}")
+            return []
+            
+    def execute_update(self, query: str, params: tuple = (), wait: bool = True) -> bool:
+        """执行更新操作（经写队列提交，wait为False时不等待提交）"""
+        try:
+            self._write(lambda connection: connection.execute(query, params), wait)
             return True
         except Exception as e:
             self.logger.error(f"更新执行失败: {str(e)}")
@@ -140,9 +1037,7 @@ class DatabaseManager:
             """
             now = datetime.now().isoformat()
             
-            cursor = self.connection.cursor()
-            cursor.execute(query, (username, token, now, now))
-            self.connection.commit()
+            cursor = self._write(lambda connection: connection.execute(query, (username, token, now, now)))
             
             user_id = cursor.lastrowid
             self.logger.info(f"用户插入成功: {username} (ID: {user_id})")
@@ -182,9 +1077,7 @@ class DatabaseManager:
             """
             now = datetime.now().isoformat()
             
-            cursor = self.connection.cursor()
-            cursor.execute(query, (username, token, now, user_id))
-            self.connection.commit()
+            cursor = self._write(lambda connection: connection.execute(query, (username, token, now, user_id)))
             
             if cursor.rowcount > 0:
                 self.logger.info(f"用户更新成功: {username}")
@@ -215,9 +1108,9 @@ class DatabaseManager:
             """
             now = datetime.now().isoformat()
             
-            cursor = self.connection.cursor()
-            cursor.execute(query, (user_id, name, repo, workflow, branch, inputs, now, now))
-            self.connection.commit()
+            cursor = self._write(lambda connection: connection.execute(
+                query, (user_id, name, repo, workflow, branch, inputs, now, now)
+            ))
             
             config_id = cursor.lastrowid
             self.logger.info(f"工作流配置插入成功: {name} (ID: {config_id})")
@@ -270,9 +1163,9 @@ class DatabaseManager:
             """
             now = datetime.now().isoformat()
             
-            cursor = self.connection.cursor()
-            cursor.execute(query, (user_id, name, repo, workflow, branch, inputs, now, config_id))
-            self.connection.commit()
+            cursor = self._write(lambda connection: connection.execute(
+                query, (user_id, name, repo, workflow, branch, inputs, now, config_id)
+            ))
             
             if cursor.rowcount > 0:
                 self.logger.info(f"工作流配置更新成功: {config_id}")
@@ -305,11 +1198,10 @@ class DatabaseManager:
             """
             now = datetime.now().isoformat()
             
-            cursor = self.connection.cursor()
-            cursor.execute(query, (config_id, run_id, status, html_url, conclusion,
-                                 logs_url, workflow_name, repo, branch, trigger_user,
-                                 now, now))
-            self.connection.commit()
+            cursor = self._write(lambda connection: connection.execute(
+                query, (config_id, run_id, status, html_url, conclusion,
+                        logs_url, workflow_name, repo, branch, trigger_user, now, now)
+            ))
             
             run_id_db = cursor.lastrowid
             self.logger.info(f"工作流运行记录插入成功: {run_id} (ID: {run_id_db})")
@@ -323,15 +1215,78 @@ class DatabaseManager:
             self.logger.error(f"插入工作流运行记录失败: {str(e)}")
             return None
         
-    def update_workflow_run_status(self, run_id: str, status: str, conclusion: str = None) -> bool:
+    def upsert_runs(self, runs: Iterable[Dict[str, Any]], wait: bool = True) -> Union[int, Future]:
+        """批量插入或更新运行记录，整批在一个事务中提交，返回新增或发生变化的行数
+        
+        run_id 已存在时更新状态、结论、链接、开始/完成时间和尝试次数，其余字段只在原值为空时补齐；
+        没有任何变化的行不会被改写。运行统计由触发器在同一事务中更新。wait为False时不等待提交，返回结果为变化行数的Future。
+        """
+        query = """
+            INSERT INTO workflow_runs (config_id, run_id, status, html_url, conclusion, logs_url,
+                                       workflow_name, repo, branch, trigger_user, completed_at,
+                                       run_attempt, queued_at, started_at, created_at, updated_at)
+            VALUES (:config_id, :run_id, :status, :html_url, :conclusion, :logs_url,
+                    :workflow_name, :repo, :branch, :trigger_user, :completed_at,
+                    :run_attempt, :queued_at, :started_at, :now, :now)
+            ON CONFLICT(run_id) DO UPDATE SET
+                status = excluded.status,
+                conclusion = excluded.conclusion,
+                html_url = COALESCE(excluded.html_url, html_url),
+                completed_at = COALESCE(excluded.completed_at, completed_at),
+                run_attempt = COALESCE(excluded.run_attempt, run_attempt),
+                started_at = COALESCE(excluded.started_at, started_at),
+                queued_at = COALESCE(queued_at, excluded.queued_at),
+                config_id = COALESCE(config_id, excluded.config_id),
+                logs_url = COALESCE(logs_url, excluded.logs_url),
+                workflow_name = COALESCE(workflow_name, excluded.workflow_name),
+                repo = COALESCE(repo, excluded.repo),
+                branch = COALESCE(branch, excluded.branch),
+                trigger_user = COALESCE(trigger_user, excluded.trigger_user),
+                updated_at = excluded.updated_at
+            WHERE status IS NOT excluded.status
+               OR conclusion IS NOT excluded.conclusion
+               OR (excluded.html_url IS NOT NULL AND html_url IS NOT excluded.html_url)
+               OR (completed_at IS NULL AND excluded.completed_at IS NOT NULL)
+               OR (config_id IS NULL AND excluded.config_id IS NOT NULL)
+               OR (excluded.run_attempt IS NOT NULL AND run_attempt IS NOT excluded.run_attempt)
+               OR (excluded.started_at IS NOT NULL AND started_at IS NOT excluded.started_at)
+               OR (queued_at IS NULL AND excluded.queued_at IS NOT NULL)
+        """
+        now = datetime.now().isoformat()
+        defaults = dict.fromkeys(RUN_FIELDS)
+        rows = [{**defaults, **run, 'now': now} for run in runs]
+        if not rows and wait:
+            return 0
+            
+        def write(connection: sqlite3.Connection) -> int:
+            # rowcount不含触发器对统计表的修改，total_changes包含
+            return connection.executemany(query, rows).rowcount
+            
+        future = self.submit_write(write, urgent=wait)
+        if not wait:
+            future.add_done_callback(self._log_write_error)
+            return future
+            
+        try:
+            changed = future.result()
+            self.logger.info(f"运行记录批量写入完成: {len(rows)} 条，变化 {changed} 条")
+            return changed
+            
+        except Exception as e:
+            self.logger.error(f"批量写入运行记录失败: {str(e)}")
+            return 0
+            
+    def update_workflow_run_status(self, run_id: str, status: str, conclusion: str = None,
+                                   completed_at: str = None, started_at: str = None) -> bool:
         """更新工作流运行状态"""
         query = """
             UPDATE workflow_runs 
-            SET status = ?, conclusion = ?, updated_at = ?
+            SET status = ?, conclusion = ?, updated_at = ?, completed_at = COALESCE(?, completed_at),
+                started_at = COALESCE(?, started_at)
             WHERE run_id = ?
         """
         now = datetime.now().isoformat()
-        return self.execute_update(query, (status, conclusion, now, run_id))
+        return self.execute_update(query, (status, conclusion, now, completed_at, started_at, run_id))
     
     def update_workflow_run_by_run_id(self, run_id: str, status: str, conclusion: str = None, 
                                      html_url: str = None) -> Optional[int]:
@@ -344,9 +1299,9 @@ class DatabaseManager:
             """
             now = datetime.now().isoformat()
             
-            cursor = self.connection.cursor()
-            cursor.execute(query, (status, conclusion, html_url, now, run_id))
-            self.connection.commit()
+            cursor = self._write(lambda connection: connection.execute(
+                query, (status, conclusion, html_url, now, run_id)
+            ))
             
             if cursor.rowcount > 0:
                 self.logger.info(f"工作流运行记录更新成功: {run_id}")
@@ -357,7 +1312,7 @@ class DatabaseManager:
             self.logger.error(f"更新工作流运行记录失败: {str(e)}")
             return None
         
-    def get_workflow_run_by_run_id(self, run_id: str) -> Optional[Dict[str, Any]]:
+    def get_workflow_run_by_run_id(self, run_id: str) -> Optional[RunRecord]:
         """根据run_id获取工作流运行记录"""
         query = """
             SELECT wr.*, wc.name as config_name, u.username as user_name
@@ -366,31 +1321,149 @@ class DatabaseManager:
             LEFT JOIN users u ON wc.user_id = u.id
             WHERE wr.run_id = ?
         """
-        results = self.execute_query(query, (run_id,))
+        results = self.query_runs(query, (run_id,))
+        if not results and self.archive_path:
+            # 已归档的运行（如日志搜索结果中的旧运行）
+            results = self.query_runs("SELECT * FROM archive.workflow_runs WHERE run_id = ?", (run_id,))
         return results[0] if results else None
         
-    def get_workflow_runs(self, config_id: int = None) -> List[Dict[str, Any]]:
+    def _load_run_record(self, record_id: int) -> Optional[RunRecord]:
+        """按 id 读取完整的运行记录（分页记录补读未读取的列）"""
+        query = """
+            SELECT wr.*, wc.name as config_name, u.username as user_name
+            FROM workflow_runs wr
+            LEFT JOIN workflow_configs wc ON wr.config_id = wc.id
+            LEFT JOIN users u ON wc.user_id = u.id
+            WHERE wr.id = ?
+        """
+        results = self.query_runs(query, (record_id,))
+        return results[0] if results else None
+        
+    def get_workflow_runs(self, config_id: int = None) -> List[RunRecord]:
         """获取工作流运行记录"""
         if config_id:
             query = """
-                SELECT wr.*, wc.name as config_name, wc.repo, u.username as user_name
+                SELECT wr.*, wc.name as config_name, u.username as user_name
                 FROM workflow_runs wr
                 LEFT JOIN workflow_configs wc ON wr.config_id = wc.id
                 LEFT JOIN users u ON wc.user_id = u.id
                 WHERE wr.config_id = ?
                 ORDER BY wr.created_at DESC
             """
-            return self.execute_query(query, (config_id,))
+            return self.query_runs(query, (config_id,))
         else:
             query = """
-                SELECT wr.*, wc.name as config_name, wc.repo, u.username as user_name
+                SELECT wr.*, wc.name as config_name, u.username as user_name
                 FROM workflow_runs wr
                 LEFT JOIN workflow_configs wc ON wr.config_id = wc.id
                 LEFT JOIN users u ON wc.user_id = u.id
                 ORDER BY wr.created_at DESC
             """
-            return self.execute_query(query)
+            return self.query_runs(query)
             
+    @staticmethod
+    def _workflow_runs_page_query(conditions: List[str]) -> str:
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"""
+            SELECT {', '.join(f'wr.{column}' for column in RUN_LIST_FIELDS)}
+            FROM workflow_runs wr
+            {where}
+            ORDER BY wr.created_at DESC, wr.id DESC
+            LIMIT ?
+        """
+        
+    def get_workflow_runs_page(self, cursor: Tuple[str, int] = None, page_size: int = 100,
+                               repo: str = None, status: str = None, conclusion: str = None,
+                               config_id: int = None) -> Tuple[List[RunRecord], Optional[Tuple[str, int]]]:
+        """按 (created_at, id) 游标分页获取运行记录（按创建时间倒序）
+        
+        cursor 为上一页返回的游标，None表示第一页。返回 (本页记录, 下一页游标)，
+        没有更多记录时游标为None。每页都是一次索引查找，与历史记录总数无关。
+        记录只包含 RUN_LIST_FIELDS 中的列，访问其他列时按 id 补读。
+        """
+        conditions = []
+        params = []
+        for column, value in (('repo', repo), ('status', status),
+                              ('conclusion', conclusion), ('config_id', config_id)):
+            if value is not None:
+                conditions.append(f"wr.{column} = ?")
+                params.append(value)
+        if cursor:
+            conditions.append("(wr.created_at, wr.id) < (?, ?)")
+            params.extend(cursor)
+        params.append(page_size)
+        
+        rows = self.query_runs(self._workflow_runs_page_query(conditions), tuple(params), self._load_run_record)
+        next_cursor = (rows[-1]['created_at'], rows[-1]['id']) if len(rows) == page_size else None
+        return rows, next_cursor
+        
+    def get_workflow_runs_by_run_ids(self, run_ids: List[str]) -> Dict[str, RunRecord]:
+        """批量获取运行记录，返回 {run_id: 记录}"""
+        results = {}
+        run_ids = list(run_ids)
+        # SQLite单条语句的参数个数有上限，分批查询
+        for start in range(0, len(run_ids), 500):
+            batch = run_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            query = f"SELECT * FROM workflow_runs WHERE run_id IN ({placeholders})"
+            for row in self.query_runs(query, tuple(batch)):
+                results[row['run_id']] = row
+        return results
+        
+    def get_active_workflow_runs(self) -> List[RunRecord]:
+        """获取所有未完成的运行记录"""
+        query = """
+            SELECT run_id, config_id, repo, workflow_name, status, created_at
+            FROM workflow_runs
+            WHERE status IS NOT 'completed'
+        """
+        return self.query_runs(query)
+        
+    def get_run_stats(self, dimension: str = 'config') -> List[Dict[str, Any]]:
+        """读取运行统计（按配置 config / 仓库 repo / 日期 day）
+        
+        直接读取统计表，行数与维度键数成正比，与运行记录总数无关。返回
+        [{key, runs, conclusions: {结论: 次数}, queued_runs, queued_seconds, duration_runs, duration_seconds}]，
+        未完成运行的结论为空字符串。
+        """
+        if dimension not in RUN_STATS_DIMENSIONS:
+            self.logger.error(f"未知的运行统计维度: {dimension}")
+            return []
+            
+        query = "SELECT * FROM run_stats WHERE dimension = ? AND runs > 0"
+        stats = {}
+        for row in self.execute_query(query, (dimension,)):
+            item = stats.setdefault(row['key'], dict({'key': row['key'], 'conclusions': {}},
+                                                     **dict.fromkeys(RUN_STATS_COLUMNS, 0)))
+            item['conclusions'][row['conclusion']] = row['runs']
+            for column in RUN_STATS_COLUMNS:
+                item[column] += row[column]
+        return list(stats.values())
+        
+    def get_sync_state(self, scope: str) -> Optional[Dict[str, Any]]:
+        """获取增量同步状态"""
+        results = self.execute_query("SELECT * FROM sync_state WHERE scope = ?", (scope,))
+        if not results:
+            return None
+            
+        state = results[0]
+        state['active_run_ids'] = json.loads(state['active_run_ids'] or '[]')
+        return state
+        
+    def save_sync_state(self, scope: str, cursor: str, active_run_ids: List[str]) -> bool:
+        """保存增量同步状态"""
+        query = """
+            INSERT INTO sync_state (scope, cursor, active_run_ids, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(scope) DO UPDATE SET
+                cursor = excluded.cursor,
+                active_run_ids = excluded.active_run_ids,
+                updated_at = excluded.updated_at
+        """
+        now = datetime.now().isoformat()
+        # 内存中的同步状态为准，无需等待提交
+        return self.execute_update(query, (scope, cursor, json.dumps(sorted(active_run_ids)), now), wait=False)
+        
     def insert_system_log(self, level: str, message: str) -> bool:
         """插入系统日志"""
         query = """
@@ -409,8 +1482,145 @@ class DatabaseManager:
         """
         return self.execute_query(query, (limit,))
         
+    def enable_incremental_vacuum(self) -> bool:
+        """把已有数据库转换为增量回收模式，返回是否已是增量回收模式
+        
+        转换需要执行一次完整的VACUUM，耗时与数据库大小成正比，由保留策略的后台线程
+        在首次清理前调用（VACUUM不能在事务中执行，因此使用调用线程自己的连接）。
+        """
+        try:
+            connection = self.connection
+            if connection.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2:
+                return True
+            self.logger.info("正在把数据库转换为增量回收模式（只执行一次）")
+            connection.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+            connection.execute("VACUUM main")
+            return True
+        except Exception as e:
+            self.logger.error(f"转换为增量回收模式失败: {str(e)}")
+            return False
+        
+    def _ensure_archive_schema(self):
+        """在归档库中创建与主库列相同的表，主库后来新增的列同步添加到归档表"""
+        connection = self.connection
+        with connection:
+            for table, unique_key in ARCHIVE_TABLES.items():
+                columns = [row['name'] for row in connection.execute(f"PRAGMA main.table_info({table})")]
+                archived = {row['name'] for row in connection.execute(f"PRAGMA archive.table_info({table})")}
+                if not archived:
+                    connection.execute(f"CREATE TABLE archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+                    connection.execute(f"CREATE UNIQUE INDEX archive.idx_{table}_{unique_key} ON {table} ({unique_key})")
+                    connection.execute(f"CREATE INDEX archive.idx_{table}_created_at ON {table} (created_at)")
+                    continue
+                for column in columns:
+                    if column not in archived:
+                        connection.execute(f"ALTER TABLE archive.{table} ADD COLUMN {column}")
+                        
+    def _archive_batch(self, table: str, select_ids: str, params: tuple) -> int:
+        """把 select_ids 选出的一批行复制到归档库并从主库删除（同一事务），返回移动的行数
+        
+        运行统计覆盖已归档的运行：删除触发器移出的统计按归档后的记录重新计入。
+        """
+        def move(connection: sqlite3.Connection) -> int:
+            ids = [row[0] for row in connection.execute(select_ids, params)]
+            if not ids:
+                return 0
+                
+            placeholders = ", ".join("?" * len(ids))
+            columns = ", ".join(row['name'] for row in connection.execute(f"PRAGMA main.table_info({table})"))
+            archived_runs = f"wr.run_id IN (SELECT run_id FROM main.workflow_runs WHERE id IN ({placeholders}))"
+            if table == 'workflow_runs':
+                # 同一运行再次归档时替换旧的归档记录，先移出旧记录的统计
+                for statement in self._run_stats_aggregate("archive.workflow_runs", archived_runs, -1):
+                    connection.execute(statement, ids)
+                    
+            connection.execute(f"""
+                INSERT OR REPLACE INTO archive.{table} ({columns})
+                SELECT {columns} FROM main.{table} WHERE id IN ({placeholders})
+            """, ids)
+            
+            if table == 'workflow_runs':
+                for statement in self._run_stats_aggregate("archive.workflow_runs", archived_runs):
+                    connection.execute(statement, ids)
+            connection.execute(f"DELETE FROM main.{table} WHERE id IN ({placeholders})", ids)
+            return len(ids)
+            
+        try:
+            return self._write(move)
+        except Exception as e:
+            self.logger.error(f"归档 {table} 失败: {str(e)}")
+            return 0
+            
+    def archive_runs_before(self, cutoff: str, limit: int = 500) -> int:
+        """把运行时间早于 cutoff 的已完成运行移到归档库，一批最多 limit 条，返回移动的条数
+        
+        运行时间取GitHub上的创建时间（queued_at），回填的历史运行按实际运行时间归档，
+        而不是按写入本地的时间。
+        """
+        return self._archive_batch('workflow_runs', """
+            SELECT id FROM workflow_runs
+            WHERE COALESCE(queued_at, created_at) < ? AND status = 'completed'
+            ORDER BY COALESCE(queued_at, created_at) LIMIT ?
+        """, (cutoff, limit))
+        
+    def archive_config_runs(self, config_id: int, keep: int, limit: int = 500) -> int:
+        """某配置只保留运行时间最近的 keep 条运行，更早的已完成运行移到归档库，一批最多 limit 条
+        
+        与 archive_runs_before 一样按GitHub上的创建时间排序，回填的旧运行不会挤掉近期运行。
+        """
+        return self._archive_batch('workflow_runs', """
+            SELECT id FROM workflow_runs
+            WHERE config_id = ? AND status = 'completed' AND (COALESCE(queued_at, created_at), id) <= (
+                SELECT COALESCE(queued_at, created_at), id FROM workflow_runs WHERE config_id = ?
+                ORDER BY COALESCE(queued_at, created_at) DESC, id DESC LIMIT 1 OFFSET ?
+            )
+            ORDER BY COALESCE(queued_at, created_at), id LIMIT ?
+        """, (config_id, config_id, keep, limit))
+        
+    def archive_system_logs_before(self, cutoff: str, limit: int = 500) -> int:
+        """把早于 cutoff 的系统日志移到归档库，一批最多 limit 条"""
+        return self._archive_batch('system_logs', """
+            SELECT id FROM system_logs WHERE created_at < ? ORDER BY created_at LIMIT ?
+        """, (cutoff, limit))
+        
+    def incremental_vacuum(self, pages: int = 2000) -> int:
+        """把最多 pages 个空闲页归还给文件系统，返回归还的页数（需要增量回收模式）
+        
+        在调用线程自己的连接上用一条语句释放全部页，只在这条语句执行期间占用写锁；
+        经 execute 执行时该语句每次只推进一步（只释放一页），因此用 executescript 执行到底。
+        应在写队列空闲时调用（见 RetentionManager）。
+        """
+        try:
+            connection = self.connection
+            before = connection.execute("PRAGMA main.freelist_count").fetchone()[0]
+            connection.executescript(f"PRAGMA main.incremental_vacuum({int(pages)});")
+            return before - connection.execute("PRAGMA main.freelist_count").fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"回收数据库空间失败: {str(e)}")
+            return 0
+            
+    def get_archive_stats(self) -> Dict[str, int]:
+        """获取归档库中的运行记录和系统日志条数"""
+        if not self.archive_path:
+            return {}
+        results = self.execute_query("""
+            SELECT (SELECT COUNT(*) FROM archive.workflow_runs) AS runs,
+                   (SELECT COUNT(*) FROM archive.system_logs) AS logs
+        """)
+        return results[0] if results else {}
+        
     def close(self):
-        """关闭数据库连接"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None 
\ No newline at end of file
+        """关闭所有线程的数据库连接"""
+        self.stop_backup_scheduler()
+        self.stop_writer()
+        with self._lock:
+            self.initialized = False
+            connections = list(self._connections)
+            self._connections.clear()
+            self._idle.clear()
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local() 
\ No newline at end of file
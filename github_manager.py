@@ -5,73 +5,845 @@ GitHub API管理模块
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+import hashlib
+import threading
+import weakref
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, NamedTuple, Iterator, Callable
+from datetime import datetime, timezone
 import zipfile
-import io
+import tempfile
+from collections.abc import Mapping
+
+class ApiResponse(NamedTuple):
+    """JSON接口响应（可能来自条件请求缓存）"""
+    status_code: int
+    data: Any
+    text: str
+    links: Dict[str, Any]
+    from_cache: bool
+
+class ResponseCache:
+    """条件请求（ETag / Last-Modified）响应缓存
+    
+    以 URL + 参数 + Token 为键保存响应体和校验头，再次请求时发送
+    If-None-Match / If-Modified-Since，收到304时直接返回缓存内容。
+    GitHub不把304计入速率限制。
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        
+    @staticmethod
+    def make_key(url: str, params: Dict[str, Any] = None, token: str = None) -> str:
+        """生成缓存键，Token只保留摘要"""
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        token_digest = hashlib.sha256(token.encode()).hexdigest()[:16] if token else ""
+        return f"{url}?{query}#{token_digest}"
+        
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """获取条件请求头"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return {}
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+            
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """命中304时读取缓存条目"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return entry
+            
+    def store(self, key: str, headers, data: Any, links: Dict[str, Any] = None):
+        """保存200响应"""
+        with self.lock:
+            self.misses += 1
+            etag = headers.get('ETag')
+            last_modified = headers.get('Last-Modified')
+            if not etag and not last_modified:
+                self.entries.pop(key, None)
+                return
+            self.entries[key] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'data': data,
+                'links': links or {}
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+                'hit_rate': self.hits / total if total else 0.0
+            }
+            
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+class RateLimiter:
+    """速率限制调度器
+    
+    从每个响应的 X-RateLimit-* / Retry-After 头跟踪各Token的剩余配额，
+    为每个Token维护一个令牌桶：后台请求按“剩余配额 / 距重置时间”的速率
+    平滑放行，并始终为交互操作（触发、取消等）保留一部分配额。
+    """
+    
+    def __init__(self, reserve: int = 100, burst: int = 10, max_wait: float = 30.0):
+        self.reserve = reserve
+        self.burst = burst
+        self.max_wait = max_wait
+        self.enabled = True
+        self.states = {}
+        self.lock = threading.Lock()
+        
+    @staticmethod
+    def _digest(token: Optional[str]) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()[:16] if token else ""
+        
+    def _state(self, token: Optional[str]) -> Dict[str, Any]:
+        digest = self._digest(token)
+        state = self.states.get(digest)
+        if state is None:
+            state = {
+                'limit': None,
+                'remaining': None,
+                'reset_at': None,
+                'retry_until': 0.0,
+                'bucket': float(self.burst),
+                'last_refill': time.time(),
+                'history': deque(maxlen=120)
+            }
+            self.states[digest] = state
+        return state
+        
+    def update(self, token: Optional[str], headers, status_code: int = 200):
+        """根据响应头更新配额状态"""
+        now = time.time()
+        with self.lock:
+            state = self._state(token)
+            
+            if headers.get('X-RateLimit-Limit'):
+                state['limit'] = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Reset'):
+                reset_at = float(headers['X-RateLimit-Reset'])
+                if state['reset_at'] != reset_at:
+                    # 进入新的配额窗口
+                    state['history'].clear()
+                state['reset_at'] = reset_at
+            if headers.get('X-RateLimit-Remaining'):
+                state['remaining'] = int(headers['X-RateLimit-Remaining'])
+                state['history'].append((now, state['remaining']))
+                
+            retry_after = headers.get('Retry-After')
+            if retry_after:
+                try:
+                    state['retry_until'] = max(state['retry_until'], now + float(retry_after))
+                except ValueError:
+                    pass
+            elif status_code in (403, 429) and state['remaining'] == 0 and state['reset_at']:
+                state['retry_until'] = max(state['retry_until'], state['reset_at'])
+                
+    def seed(self, token: Optional[str], core: Dict[str, Any]):
+        """使用 /rate_limit 接口返回的 core 信息初始化状态"""
+        self.update(token, {
+            'X-RateLimit-Limit': str(core.get('limit', '')),
+            'X-RateLimit-Remaining': str(core.get('remaining', '')),
+            'X-RateLimit-Reset': str(core.get('reset', ''))
+        })
+        
+    def get_delay(self, token: Optional[str], background: bool = False) -> float:
+        """计算本次请求需要等待的秒数并预订一个令牌
+        
+        令牌不足时令牌桶可以为负，返回补足所需的时间，并发等待的请求依次排开；
+        等待时间超过 max_wait 的请求不预订令牌（调用方会放弃本次请求）。
+        """
+        if not self.enabled:
+            return 0.0
+            
+        now = time.time()
+        with self.lock:
+            state = self._state(token)
+            
+            if state['retry_until'] > now:
+                return state['retry_until'] - now
+                
+            remaining = state['remaining']
+            reset_at = state['reset_at']
+            if remaining is None or reset_at is None:
+                return 0.0
+                
+            window = max(reset_at - now, 1.0)
+            if remaining <= 0:
+                return window
+            if not background:
+                return 0.0
+                
+            # 后台请求不动用为交互操作保留的配额
+            budget = remaining - self.reserve
+            if budget <= 0:
+                return window
+                
+            rate = budget / window
+            state['bucket'] = min(float(self.burst), 
+                                  state['bucket'] + (now - state['last_refill']) * rate)
+            state['last_refill'] = now
+            delay = max(1.0 - state['bucket'], 0.0) / rate
+            if delay <= self.max_wait:
+                state['bucket'] -= 1.0
+            return delay
+            
+    def acquire(self, token: Optional[str], background: bool = False) -> bool:
+        """等待直到允许发送请求，等待时间超过上限时返回False"""
+        delay = self.get_delay(token, background)
+        if delay > self.max_wait:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+        
+    def get_state(self, token: Optional[str]) -> Dict[str, Any]:
+        """获取Token当前的配额状态及预计耗尽时间"""
+        now = time.time()
+        with self.lock:
+            state = self._state(token)
+            history = list(state['history'])
+            
+            projected_exhaustion = None
+            consumption_per_minute = 0.0
+            if len(history) >= 2:
+                (first_time, first_remaining), (last_time, last_remaining) = history[0], history[-1]
+                elapsed = last_time - first_time
+                used = first_remaining - last_remaining
+                if elapsed > 0 and used > 0:
+                    consumption_per_minute = used / elapsed * 60
+                    exhaustion = now + last_remaining / (used / elapsed)
+                    if state['reset_at'] is None or exhaustion < state['reset_at']:
+                        projected_exhaustion = exhaustion
+                        
+            return {
+                'limit': state['limit'],
+                'remaining': state['remaining'],
+                'reset_at': state['reset_at'],
+                'retry_after_until': state['retry_until'] if state['retry_until'] > now else None,
+                'consumption_per_minute': consumption_per_minute,
+                'projected_exhaustion': projected_exhaustion
+            }
+            
+# 日志归档下载分块大小，以及临时文件转存磁盘前允许占用的内存
+LOG_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+LOG_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+class LazyLogArchive(Mapping):
+    """按需解压的日志归档
+    
+    以文件名为键的只读映射，成员只在被访问时才解压并解码，
+    且只保留最近一次解码的成员，峰值内存接近单个日志文件的大小。
+    """
+    
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.zipfile = zipfile.ZipFile(fileobj)
+        self.names = [name for name in self.zipfile.namelist() if not name.endswith('/')]
+        self.lock = threading.Lock()
+        self._last_name = None
+        self._last_content = None
+        
+    def __getitem__(self, name: str) -> str:
+        if name not in self.names:
+            raise KeyError(name)
+            
+        with self.lock:
+            if name != self._last_name:
+                with self.zipfile.open(name) as log_file:
+                    self._last_content = log_file.read().decode("utf-8", errors="ignore")
+                self._last_name = name
+            return self._last_content
+            
+    def __iter__(self):
+        return iter(self.names)
+        
+    def __len__(self) -> int:
+        return len(self.names)
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        
+    def get_size(self, name: str) -> int:
+        """获取成员解压后的大小（字节）"""
+        return self.zipfile.getinfo(name).file_size
+        
+    def close(self):
+        """关闭归档并删除临时文件"""
+        with self.lock:
+            self._last_name = None
+            self._last_content = None
+            self.zipfile.close()
+            self.fileobj.close()
+            
+# 速率限制按Token在GitHub端统一计算，进程内所有管理器共享同一调度器
+shared_rate_limiter = RateLimiter()
+
+class SessionPool:
+    """按Token划分的线程安全HTTP会话池
+    
+    每个Token拥有独立的 HTTPAdapter（连接池、keep-alive、重试策略），
+    每个线程拿到的是挂载该适配器的独立 Session，认证头在创建时固定，
+    不同线程、不同Token之间不会相互修改请求头。
+    """
+    
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16, retry_count: int = 3):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retry_count = retry_count
+        self.adapters = {}
+        self.sessions = weakref.WeakSet()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        
+    def _create_adapter(self) -> HTTPAdapter:
+        retry = Retry(
+            total=self.retry_count,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        return HTTPAdapter(pool_connections=self.pool_connections,
+                           pool_maxsize=self.pool_maxsize,
+                           max_retries=retry)
+        
+    def get(self, token: Optional[str]) -> requests.Session:
+        """获取当前线程中该Token对应的会话"""
+        digest = RateLimiter._digest(token)
+        sessions = getattr(self.local, 'sessions', None)
+        if sessions is None:
+            sessions = self.local.sessions = {}
+            
+        session = sessions.get(digest)
+        if session is None:
+            with self.lock:
+                adapter = self.adapters.get(digest)
+                if adapter is None:
+                    adapter = self.adapters[digest] = self._create_adapter()
+                    
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'Accept': 'application/vnd.github.v3+json',
+                    'User-Agent': 'GitHub-Action-Manager/1.0.0'
+                })
+                if token:
+                    session.headers['Authorization'] = f'token {token}'
+                self.sessions.add(session)
+            sessions[digest] = session
+        return session
+        
+    def close(self):
+        """关闭所有会话和连接池"""
+        with self.lock:
+            for session in list(self.sessions):
+                session.close()
+            for adapter in self.adapters.values():
+                adapter.close()
+            self.sessions.clear()
+            self.adapters.clear()
+        self.local = threading.local()
+        
+def format_created_filter(since: datetime, until: datetime = None) -> str:
+    """生成运行列表 created 查询参数，如 ">=2024-01-01T00:00:00Z"，指定 until 时为 "since..until" 区间"""
+    def stamp(moment: datetime) -> str:
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        
+    if until is not None:
+        return f"{stamp(since)}..{stamp(until)}"
+    return f">={stamp(since)}"
+    
+def next_created_until(since: Optional[datetime], query_runs: List[Dict[str, Any]], total_count: int,
+                       previous_until: datetime = None) -> Optional[datetime]:
+    """带 created 筛选的运行列表每次查询最多返回1000条（total_count 仍为总数）
+    
+    本次查询未取完时返回剩余部分的上界（本次取到的最早创建时间），用 since..上界 区间继续查询；
+    已取完、没有筛选条件或上界没有前移时返回None。
+    """
+    created = [run['created_at'] for run in query_runs if run.get('created_at')]
+    if since is None or total_count <= len(query_runs) or not created:
+        return None
+    until = datetime.fromisoformat(min(created).replace('Z', '+00:00'))
+    if previous_until is not None and until >= previous_until:
+        return None
+    return until
+    
+# 进程内共享连接池，避免各管理器重复建立连接
+shared_session_pool = SessionPool()
+
+class TokenPool:
+    """只读请求的多Token池
+    
+    在所有已注册Token之间分摊只读流量（运行列表、状态轮询、日志下载），
+    优先选择剩余配额最多的Token，配额相同时轮询。对某仓库无权限的Token
+    会被暂时排除，失效的Token对所有仓库排除。子资源（某个运行、日志等）的
+    403/404 可能只是资源不存在，只有 GET /repos/{repo} 确认无权访问时才排除，
+    确认可以访问的结果同样保留 denial_ttl 秒。
+    """
+    
+    def __init__(self, rate_limiter: RateLimiter = None, denial_ttl: float = 600.0):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.denial_ttl = denial_ttl
+        self.tokens = []
+        self.denied = {}
+        self.accessible = {}
+        self.invalid = {}
+        self.cursor = 0
+        self.lock = threading.Lock()
+        
+    def set_tokens(self, tokens: List[str]):
+        """设置池中的Token（去重并保持顺序）"""
+        with self.lock:
+            self.tokens = list(dict.fromkeys(t for t in tokens if t))
+            self.denied.clear()
+            self.accessible.clear()
+            self.invalid.clear()
+            self.cursor = 0
+            
+    def __len__(self) -> int:
+        return len(self.tokens)
+        
+    def _headroom(self, token: str) -> float:
+        remaining = self.rate_limiter.get_state(token)['remaining']
+        # 尚未观测过配额的Token按满额处理，保证每个Token都会被用到
+        return float('inf') if remaining is None else remaining
+        
+    def candidates(self, repo: str) -> List[str]:
+        """返回可访问该仓库的Token，按剩余配额从多到少排列"""
+        now = time.time()
+        with self.lock:
+            if not self.tokens:
+                return []
+                
+            # 轮换起点，使配额相同的Token轮流被选中
+            start = self.cursor % len(self.tokens)
+            self.cursor += 1
+            rotated = self.tokens[start:] + self.tokens[:start]
+            
+            denied = self.denied.get(repo, {})
+            usable = [
+                token for token in rotated
+                if self.invalid.get(token, 0) <= now and denied.get(token, 0) <= now
+            ]
+            
+        return sorted(usable, key=self._headroom, reverse=True)
+        
+    def mark_denied(self, repo: str, token: str, status_code: int):
+        """记录Token对仓库无访问权限（401视为Token失效）"""
+        until = time.time() + self.denial_ttl
+        with self.lock:
+            if status_code == 401:
+                self.invalid[token] = until
+            else:
+                self.denied.setdefault(repo, {})[token] = until
+                self.accessible.get(repo, {}).pop(token, None)
+                
+    def mark_accessible(self, repo: str, token: str):
+        """记录已确认Token可以访问仓库"""
+        with self.lock:
+            self.accessible.setdefault(repo, {})[token] = time.time() + self.denial_ttl
+            
+    def is_accessible(self, repo: str, token: str) -> bool:
+        """Token是否在 denial_ttl 内已确认可以访问仓库"""
+        with self.lock:
+            return self.accessible.get(repo, {}).get(token, 0) > time.time()
+            
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """获取池中每个Token的配额情况（Token只显示末4位）"""
+        now = time.time()
+        stats = []
+        for token in list(self.tokens):
+            state = self.rate_limiter.get_state(token)
+            stats.append({
+                'token_hint': f"...{token[-4:]}",
+                'remaining': state['remaining'],
+                'limit': state['limit'],
+                'valid': self.invalid.get(token, 0) <= now,
+                'denied_repos': [repo for repo, tokens in self.denied.items() 
+                                 if tokens.get(token, 0) > now]
+            })
+        return stats
+
+class TokenValidityCache:
+    """Token有效性缓存
+    
+    由 /user 响应写入（同时记录 X-OAuth-Scopes 权限范围和
+    github-authentication-token-expiration 过期时间），任何请求返回401时
+    立即标记为失效。在TTL内的检查不再访问 /user。
+    """
+    
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        
+    @staticmethod
+    def _parse_expiration(value: Optional[str]) -> Optional[float]:
+        """解析Token过期时间头，如 "2024-05-01 12:00:00 UTC" """
+        if not value:
+            return None
+        for fmt in ('%Y-%m-%d %H:%M:%S UTC', '%Y-%m-%d %H:%M:%S %z'):
+            try:
+                parsed = datetime.strptime(value.strip(), fmt)
+            except ValueError:
+                continue
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        return None
+        
+    def observe(self, token: Optional[str], url: str, status_code: int, headers: Mapping):
+        """根据响应更新缓存：/user 的200/304记为有效，任意401记为失效"""
+        if not token:
+            return
+            
+        digest = RateLimiter._digest(token)
+        if status_code == 401:
+            with self.lock:
+                self.entries[digest] = {'valid': False, 'checked_at': time.time(),
+                                        'scopes': [], 'expires_at': None}
+            return
+            
+        path = str(url).split('?', 1)[0].rstrip('/')
+        if not path.endswith('/user') or status_code not in (200, 304):
+            return
+            
+        entry = {'valid': True, 'checked_at': time.time(), 'scopes': [], 'expires_at': None}
+        with self.lock:
+            previous = self.entries.get(digest)
+            if status_code == 304 and previous:
+                # 304不携带完整头信息时保留之前记录的权限范围和过期时间
+                entry['scopes'] = previous['scopes']
+                entry['expires_at'] = previous['expires_at']
+                
+        scopes = headers.get('X-OAuth-Scopes')
+        if scopes is not None:
+            entry['scopes'] = [scope.strip() for scope in scopes.split(',') if scope.strip()]
+        expires_at = self._parse_expiration(headers.get('github-authentication-token-expiration'))
+        if expires_at is not None:
+            entry['expires_at'] = expires_at
+            
+        with self.lock:
+            self.entries[digest] = entry
+            
+    def is_valid(self, token: Optional[str]) -> Optional[bool]:
+        """返回缓存的有效性，未缓存或已超过TTL时返回None"""
+        if not token:
+            return False
+            
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(RateLimiter._digest(token))
+        if not entry or now - entry['checked_at'] > self.ttl:
+            return None
+        if entry['valid'] and entry['expires_at'] is not None and entry['expires_at'] <= now:
+            return False
+        return entry['valid']
+        
+    def get_info(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """获取Token的缓存信息（有效性、权限范围、过期时间）"""
+        with self.lock:
+            entry = self.entries.get(RateLimiter._digest(token))
+        if not entry:
+            return None
+            
+        info = dict(entry)
+        info['scopes'] = list(entry['scopes'])
+        if entry['expires_at'] is not None:
+            info['expires_at'] = datetime.fromtimestamp(entry['expires_at'], timezone.utc).isoformat()
+        return info
+        
+    def invalidate(self, token: Optional[str] = None):
+        """移除单个Token或全部Token的缓存"""
+        with self.lock:
+            if token is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(RateLimiter._digest(token), None)
+                
+# 进程内共享，UserManager 与 WorkflowManager 各自的管理器共用同一份校验结果
+shared_token_validity = TokenValidityCache()
 
 class GitHubManager:
     """GitHub API管理器"""
     
-    def __init__(self):
+    def __init__(self, response_cache: ResponseCache = None, rate_limiter: RateLimiter = None,
+                 session_pool: SessionPool = None, token_validity: TokenValidityCache = None):
         self.base_url = "https://api.github.com"
-        self.session = requests.Session()
+        self.timeout = 30
         self.token = None
         self.logger = logging.getLogger(__name__)
+        self.response_cache = response_cache or ResponseCache()
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.session_pool = session_pool or shared_session_pool
+        self.token_validity = token_validity or shared_token_validity
+        self.token_pool = None
+        self._local = threading.local()
         
-        # 设置默认请求头
-        self.session.headers.update({
-            'Accept': 'application/vnd.github.v3+json',
-            'User-Agent': 'GitHub-Action-Manager/1.0.0'
-        })
+    @property
+    def session(self) -> requests.Session:
+        """当前线程、当前Token对应的会话"""
+        return self.session_pool.get(self.token)
         
     def set_token(self, token: str):
         """设置GitHub Token"""
         self.token = token
-        self.session.headers.update({
-            'Authorization': f'token {token}'
-        })
+        
+    def set_timeout(self, timeout: int):
+        """设置请求超时时间（秒）"""
+        self.timeout = timeout
+        
+    def set_token_pool(self, tokens: List[str]):
+        """设置用于分摊只读请求的Token池，触发等写操作仍使用当前Token"""
+        if self.token_pool is None:
+            self.token_pool = TokenPool(self.rate_limiter)
+        self.token_pool.set_tokens(tokens)
+        
+    def get_token_pool_stats(self) -> List[Dict[str, Any]]:
+        """获取Token池中各Token的配额情况"""
+        return self.token_pool.get_stats() if self.token_pool else []
+        
+    def set_rate_limit_check(self, enabled: bool):
+        """启用或关闭速率限制调度"""
+        self.rate_limiter.enabled = enabled
+        
+    @contextmanager
+    def background_requests(self):
+        """在该上下文中发出的请求按后台优先级调度"""
+        previous = getattr(self._local, 'background', False)
+        self._local.background = True
+        try:
+            yield self
+        finally:
+            self._local.background = previous
+            
+    def _request(self, method: str, url: str, token: str = None, scheduled: bool = True,
+                 **kwargs) -> requests.Response:
+        """统一请求入口，发送前经过速率限制调度，返回后记录配额"""
+        token = token or self.token
+        background = getattr(self._local, 'background', False)
+        
+        if scheduled and not self.rate_limiter.acquire(token, background):
+            response = requests.Response()
+            response.status_code = 429
+            response._content = "请求因速率限制被推迟".encode('utf-8')
+            response.encoding = 'utf-8'
+            response.url = url
+            return response
+            
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session_pool.get(token).request(method, url, **kwargs)
+        self.rate_limiter.update(token, response.headers, response.status_code)
+        self.token_validity.observe(token, url, response.status_code, response.headers)
+        return response
+        
+    def _read_tokens(self, repo: str = None) -> List[str]:
+        """选择只读请求可用的Token，未设置Token池时只使用当前Token"""
+        if self.token_pool and repo:
+            candidates = self.token_pool.candidates(repo)
+            if candidates:
+                return candidates
+        return [self.token]
+        
+    def _access_denied(self, token: str, status_code: int) -> bool:
+        """判断响应是否表示该Token无权访问（而不是速率限制）"""
+        if not self.token_pool or status_code not in (401, 403, 404):
+            return False
+        if status_code == 403 and self.rate_limiter.get_state(token)['remaining'] == 0:
+            return False
+        return True
+        
+    def _repo_denied(self, token: str, repo: str, url: str, status_code: int) -> bool:
+        """确认Token对仓库无权访问：401、仓库本身的403/404，或子资源403/404后探测仓库仍被拒绝"""
+        repo_url = f"{self.base_url}/repos/{repo}"
+        if status_code == 401 or url.split('?')[0].rstrip('/') == repo_url:
+            return True
+        if not repo or self.token_pool.is_accessible(repo, token):
+            return False
+        probe = self._get_json_as(repo_url, None, token)
+        if probe.status_code == 200:
+            self.token_pool.mark_accessible(repo, token)
+        return self._access_denied(token, probe.status_code)
+        
+    def _read_request(self, method: str, url: str, repo: str = None, **kwargs) -> requests.Response:
+        """只读请求，设置Token池时依次尝试可访问该仓库的Token
+        
+        只关闭被换掉的Token的响应；返回的响应（包括所有Token都被拒绝时的最后一个）
+        保持打开，stream=True 时仍可读取正文，由调用方关闭。
+        """
+        tokens = self._read_tokens(repo)
+        response = None
+        for index, token in enumerate(tokens):
+            response = self._request(method, url, token=token, **kwargs)
+            if not self._access_denied(token, response.status_code) or \
+                    not self._repo_denied(token, repo, url, response.status_code):
+                break
+            self.token_pool.mark_denied(repo, token, response.status_code)
+            if index < len(tokens) - 1:
+                response.close()
+        return response
+        
+    def _get_json(self, url: str, params: Dict[str, Any] = None, repo: str = None) -> ApiResponse:
+        """只读JSON请求，设置Token池时按仓库选择Token"""
+        response = None
+        for token in self._read_tokens(repo):
+            response = self._get_json_as(url, params, token)
+            if not self._access_denied(token, response.status_code) or \
+                    not self._repo_denied(token, repo, url, response.status_code):
+                break
+            self.token_pool.mark_denied(repo, token, response.status_code)
+        return response
+        
+    def _get_json_as(self, url: str, params: Dict[str, Any], token: str) -> ApiResponse:
+        """发送带条件请求头的GET，304时返回缓存内容"""
+        key = self.response_cache.make_key(url, params, token)
+        headers = self.response_cache.conditional_headers(key)
+        response = self._request('GET', url, token=token, params=params, headers=headers)
+        
+        if response.status_code == 304:
+            entry = self.response_cache.get(key)
+            if entry is not None:
+                return ApiResponse(200, entry['data'], "", entry['links'], True)
+            # 缓存已被淘汰，重新发送无条件请求
+            response = self._request('GET', url, token=token, params=params)
+            
+        if response.status_code == 200:
+            data = response.json()
+            self.response_cache.store(key, response.headers, data, response.links)
+            return ApiResponse(200, data, "", response.links, False)
+            
+        return ApiResponse(response.status_code, None, response.text, {}, False)
+        
+    def _paginate(self, url: str, params: Dict[str, Any] = None, item_key: str = None,
+                  stop_when: Callable[[Dict[str, Any]], bool] = None,
+                  repo: str = None) -> Iterator[Dict[str, Any]]:
+        """沿 Link: rel=next 逐页请求并逐条产出记录
+        
+        stop_when 对某条记录返回True时停止，不再请求后续页面。
+        """
+        while url:
+            response = self._get_json(url, params=params, repo=repo)
+            if response.status_code != 200:
+                self.logger.error(f"分页请求失败: {response.status_code} - {response.text}")
+                return
+                
+            items = response.data.get(item_key, []) if item_key else response.data
+            for item in items:
+                if stop_when and stop_when(item):
+                    return
+                yield item
+                
+            # next链接已包含全部查询参数
+            url = response.links.get('next', {}).get('url')
+            params = None
+            
+    @staticmethod
+    def created_before(cutoff: datetime) -> Callable[[Dict[str, Any]], bool]:
+        """生成“created_at早于cutoff时停止”的判断函数"""
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=timezone.utc)
+            
+        def predicate(item: Dict[str, Any]) -> bool:
+            created_at = item.get('created_at')
+            if not created_at:
+                return False
+            return datetime.fromisoformat(created_at.replace('Z', '+00:00')) < cutoff
+            
+        return predicate
+        
+    def get_rate_limit_state(self) -> Dict[str, Any]:
+        """获取当前Token的配额状态"""
+        return self.rate_limiter.get_state(self.token)
+        
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取条件请求缓存命中统计"""
+        return self.response_cache.get_stats()
+        
+    def clear_cache(self):
+        """清空条件请求缓存"""
+        self.response_cache.clear()
         
     def test_connection(self) -> bool:
-        """测试GitHub连接"""
+        """测试GitHub连接（TTL内使用缓存的校验结果）"""
         try:
             if not self.token:
                 return False
                 
-            response = self.session.get(f"{self.base_url}/user")
-            return response.status_code == 200
+            return self.test_token(self.token)
             
         except Exception as e:
             self.logger.error(f"测试GitHub连接失败: {str(e)}")
             return False
             
-    def test_token(self, token: str) -> bool:
-        """测试Token有效性"""
+    def test_token(self, token: str, use_cache: bool = True) -> bool:
+        """测试Token有效性（TTL内使用缓存的校验结果）"""
         try:
-            headers = {
-                'Authorization': f'token {token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'GitHub-Action-Manager/1.0.0'
-            }
-            
-            response = requests.get(f"{self.base_url}/user", headers=headers)
+            if use_cache:
+                cached = self.token_validity.is_valid(token)
+                if cached is not None:
+                    return cached
+                    
+            response = self._request('GET', f"{self.base_url}/user", token=token)
             return response.status_code == 200
             
         except Exception as e:
             self.logger.error(f"测试Token失败: {str(e)}")
             return False
             
+    def get_token_info(self, token: str = None) -> Optional[Dict[str, Any]]:
+        """获取Token的缓存信息（有效性、权限范围、过期时间）"""
+        return self.token_validity.get_info(token or self.token)
+        
     def get_user_info(self) -> Optional[Dict[str, Any]]:
         """获取用户信息"""
         try:
             if not self.token:
                 return None
                 
-            response = self.session.get(f"{self.base_url}/user")
+            response = self._get_json(f"{self.base_url}/user")
             if response.status_code == 200:
-                return response.json()
+                return response.data
             return None
             
         except Exception as e:
@@ -79,25 +851,22 @@ class GitHubManager:
             return None
             
     def list_workflows(self, repo: str) -> List[Dict[str, Any]]:
-        """列出仓库的工作流"""
+        """列出仓库的工作流（包含所有分页）"""
         try:
-            if not self.token:
-                return []
-                
-            url = f"{self.base_url}/repos/{repo}/actions/workflows"
-            response = self.session.get(url)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('workflows', [])
-            else:
-                self.logger.error(f"获取工作流列表失败: {response.status_code} - {response.text}")
-                return []
+            return list(self.iter_workflows(repo))
                 
         except Exception as e:
             self.logger.error(f"获取工作流列表失败: {str(e)}")
             return []
             
+    def iter_workflows(self, repo: str, per_page: int = 100) -> Iterator[Dict[str, Any]]:
+        """逐页迭代仓库的工作流"""
+        if not self.token:
+            return iter(())
+            
+        url = f"{self.base_url}/repos/{repo}/actions/workflows"
+        return self._paginate(url, {"per_page": per_page}, 'workflows', repo=repo)
+            
     def get_workflow(self, repo: str, workflow_id: str) -> Optional[Dict[str, Any]]:
         """获取特定工作流信息"""
         try:
@@ -105,10 +874,10 @@ class GitHubManager:
                 return None
                 
             url = f"{self.base_url}/repos/{repo}/actions/workflows/{workflow_id}"
-            response = self.session.get(url)
+            response = self._get_json(url, repo=repo)
             
             if response.status_code == 200:
-                return response.json()
+                return response.data
             return None
             
         except Exception as e:
@@ -131,7 +900,7 @@ class GitHubManager:
             if inputs:
                 data["inputs"] = inputs
                 
-            response = self.session.post(url, json=data)
+            response = self._request('POST', url, json=data)
             
             if response.status_code == 204:
                 # 成功触发，返回基本信息
@@ -166,11 +935,10 @@ class GitHubManager:
                 "per_page": per_page
             }
             
-            response = self.session.get(url, params=params)
+            response = self._get_json(url, params=params, repo=repo)
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get('workflow_runs', [])
+                return response.data.get('workflow_runs', [])
             else:
                 self.logger.error(f"获取工作流运行记录失败: {response.status_code} - {response.text}")
                 return []
@@ -179,6 +947,73 @@ class GitHubManager:
             self.logger.error(f"获取工作流运行记录失败: {str(e)}")
             return []
             
+    def list_repository_runs(self, repo: str, created_since: datetime = None, per_page: int = 100,
+                             max_pages: Optional[int] = 10, status: str = None) -> Optional[List[Dict[str, Any]]]:
+        """列出仓库全部工作流的运行记录（created_since 之后创建的，最多 max_pages 页，None 表示全部）
+        
+        status 指定时只列出该状态的运行。超过单次查询1000条上限时按更早的创建时间区间继续查询。
+        请求失败时返回None，以便调用方区分“没有新运行”和“获取失败”。
+        """
+        try:
+            if not self.token:
+                return None
+                
+            base_url = f"{self.base_url}/repos/{repo}/actions/runs"
+            base_params = {"per_page": per_page}
+            if status:
+                base_params["status"] = status
+            if created_since:
+                base_params["created"] = format_created_filter(created_since)
+                
+            url, params = base_url, dict(base_params)
+            runs = []
+            query_start = 0
+            until = None
+            pages = 0
+            while url and (max_pages is None or pages < max_pages):
+                response = self._get_json(url, params=params, repo=repo)
+                if response.status_code != 200:
+                    self.logger.error(f"获取仓库运行记录失败: {response.status_code} - {response.text}")
+                    return None
+                    
+                pages += 1
+                runs.extend(response.data.get('workflow_runs', []))
+                url = response.links.get('next', {}).get('url')
+                params = None
+                if not url:
+                    until = next_created_until(created_since, runs[query_start:],
+                                               response.data.get('total_count', 0), until)
+                    if until:
+                        url = base_url
+                        params = dict(base_params, created=format_created_filter(created_since, until))
+                        query_start = len(runs)
+            # 区间边界上的运行可能被两次查询同时返回
+            return list({run['id']: run for run in runs}.values())
+            
+        except Exception as e:
+            self.logger.error(f"获取仓库运行记录失败: {str(e)}")
+            return None
+            
+    def iter_workflow_runs(self, repo: str, workflow_id: str = None, per_page: int = 100,
+                           stop_when: Callable[[Dict[str, Any]], bool] = None,
+                           **filters) -> Iterator[Dict[str, Any]]:
+        """逐页迭代工作流运行记录（按创建时间倒序）
+        
+        filters 透传为查询参数，如 branch、status、event、actor、created。
+        例如 stop_when=GitHubManager.created_before(cutoff) 可在早于cutoff时停止。
+        """
+        if not self.token:
+            return iter(())
+            
+        if workflow_id:
+            url = f"{self.base_url}/repos/{repo}/actions/workflows/{workflow_id}/runs"
+        else:
+            url = f"{self.base_url}/repos/{repo}/actions/runs"
+            
+        params = {"per_page": per_page}
+        params.update({k: v for k, v in filters.items() if v is not None})
+        return self._paginate(url, params, 'workflow_runs', stop_when, repo=repo)
+        
     def get_workflow_run(self, repo: str, run_id: str) -> Optional[Dict[str, Any]]:
         """获取特定工作流运行信息"""
         try:
@@ -186,10 +1021,10 @@ class GitHubManager:
                 return None
                 
             url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}"
-            response = self.session.get(url)
+            response = self._get_json(url, repo=repo)
             
             if response.status_code == 200:
-                return response.json()
+                return response.data
             return None
             
         except Exception as e:
@@ -203,7 +1038,7 @@ class GitHubManager:
                 return False
                 
             url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}/cancel"
-            response = self.session.post(url)
+            response = self._request('POST', url)
             
             return response.status_code == 202
             
@@ -212,30 +1047,32 @@ class GitHubManager:
             return False
             
             
-    def get_workflow_run_logs(self, repo: str, run_id: str) -> Optional[dict]:
+    def get_workflow_run_logs(self, repo: str, run_id: str) -> Optional["LazyLogArchive"]:
         """
         获取工作流运行日志
-        返回格式: { 'job1.txt': '内容...', 'job2.txt': '内容...' }
+        返回按需解码的只读映射: { 'job1.txt': '内容...', 'job2.txt': '内容...' }
+        归档以分块方式下载到临时文件，使用完毕后应调用 close()
         """
         try:
             if not self.token:
                 return None
 
             url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}/logs"
-            response = self.session.get(url)
+            response = self._read_request('GET', url, repo=repo, stream=True)
 
             if response.status_code == 200:
-                logs = {}
+                spool = tempfile.SpooledTemporaryFile(max_size=LOG_SPOOL_MAX_MEMORY)
                 try:
-                    zip_bytes = io.BytesIO(response.content)
-                    with zipfile.ZipFile(zip_bytes) as zf:
-                        for f in zf.namelist():
-                            with zf.open(f) as log_file:
-                                logs[f] = log_file.read().decode("utf-8", errors="ignore")
-                    return logs
+                    for chunk in response.iter_content(chunk_size=LOG_DOWNLOAD_CHUNK_SIZE):
+                        spool.write(chunk)
+                    spool.seek(0)
+                    return LazyLogArchive(spool)
                 except Exception as e:
+                    spool.close()
                     self.logger.error(f"解压日志失败: {str(e)}")
                     return None
+                finally:
+                    response.close()
             else:
                 self.logger.error(f"获取日志失败: {response.status_code} - {response.text}")
                 return None
@@ -244,29 +1081,74 @@ class GitHubManager:
             self.logger.error(f"获取工作流运行日志失败: {str(e)}")
             return None
 
-    def list_repositories(self, username: str = None) -> List[Dict[str, Any]]:
-        """列出仓库"""
+    def list_workflow_run_jobs(self, repo: str, run_id: str, 
+                               filter: str = "latest") -> Optional[List[Dict[str, Any]]]:
+        """列出工作流运行的所有任务（filter 为 latest 或 all）
+        
+        请求失败时返回None，以便调用方区分“没有任务”和“获取失败”。
+        """
         try:
             if not self.token:
-                return []
+                return None
                 
-            if username:
-                url = f"{self.base_url}/users/{username}/repos"
-            else:
-                url = f"{self.base_url}/user/repos"
+            url = f"{self.base_url}/repos/{repo}/actions/runs/{run_id}/jobs"
+            params = {"per_page": 100, "filter": filter}
+            jobs = []
+            while url:
+                response = self._get_json(url, params=params, repo=repo)
+                if response.status_code != 200:
+                    self.logger.error(f"获取运行任务列表失败: {response.status_code} - {response.text}")
+                    return None
+                    
+                jobs.extend(response.data.get('jobs', []))
+                url = response.links.get('next', {}).get('url')
+                params = None
+            return jobs
+            
+        except Exception as e:
+            self.logger.error(f"获取运行任务列表失败: {str(e)}")
+            return None
+            
+    def get_job_logs(self, repo: str, job_id: str) -> Optional[str]:
+        """获取单个任务的日志文本"""
+        try:
+            if not self.token:
+                return None
                 
-            response = self.session.get(url)
+            url = f"{self.base_url}/repos/{repo}/actions/jobs/{job_id}/logs"
+            response = self._read_request('GET', url, repo=repo)
             
             if response.status_code == 200:
-                return response.json()
+                return response.content.decode("utf-8", errors="ignore")
             else:
-                self.logger.error(f"获取仓库列表失败: {response.status_code} - {response.text}")
-                return []
+                self.logger.error(f"获取任务日志失败: {response.status_code} - {response.text}")
+                return None
+                
+        except Exception as e:
+            self.logger.error(f"获取任务日志失败: {str(e)}")
+            return None
+            
+    def list_repositories(self, username: str = None) -> List[Dict[str, Any]]:
+        """列出仓库（包含所有分页）"""
+        try:
+            return list(self.iter_repositories(username))
                 
         except Exception as e:
             self.logger.error(f"获取仓库列表失败: {str(e)}")
             return []
             
+    def iter_repositories(self, username: str = None, per_page: int = 100) -> Iterator[Dict[str, Any]]:
+        """逐页迭代仓库"""
+        if not self.token:
+            return iter(())
+            
+        if username:
+            url = f"{self.base_url}/users/{username}/repos"
+        else:
+            url = f"{self.base_url}/user/repos"
+            
+        return self._paginate(url, {"per_page": per_page})
+            
     def get_repository(self, repo: str) -> Optional[Dict[str, Any]]:
         """获取仓库信息"""
         try:
@@ -274,10 +1156,10 @@ class GitHubManager:
                 return None
                 
             url = f"{self.base_url}/repos/{repo}"
-            response = self.session.get(url)
+            response = self._get_json(url, repo=repo)
             
             if response.status_code == 200:
-                return response.json()
+                return response.data
             return None
             
         except Exception as e:
@@ -287,10 +1169,15 @@ class GitHubManager:
     def check_rate_limit(self) -> Optional[Dict[str, Any]]:
         """检查API速率限制"""
         try:
-            response = self.session.get(f"{self.base_url}/rate_limit")
+            # 查询配额本身不计入速率限制，无需调度
+            response = self._request('GET', f"{self.base_url}/rate_limit", scheduled=False)
             
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                core = data.get('resources', {}).get('core')
+                if core:
+                    self.rate_limiter.seed(self.token, core)
+                return data
             return None
             
         except Exception as e:
@@ -311,11 +1198,10 @@ class GitHubManager:
                 "direction": "desc"  # 倒序，最新的在前
             }
             
-            response = self.session.get(url, params=params)
+            response = self._get_json(url, params=params, repo=repo)
             
             if response.status_code == 200:
-                data = response.json()
-                runs = data.get('workflow_runs', [])
+                runs = response.data.get('workflow_runs', [])
                 if runs:
                     return runs[0]
             return None
@@ -337,11 +1223,10 @@ class GitHubManager:
                 "per_page": 10  # 获取最近10个运行
             }
             
-            response = self.session.get(url, params=params)
+            response = self._get_json(url, params=params, repo=repo)
             
             if response.status_code == 200:
-                data = response.json()
-                runs = data.get('workflow_runs', [])
+                runs = response.data.get('workflow_runs', [])
                 
                 # 确保trigger_time是UTC时间
                 if trigger_time.tzinfo is None:
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行日志本地缓存模块
+
+已完成运行的日志不会再变化。本模块把日志归档和单个任务日志保存到本地目录，
+按 (仓库, run_id, 尝试次数, 成员) 索引，再次打开时直接读取本地文件，离线也能查看。
+内容按sha256寻址存放，相同内容只保存一份；文本日志用zlib压缩，zip归档本身已压缩，
+原样保存。缓存总大小超过上限时按最近访问时间淘汰。
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Tuple, BinaryIO
+
+# 流式写入/校验时的分块大小
+CACHE_CHUNK_SIZE = 1024 * 1024
+
+# 整个归档对应的成员名
+ARCHIVE_MEMBER = ""
+
+class LogCache:
+    """内容寻址的运行日志缓存
+    
+    索引保存在缓存目录下的 index.db 中（entries: 键 -> 摘要，blobs: 摘要 -> 大小），
+    数据文件位于 blobs/<摘要前两位>/<摘要>。一个数据文件可以被多个键引用，
+    最后一个引用被淘汰时才删除文件。
+    """
+    
+    def __init__(self, cache_dir: str = "log_cache", max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self.logger = logging.getLogger(__name__)
+        
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    compressed INTEGER NOT NULL
+                )
+            """)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    repo TEXT NOT NULL,
+                    run_id TEXT NOT NULL,
+                    attempt INTEGER NOT NULL,
+                    member TEXT NOT NULL,
+                    digest TEXT NOT NULL REFERENCES blobs (digest),
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (repo, run_id, attempt, member)
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries (digest)")
+            
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", digest[:2], digest)
+        
+    def _lookup(self, repo: str, run_id: str, attempt: int, member: str,
+                touch: bool = True) -> Optional[sqlite3.Row]:
+        """查找条目；touch为True时更新访问时间并记录命中/未命中（后台索引读取时不计入）"""
+        key = (repo.lower(), str(run_id), int(attempt or 1), member)
+        row = self.connection.execute("""
+            SELECT e.digest, b.size, b.compressed
+            FROM entries e JOIN blobs b ON e.digest = b.digest
+            WHERE e.repo = ? AND e.run_id = ? AND e.attempt = ? AND e.member = ?
+        """, key).fetchone()
+        
+        if row is None or not os.path.exists(self._blob_path(row['digest'])):
+            if touch:
+                self.stats['misses'] += 1
+            return None
+        if not touch:
+            return row
+            
+        with self.connection:
+            self.connection.execute("""
+                UPDATE entries SET last_access = ?
+                WHERE repo = ? AND run_id = ? AND attempt = ? AND member = ?
+            """, (time.time(),) + key)
+        self.stats['hits'] += 1
+        return row
+        
+    def get(self, repo: str, run_id: str, attempt: int = 1, member: str = ARCHIVE_MEMBER,
+            touch: bool = True) -> Optional[bytes]:
+        """读取缓存内容（已解压），未缓存时返回None"""
+        try:
+            with self.lock:
+                row = self._lookup(repo, run_id, attempt, member, touch)
+                if row is None:
+                    return None
+                with open(self._blob_path(row['digest']), 'rb') as f:
+                    data = f.read()
+            return zlib.decompress(data) if row['compressed'] else data
+            
+        except Exception as e:
+            self.logger.error(f"读取日志缓存失败: {str(e)}")
+            return None
+            
+    def open(self, repo: str, run_id: str, attempt: int = 1, member: str = ARCHIVE_MEMBER,
+             touch: bool = True) -> Optional[BinaryIO]:
+        """以文件对象打开缓存内容，未缓存时返回None
+        
+        原样保存的内容（如zip归档）直接打开数据文件，不读入内存；
+        压缩保存的内容解压到临时文件。
+        """
+        try:
+            with self.lock:
+                row = self._lookup(repo, run_id, attempt, member, touch)
+                if row is None:
+                    return None
+                blob = open(self._blob_path(row['digest']), 'rb')
+                
+            if not row['compressed']:
+                return blob
+                
+            with blob:
+                spool = tempfile.SpooledTemporaryFile(max_size=CACHE_CHUNK_SIZE * 8)
+                decompressor = zlib.decompressobj()
+                for chunk in iter(lambda: blob.read(CACHE_CHUNK_SIZE), b""):
+                    spool.write(decompressor.decompress(chunk))
+                spool.write(decompressor.flush())
+            spool.seek(0)
+            return spool
+            
+        except Exception as e:
+            self.logger.error(f"打开日志缓存失败: {str(e)}")
+            return None
+            
+    def put(self, repo: str, run_id: str, attempt: int, data: bytes,
+            member: str = ARCHIVE_MEMBER, compress: bool = True) -> bool:
+        """缓存一段内容"""
+        try:
+            payload = zlib.compress(data, 6) if compress else data
+            digest = hashlib.sha256(data).hexdigest()
+            
+            with self.lock:
+                if not self._has_blob(digest):
+                    self._write_blob(digest, [payload])
+                    self._save_blob(digest, len(payload), compress)
+                self._add_entry(repo, run_id, attempt, member, digest)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"写入日志缓存失败: {str(e)}")
+            return False
+            
+    def put_file(self, repo: str, run_id: str, attempt: int, fileobj: BinaryIO,
+                 member: str = ARCHIVE_MEMBER) -> bool:
+        """按块原样缓存文件对象的内容（用于已压缩的zip归档），不把整个文件读入内存
+        
+        从文件开头读取，结束后把读写位置恢复到开头。
+        """
+        try:
+            fileobj.seek(0)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            sha256 = hashlib.sha256()
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as temp_file:
+                    for chunk in iter(lambda: fileobj.read(CACHE_CHUNK_SIZE), b""):
+                        sha256.update(chunk)
+                        temp_file.write(chunk)
+                        size += len(chunk)
+                        
+                digest = sha256.hexdigest()
+                with self.lock:
+                    if not self._has_blob(digest):
+                        blob_path = self._blob_path(digest)
+                        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                        os.replace(temp_path, blob_path)
+                        self._save_blob(digest, size, False)
+                    self._add_entry(repo, run_id, attempt, member, digest)
+            finally:
+                fileobj.seek(0)
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"写入日志缓存失败: {str(e)}")
+            return False
+            
+    def _write_blob(self, digest: str, chunks: list):
+        """先写临时文件再改名，中途失败不会留下不完整的数据文件"""
+        blob_path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+            os.replace(temp_path, blob_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+                
+    def _has_blob(self, digest: str) -> bool:
+        """数据文件已登记且存在（调用方持有锁）"""
+        row = self.connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return row is not None and os.path.exists(self._blob_path(digest))
+        
+    def _save_blob(self, digest: str, size: int, compressed: bool):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, compressed) VALUES (?, ?, ?)",
+                (digest, size, int(compressed))
+            )
+            
+    def _add_entry(self, repo: str, run_id: str, attempt: int, member: str, digest: str):
+        """登记条目（调用方持有锁），超出容量时淘汰最久未访问的条目"""
+        with self.connection:
+            self.connection.execute("""
+                INSERT INTO entries (repo, run_id, attempt, member, digest, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (repo, run_id, attempt, member) DO UPDATE SET
+                    digest = excluded.digest,
+                    last_access = excluded.last_access
+            """, (repo.lower(), str(run_id), int(attempt or 1), member, digest, time.time()))
+        self._remove_orphan_blobs()
+        self._enforce_limit()
+        
+    def _total_bytes(self) -> int:
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        
+    def _enforce_limit(self):
+        """按最近访问时间淘汰条目，直到总大小不超过上限"""
+        while self._total_bytes() > self.max_bytes:
+            row = self.connection.execute("""
+                SELECT repo, run_id, attempt, member FROM entries
+                ORDER BY last_access LIMIT 1
+            """).fetchone()
+            if row is None:
+                break
+            with self.connection:
+                self.connection.execute("""
+                    DELETE FROM entries WHERE repo = ? AND run_id = ? AND attempt = ? AND member = ?
+                """, tuple(row))
+            self.stats['evictions'] += 1
+            self._remove_orphan_blobs()
+            
+    def _remove_orphan_blobs(self):
+        """删除不再被任何条目引用的数据文件"""
+        orphans = [row['digest'] for row in self.connection.execute("""
+            SELECT digest FROM blobs
+            WHERE NOT EXISTS (SELECT 1 FROM entries e WHERE e.digest = blobs.digest)
+        """)]
+        if not orphans:
+            return
+        with self.connection:
+            self.connection.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in orphans])
+        for digest in orphans:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+                
+    def list_entries(self) -> List[Tuple[str, str, int, str]]:
+        """列出所有条目键 (仓库, run_id, 尝试次数, 成员)，最近访问的在前"""
+        with self.lock:
+            rows = self.connection.execute("""
+                SELECT repo, run_id, attempt, member FROM entries ORDER BY last_access DESC
+            """).fetchall()
+        return [tuple(row) for row in rows]
+        
+    def invalidate(self, repo: str, run_id: str):
+        """删除某个运行的全部缓存条目"""
+        try:
+            with self.lock:
+                with self.connection:
+                    self.connection.execute("DELETE FROM entries WHERE repo = ? AND run_id = ?",
+                                            (repo.lower(), str(run_id)))
+                self._remove_orphan_blobs()
+        except Exception as e:
+            self.logger.error(f"删除日志缓存失败: {str(e)}")
+            
+    def clear(self):
+        """清空缓存"""
+        try:
+            with self.lock:
+                with self.connection:
+                    self.connection.execute("DELETE FROM entries")
+                self._remove_orphan_blobs()
+        except Exception as e:
+            self.logger.error(f"清空日志缓存失败: {str(e)}")
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total_bytes = self._total_bytes()
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0
+        })
+        return stats
+        
+    def close(self):
+        """关闭索引连接"""
+        with self.lock:
+            self.connection.close()
+            
+            
\ No newline at end of file
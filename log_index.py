@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行日志全文索引模块
+
+把本地缓存的运行日志按行写入SQLite FTS5全文索引（清理ANSI转义序列和行首时间戳），
+记录每行所属的运行、任务文件和行号。后台线程增量索引缓存中尚未索引的日志，
+搜索某个错误信息时直接查索引，不必逐个打开运行日志。
+"""
+
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+import zipfile
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Set
+
+from log_cache import LogCache, ARCHIVE_MEMBER
+
+# ANSI转义序列（与日志查看器的清理规则一致）
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# GitHub日志每行开头的时间戳，不参与索引
+LINE_TIMESTAMP = re.compile(r'^\ufeff?\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z ?')
+
+# 单行索引的最大长度，超长行（如压缩后的输出）截断
+MAX_LINE_LENGTH = 2000
+
+# 每次 executemany 写入的行数
+INDEX_BATCH_LINES = 5000
+
+# 失败任务日志在缓存中的成员名前缀（见 WorkflowManager.get_failed_job_logs）
+JOB_MEMBER_PREFIX = "job/"
+
+def clean_log_line(line: str) -> str:
+    """清理ANSI转义序列和行首时间戳"""
+    line = ANSI_ESCAPE.sub('', line)
+    return LINE_TIMESTAMP.sub('', line).strip()[:MAX_LINE_LENGTH]
+    
+def iter_log_lines(content: str) -> Iterator[Tuple[int, str]]:
+    """逐行产出 (行号, 清理后的内容)，行号从1开始，跳过空行"""
+    for line_no, line in enumerate(content.splitlines(), 1):
+        text = clean_log_line(line)
+        if text:
+            yield line_no, text
+            
+def archive_log_files(archive: zipfile.ZipFile) -> List[str]:
+    """归档中需要索引的日志文件
+    
+    GitHub日志归档的根目录是每个任务的完整日志，子目录是按步骤拆分的同一份内容；
+    有根目录日志时只索引根目录，避免重复。
+    """
+    names = [name for name in archive.namelist() if name.endswith('.txt')]
+    top_level = [name for name in names if '/' not in name]
+    return top_level or names
+    
+class LogIndex:
+    """FTS5日志全文索引
+    
+    log_lines 为FTS5表，每行一条（内容、所属文件ID、行号）；log_files 记录每个被索引的
+    日志文件及其在 log_lines 中的rowid范围，删除时按范围删除；indexed_entries 记录已索引的
+    缓存条目，用于增量索引。写入和搜索使用各自的连接（WAL模式），索引时不阻塞搜索。
+    """
+    
+    def __init__(self, db_path: str = "log_index.db"):
+        self.db_path = db_path
+        self.write_lock = threading.Lock()
+        self.read_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        
+        self.write_connection = self._connect()
+        with self.write_connection:
+            self.write_connection.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS log_lines USING fts5(
+                    content, file_id UNINDEXED, line UNINDEXED, tokenize = 'unicode61'
+                )
+            """)
+            self.write_connection.execute("""
+                CREATE TABLE IF NOT EXISTS log_files (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    repo TEXT NOT NULL,
+                    run_id TEXT NOT NULL,
+                    attempt INTEGER NOT NULL,
+                    member TEXT NOT NULL,
+                    job TEXT NOT NULL,
+                    first_rowid INTEGER,
+                    last_rowid INTEGER,
+                    lines INTEGER NOT NULL
+                )
+            """)
+            self.write_connection.execute("CREATE INDEX IF NOT EXISTS idx_log_files_run ON log_files (repo, run_id)")
+            self.write_connection.execute("""
+                CREATE TABLE IF NOT EXISTS indexed_entries (
+                    repo TEXT NOT NULL,
+                    run_id TEXT NOT NULL,
+                    attempt INTEGER NOT NULL,
+                    member TEXT NOT NULL,
+                    indexed_at REAL NOT NULL,
+                    PRIMARY KEY (repo, run_id, attempt, member)
+                )
+            """)
+        self.read_connection = self._connect()
+        
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+        
+    @staticmethod
+    def match_expression(text: str) -> Optional[str]:
+        """把输入的错误信息转换为FTS5短语查询（按词连续匹配，标点不影响结果）"""
+        text = text.strip()
+        if not text:
+            return None
+        return '"' + text.replace('"', '""') + '"'
+        
+    def indexed_keys(self) -> Set[Tuple[str, str, int, str]]:
+        """已索引的缓存条目键集合"""
+        with self.read_lock:
+            rows = self.read_connection.execute(
+                "SELECT repo, run_id, attempt, member FROM indexed_entries"
+            ).fetchall()
+        return {tuple(row) for row in rows}
+        
+    def index_entry(self, repo: str, run_id: str, attempt: int, member: str,
+                    files: Iterable[Tuple[str, str]]) -> int:
+        """索引一个缓存条目中的日志文件 (任务文件名, 内容)，整个条目在一个事务中提交，返回索引行数
+        
+        已索引过的条目先删除旧内容再写入。
+        """
+        repo = repo.lower()
+        run_id = str(run_id)
+        attempt = int(attempt or 1)
+        total = 0
+        
+        with self.write_lock, self.write_connection as connection:
+            self._delete_files(connection, "repo = ? AND run_id = ? AND attempt = ? AND member = ?",
+                               (repo, run_id, attempt, member))
+            # 显式分配连续的rowid，每个文件的索引行可按rowid范围删除
+            row = connection.execute("SELECT rowid FROM log_lines ORDER BY rowid DESC LIMIT 1").fetchone()
+            next_rowid = (row[0] if row else 0) + 1
+            
+            for job, content in files:
+                file_id = connection.execute("""
+                    INSERT INTO log_files (repo, run_id, attempt, member, job, lines)
+                    VALUES (?, ?, ?, ?, ?, 0)
+                """, (repo, run_id, attempt, member, job)).lastrowid
+                
+                first_rowid = next_rowid
+                batch = []
+                for line_no, text in iter_log_lines(content):
+                    batch.append((next_rowid, text, file_id, line_no))
+                    next_rowid += 1
+                    if len(batch) >= INDEX_BATCH_LINES:
+                        self._insert_lines(connection, batch)
+                        batch = []
+                self._insert_lines(connection, batch)
+                
+                count = next_rowid - first_rowid
+                connection.execute("UPDATE log_files SET first_rowid = ?, last_rowid = ?, lines = ? WHERE id = ?",
+                                   (first_rowid if count else None, next_rowid - 1 if count else None,
+                                    count, file_id))
+                total += count
+                
+            connection.execute("""
+                INSERT OR REPLACE INTO indexed_entries (repo, run_id, attempt, member, indexed_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (repo, run_id, attempt, member, time.time()))
+        return total
+        
+    @staticmethod
+    def _insert_lines(connection: sqlite3.Connection, batch: list):
+        if batch:
+            connection.executemany("INSERT INTO log_lines (rowid, content, file_id, line) VALUES (?, ?, ?, ?)", batch)
+            
+    @staticmethod
+    def _delete_files(connection: sqlite3.Connection, where: str, params: tuple):
+        """删除符合条件的日志文件及其索引行（调用方持有写锁并处于事务中）"""
+        files = connection.execute(f"SELECT id, first_rowid, last_rowid FROM log_files WHERE {where}", params).fetchall()
+        for file in files:
+            if file['first_rowid'] is not None:
+                connection.execute("DELETE FROM log_lines WHERE rowid BETWEEN ? AND ?",
+                                   (file['first_rowid'], file['last_rowid']))
+            connection.execute("DELETE FROM log_files WHERE id = ?", (file['id'],))
+            
+    def remove_run(self, repo: str, run_id: str, member_prefix: str = "", attempt: int = None):
+        """删除某个运行（成员名以 member_prefix 开头，指定 attempt 时只删该次尝试）的索引内容"""
+        try:
+            where = "repo = ? AND run_id = ? AND member LIKE ?"
+            params = (repo.lower(), str(run_id), member_prefix + '%')
+            if attempt is not None:
+                where += " AND attempt = ?"
+                params += (int(attempt),)
+            with self.write_lock, self.write_connection as connection:
+                self._delete_files(connection, where, params)
+                connection.execute(f"DELETE FROM indexed_entries WHERE {where}", params)
+        except Exception as e:
+            self.logger.error(f"删除日志索引失败: {str(e)}")
+            
+    def remove_entries(self, keys: Iterable[Tuple[str, str, int, str]]) -> int:
+        """删除给定缓存条目 (仓库, run_id, 尝试次数, 成员) 的索引内容，返回删除的条目数"""
+        try:
+            where = "repo = ? AND run_id = ? AND attempt = ? AND member = ?"
+            removed = 0
+            with self.write_lock, self.write_connection as connection:
+                for repo, run_id, attempt, member in keys:
+                    params = (repo.lower(), str(run_id), int(attempt or 1), member)
+                    self._delete_files(connection, where, params)
+                    removed += connection.execute(f"DELETE FROM indexed_entries WHERE {where}", params).rowcount
+            return removed
+        except Exception as e:
+            self.logger.error(f"删除日志索引失败: {str(e)}")
+            return 0
+            
+    def search(self, text: str, limit: int = 200, repo: str = None) -> List[Dict[str, Any]]:
+        """搜索包含给定文本的日志行，最近索引的在前
+        
+        返回 [{repo, run_id, attempt, job, line, content}]。
+        """
+        try:
+            expression = self.match_expression(text)
+            if expression is None:
+                return []
+                
+            # 先在FTS表内按rowid倒序取前N条，再关联文件信息；
+            # 仓库条件在取前N条之前筛选，否则其他仓库的匹配会占满名额
+            conditions = ["log_lines MATCH ?"]
+            params = [expression]
+            if repo:
+                conditions.append("file_id IN (SELECT id FROM log_files WHERE repo = ?)")
+                params.append(repo.lower())
+            params.append(limit)
+            query = f"""
+                SELECT f.repo, f.run_id, f.attempt, f.job, l.line, l.content
+                FROM (
+                    SELECT rowid, file_id, line, content FROM log_lines
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ) l
+                JOIN log_files f ON f.id = l.file_id
+                ORDER BY l.rowid DESC
+            """
+            
+            with self.read_lock:
+                rows = self.read_connection.execute(query, params).fetchall()
+            return [dict(row) for row in rows]
+            
+        except Exception as e:
+            self.logger.error(f"搜索日志索引失败: {str(e)}")
+            return []
+            
+    def get_stats(self) -> Dict[str, int]:
+        """获取索引统计"""
+        with self.read_lock:
+            row = self.read_connection.execute("""
+                SELECT COUNT(DISTINCT repo || '/' || run_id) AS runs, COUNT(*) AS files,
+                       COALESCE(SUM(lines), 0) AS lines
+                FROM log_files
+            """).fetchone()
+        return dict(row)
+        
+    def close(self):
+        """关闭索引连接"""
+        with self.write_lock:
+            self.write_connection.close()
+        with self.read_lock:
+            self.read_connection.close()
+            
+class LogIndexWorker:
+    """后台增量索引线程
+    
+    定期（或被 notify 唤醒时）对比日志缓存条目和已索引条目，逐个索引新条目，
+    并删除已被缓存淘汰的条目的索引内容（搜索结果都能打开日志）。
+    完整日志归档索引后，删除同一次尝试已索引的失败任务日志，避免重复结果；
+    已有归档的尝试不再索引失败任务日志。
+    """
+    
+    def __init__(self, log_cache: LogCache, log_index: LogIndex, interval: float = 60.0):
+        self.log_cache = log_cache
+        self.log_index = log_index
+        self.interval = interval
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+        self.stats = {'indexed_entries': 0, 'indexed_lines': 0, 'pruned_entries': 0, 'pending': 0}
+        self.logger = logging.getLogger(__name__)
+        
+    def start(self):
+        """启动索引线程"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="log-indexer", daemon=True)
+        self.thread.start()
+        self.logger.info("日志索引线程已启动")
+        
+    def stop(self):
+        """停止索引线程（当前条目索引完成后退出）"""
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+            self.thread = None
+        self.logger.info("日志索引线程已停止")
+        
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+        
+    def notify(self):
+        """有新日志写入缓存时调用，立即开始索引"""
+        self.wakeup.set()
+        
+    def get_stats(self) -> Dict[str, int]:
+        """获取索引统计"""
+        return dict(self.stats)
+        
+    def _run(self):
+        while self.running:
+            self.wakeup.clear()
+            try:
+                self.index_pending()
+            except Exception as e:
+                self.logger.error(f"索引运行日志失败: {str(e)}")
+            self.wakeup.wait(self.interval)
+            
+    def _pending_entries(self) -> List[Tuple[str, str, int, str]]:
+        """缓存中尚未索引的条目，最近访问的在前"""
+        indexed = self.log_index.indexed_keys()
+        entries = [key for key in self.log_cache.list_entries() if key not in indexed]
+        archived = {(repo, run_id, attempt) for repo, run_id, attempt, member in entries + list(indexed)
+                    if member == ARCHIVE_MEMBER}
+        return [(repo, run_id, attempt, member) for repo, run_id, attempt, member in entries
+                if member == ARCHIVE_MEMBER or
+                (member.startswith(JOB_MEMBER_PREFIX) and (repo, run_id, attempt) not in archived)]
+                
+    def prune_evicted(self) -> int:
+        """删除已不在日志缓存中（已被淘汰或清除）的条目的索引内容，返回删除的条目数"""
+        cached = set(self.log_cache.list_entries())
+        evicted = [key for key in self.log_index.indexed_keys() if key not in cached]
+        removed = self.log_index.remove_entries(evicted) if evicted else 0
+        self.stats['pruned_entries'] += removed
+        return removed
+        
+    def index_pending(self) -> int:
+        """删除已淘汰条目的索引，再索引所有待索引条目，返回本次索引的条目数"""
+        self.prune_evicted()
+        pending = self._pending_entries()
+        self.stats['pending'] = len(pending)
+        indexed = 0
+        for repo, run_id, attempt, member in pending:
+            if not self.running:
+                break
+            lines = self._index_one(repo, run_id, attempt, member)
+            self.stats['pending'] -= 1
+            if lines is None:
+                continue
+            indexed += 1
+            self.stats['indexed_entries'] += 1
+            self.stats['indexed_lines'] += lines
+        if indexed:
+            self.logger.info(f"日志索引完成: {indexed} 个条目")
+        return indexed
+        
+    def _index_one(self, repo: str, run_id: str, attempt: int, member: str) -> Optional[int]:
+        """索引单个缓存条目，条目已被淘汰或无法读取时返回None"""
+        if member == ARCHIVE_MEMBER:
+            fileobj = self.log_cache.open(repo, run_id, attempt, touch=False)
+            if fileobj is None:
+                return None
+            try:
+                with zipfile.ZipFile(fileobj) as archive:
+                    files = ((name, archive.read(name).decode('utf-8', errors='ignore'))
+                             for name in archive_log_files(archive))
+                    lines = self.log_index.index_entry(repo, run_id, attempt, member, files)
+            except zipfile.BadZipFile:
+                self.logger.warning(f"日志归档损坏，跳过索引: {run_id}")
+                return None
+            finally:
+                fileobj.close()
+            # 完整日志已包含这次尝试的失败任务日志，其他尝试的保留
+            self.log_index.remove_run(repo, run_id, JOB_MEMBER_PREFIX, attempt)
+            return lines
+            
+        content = self.log_cache.get(repo, run_id, attempt, member, touch=False)
+        if content is None:
+            return None
+        job = self._job_name(repo, run_id, attempt, member)
+        return self.log_index.index_entry(repo, run_id, attempt, member,
+                                          [(job, content.decode('utf-8', errors='ignore'))])
+                                          
+    def _job_name(self, repo: str, run_id: str, attempt: int, member: str) -> str:
+        """失败任务日志的文件名（与日志查看器中显示的一致）"""
+        job_id = member[len(JOB_MEMBER_PREFIX):]
+        summary = self.log_cache.get(repo, run_id, attempt, "jobs.json", touch=False)
+        for job in json.loads(summary.decode('utf-8')) if summary else []:
+            if str(job.get('id')) == job_id:
+                return f"{job.get('name', job_id)}.txt".replace('/', '_')
+        return f"{job_id}.txt"
+        
\ No newline at end of file
@@ -13,21 +13,28 @@ APP_FULL_NAME = f"{APP_NAME} {APP_VERSION}"
 import sys
 import os
 import json
+import time
 import logging
+from collections.abc import Mapping
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QTabWidget, QPushButton, QLabel, 
                              QLineEdit, QTextEdit, QTableWidget, QTableWidgetItem,
                              QComboBox, QMessageBox, QInputDialog, QHeaderView,
                              QGroupBox, QFormLayout, QSplitter, QFrame, QGridLayout,
-                             QScrollArea, QDialog, QDialogButtonBox, QListWidget, QListWidgetItem)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor
+                             QScrollArea, QDialog, QDialogButtonBox, QListWidget, QListWidgetItem,
+                             QCheckBox, QTableView, QStyledItemDelegate, QToolTip,
+                             QAbstractItemView)
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QAbstractTableModel, QModelIndex,
+                          QEvent, QRect, QSize)
+from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPainter, QTextCursor
 
 # 使用修复版本的数据库管理器
 from database import DatabaseManager
-from github_manager import GitHubManager
+from github_manager import GitHubManager, shared_session_pool
 from workflow_manager import WorkflowManager
+from log_cache import LogCache
+from log_index import LogIndex, LogIndexWorker
 from user_manager import UserManager
 from config import Config
 
@@ -155,21 +162,266 @@ class UserSelectionDialog(QDialog):
             return self.user_combo.currentData()
         return None
 
+class WorkflowRunsTableModel(QAbstractTableModel):
+    """运行记录表格模型
+    
+    按 (created_at, id) 游标从数据库分页读取，视图滚动到底部时才加载下一页，
+    刷新只重新读取第一页，渲染开销与历史记录总数无关。
+    """
+    
+    HEADERS = ["运行ID", "工作流名称", "仓库", "分支", "状态", "结论", "开始时间", "操作"]
+    ACTIONS_COLUMN = 7
+    STATUS_COLORS = {'completed': "green", 'in_progress': "blue", 'failed': "red"}
+    CONCLUSION_COLORS = {'success': "green", 'failure': "red", 'cancelled': "orange"}
+    
+    def __init__(self, workflow_manager, page_size=100, parent=None):
+        super().__init__(parent)
+        self.workflow_manager = workflow_manager
+        self.page_size = page_size
+        self.filters = {}
+        self.runs = []
+        self.rows_by_run_id = {}
+        self.cursor = None
+        self.has_more = True
+        
+    def set_filters(self, **filters):
+        """设置筛选条件（repo / status / conclusion / config_id，空值表示不筛选）并重新加载"""
+        self.filters = {key: value for key, value in filters.items() if value}
+        self.reload()
+        
+    def reload(self):
+        """清空已加载的记录并重新读取第一页"""
+        self.beginResetModel()
+        self.runs = []
+        self.rows_by_run_id = {}
+        self.cursor = None
+        self.has_more = True
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.runs)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+        
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.has_more
+        
+    def fetchMore(self, parent):
+        if parent.isValid() or not self.has_more:
+            return
+            
+        runs, self.cursor = self.workflow_manager.get_workflow_runs_page(
+            self.cursor, self.page_size, **self.filters
+        )
+        self.has_more = self.cursor is not None
+        if not runs:
+            return
+            
+        start = len(self.runs)
+        self.beginInsertRows(QModelIndex(), start, start + len(runs) - 1)
+        for row, run in enumerate(runs, start):
+            self.rows_by_run_id[str(run.get('run_id'))] = row
+        self.runs.extend(runs)
+        self.endInsertRows()
+        
+    def run_at(self, row):
+        """获取指定行的运行记录"""
+        return self.runs[row] if 0 <= row < len(self.runs) else None
+        
+    def update_run(self, run_id):
+        """重新读取已加载的单条记录，未加载时返回False"""
+        row = self.rows_by_run_id.get(str(run_id))
+        if row is None:
+            return False
+            
+        run = self.workflow_manager.get_run_by_id(run_id)
+        if run:
+            self.runs[row].update(run)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+        
+    @staticmethod
+    def _format_time(value):
+        if not value:
+            return ''
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return value
+            
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+            
+        run = self.runs[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(run.get('run_id', ''))
+            if column == 1:
+                return run.get('workflow_name') or '未知'
+            if column == 2:
+                return run.get('repo') or ''
+            if column == 3:
+                return run.get('branch') or ''
+            if column == 4:
+                return run.get('status') or 'unknown'
+            if column == 5:
+                return run.get('conclusion') or ''
+            if column == 6:
+                return self._format_time(run.get('created_at'))
+            return None
+            
+        if role == Qt.ForegroundRole:
+            if column == 4:
+                color = self.STATUS_COLORS.get(run.get('status'))
+            elif column == 5:
+                color = self.CONCLUSION_COLORS.get(run.get('conclusion'))
+            else:
+                color = None
+            return QColor(color) if color else None
+            
+        return None
+
+class RunActionsDelegate(QStyledItemDelegate):
+    """运行记录操作列：直接绘制取消/查看/日志按钮并处理点击，不为每行创建按钮控件"""
+    
+    # 点击按钮时发出: (动作, run_id)
+    action_triggered = pyqtSignal(str, str)
+    
+    # (动作, 文字, 背景色, 提示)
+    BUTTONS = [
+        ('cancel', "❌ 取消", "#dc3545", "取消运行"),
+        ('browser', "🌐 查看", "#28a745", "在浏览器中打开"),
+        ('logs', "📋 日志", "#007bff", "查看日志"),
+    ]
+    BUTTON_WIDTH = 90
+    BUTTON_HEIGHT = 32
+    SPACING = 10
+    
+    def _buttons(self, rect, run):
+        """计算当前行各按钮的位置（没有html_url时不显示查看按钮）"""
+        buttons = []
+        height = min(self.BUTTON_HEIGHT, rect.height() - 4)
+        x = rect.left() + 4
+        y = rect.top() + (rect.height() - height) // 2
+        for action, text, color, tooltip in self.BUTTONS:
+            if action == 'browser' and not run.get('html_url'):
+                continue
+            buttons.append((action, text, color, tooltip, QRect(x, y, self.BUTTON_WIDTH, height)))
+            x += self.BUTTON_WIDTH + self.SPACING
+        return buttons
+        
+    def paint(self, painter, option, index):
+        run = index.model().run_at(index.row())
+        if not run:
+            return
+            
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        font = QFont(option.font)
+        font.setBold(True)
+        painter.setFont(font)
+        for action, text, color, tooltip, rect in self._buttons(option.rect, run):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(rect, 4, 4)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
+        
+    def sizeHint(self, option, index):
+        return QSize(len(self.BUTTONS) * (self.BUTTON_WIDTH + self.SPACING) + 8, self.BUTTON_HEIGHT + 8)
+        
+    def _button_at(self, option, index, pos):
+        run = index.model().run_at(index.row())
+        if not run:
+            return None, None
+        for action, text, color, tooltip, rect in self._buttons(option.rect, run):
+            if rect.contains(pos):
+                return action, tooltip
+        return None, None
+        
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            action, _ = self._button_at(option, index, event.pos())
+            if action:
+                self.action_triggered.emit(action, str(model.run_at(index.row()).get('run_id')))
+                return True
+        return False
+        
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            _, tooltip = self._button_at(option, index, event.pos())
+            if tooltip:
+                QToolTip.showText(event.globalPos(), tooltip, view)
+                return True
+        return super().helpEvent(event, view, option, index)
+
 class MainWindow(QMainWindow):
     """主窗口类"""
     
+    # 后台关联到触发的运行时发出（跨线程，由Qt排队到主线程）
+    run_correlated = pyqtSignal(dict)
+    # Webhook事件写入运行记录后发出: (事件类型, run_id)
+    webhook_event = pyqtSignal(str, str)
+    # 后台轮询发现运行状态变化时发出: run_id
+    run_polled = pyqtSignal(str)
+    # 同步结果由写线程提交后发出: 写入条数
+    runs_synced = pyqtSignal(int)
+    
     def __init__(self):
         super().__init__()
         self.config = Config()
-        self.db_manager = DatabaseManager()
+        # 启用保留策略时附加归档库，旧数据移入其中后仍可查询
+        self.db_manager = DatabaseManager(
+            archive_path=self.config.get_archive_path() if self.config.is_retention_enabled() else None
+        )
         self.github_manager = GitHubManager()
+        self.github_manager.set_rate_limit_check(self.config.is_rate_limit_check_enabled())
+        self.github_manager.set_timeout(self.config.get_github_timeout())
+        shared_session_pool.retry_count = self.config.get_github_retry_count()
         self.workflow_manager = WorkflowManager()
+        self.workflow_manager.set_max_concurrency(self.config.get_github_max_concurrency())
+        self.workflow_manager.set_correlation_input(self.config.get_correlation_input())
+        self.log_indexer = None
+        if self.config.is_log_cache_enabled():
+            log_cache = LogCache(
+                self.config.get_log_cache_path(),
+                self.config.get_log_cache_max_size() * 1024 * 1024
+            )
+            self.workflow_manager.set_log_cache(log_cache)
+            # 缓存的日志由后台线程增量写入全文索引
+            if self.config.is_log_index_enabled():
+                log_index = LogIndex(self.config.get_log_index_path())
+                self.log_indexer = LogIndexWorker(log_cache, log_index)
+                self.workflow_manager.set_log_index(log_index, self.log_indexer)
         self.user_manager = UserManager(self.db_manager)
         
         self.current_user_id = None  # 当前选中的用户ID
+        self.run_correlated.connect(self.on_run_correlated)
+        self.webhook_server = None
+        self.webhook_event.connect(self.on_webhook_event)
+        self.run_poller = None
+        self.sync_thread = None
+        self.retention_manager = None
+        self.run_polled.connect(self.on_run_polled)
+        self.runs_synced.connect(self.on_runs_synced)
         
         self.init_ui()
         self.load_data()
+        self.start_webhook_server()
+        self.start_run_poller()
+        self.start_log_indexer()
+        self.start_retention_manager()
         
     def init_ui(self):
         """初始化用户界面"""
@@ -246,7 +498,7 @@ class MainWindow(QMainWindow):
                 border-color: #007bff;
                 outline: none;
             }
-            QTableWidget {
+            QTableView {
                 gridline-color: #e9ecef;
                 selection-background-color: #e3f2fd;
                 font-size: 12px;
@@ -254,11 +506,11 @@ class MainWindow(QMainWindow):
                 border-radius: 6px;
                 background-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 6px;
                 border-bottom: 1px solid #f8f9fa;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #000;
             }
@@ -351,15 +603,57 @@ class MainWindow(QMainWindow):
         self.user_count_label = QLabel("0")
         self.workflow_count_label = QLabel("0")
         self.current_user_label = QLabel("未选择")
+        self.api_cache_label = QLabel("命中 0 / 未命中 0")
+        self.rate_limit_label = QLabel("未知")
+        self.token_pool_label = QLabel("0 个Token")
+        self.poller_label = QLabel("未启动")
+        self.log_cache_label = QLabel("未启用")
+        self.log_index_label = QLabel("未启用")
+        self.backup_label = QLabel("未启用")
+        self.retention_label = QLabel("未启用")
         
         status_layout.addRow("数据库状态:", self.db_status_label)
         status_layout.addRow("GitHub连接:", self.github_status_label)
         status_layout.addRow("用户数量:", self.user_count_label)
         status_layout.addRow("工作流数量:", self.workflow_count_label)
         status_layout.addRow("当前用户:", self.current_user_label)
+        status_layout.addRow("API缓存:", self.api_cache_label)
+        status_layout.addRow("API配额:", self.rate_limit_label)
+        status_layout.addRow("Token池:", self.token_pool_label)
+        status_layout.addRow("状态轮询:", self.poller_label)
+        status_layout.addRow("日志缓存:", self.log_cache_label)
+        status_layout.addRow("日志索引:", self.log_index_label)
+        status_layout.addRow("数据库备份:", self.backup_label)
+        status_layout.addRow("数据归档:", self.retention_label)
         
         layout.addWidget(status_group)
         
+        # 运行统计（读取增量维护的统计表，不扫描运行记录）
+        stats_group = QGroupBox("运行统计")
+        stats_layout = QVBoxLayout(stats_group)
+        
+        stats_header_layout = QHBoxLayout()
+        self.run_stats_summary_label = QLabel("暂无运行记录")
+        self.run_stats_dimension = QComboBox()
+        for label, dimension in (("按配置", "config"), ("按仓库", "repo"), ("按日期（近30天）", "day")):
+            self.run_stats_dimension.addItem(label, dimension)
+        self.run_stats_dimension.currentIndexChanged.connect(self.refresh_run_stats)
+        stats_header_layout.addWidget(self.run_stats_summary_label)
+        stats_header_layout.addStretch()
+        stats_header_layout.addWidget(self.run_stats_dimension)
+        stats_layout.addLayout(stats_header_layout)
+        
+        self.run_stats_table = QTableWidget(0, 8)
+        self.run_stats_table.setHorizontalHeaderLabels(
+            ["名称", "运行数", "成功", "失败", "取消", "成功率", "平均排队", "平均耗时"]
+        )
+        self.run_stats_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.run_stats_table.verticalHeader().setVisible(False)
+        self.run_stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        stats_layout.addWidget(self.run_stats_table)
+        
+        layout.addWidget(stats_group)
+        
         # 快速操作
         quick_group = QGroupBox("快速操作")
         quick_layout = QHBoxLayout(quick_group)
@@ -473,31 +767,79 @@ class MainWindow(QMainWindow):
         refresh_runs_btn = QPushButton("🔄 刷新")
         refresh_runs_btn.clicked.connect(self.load_workflow_runs)
         
+        self.failed_jobs_only_checkbox = QCheckBox("仅查看失败任务日志")
+        self.failed_jobs_only_checkbox.setToolTip("只下载失败任务的日志，而不是整个运行的日志归档")
+        
+        # 筛选条件
+        self.runs_repo_filter = QLineEdit()
+        self.runs_repo_filter.setPlaceholderText("仓库 owner/repo")
+        self.runs_repo_filter.editingFinished.connect(self.apply_runs_filters)
+        
+        self.runs_status_filter = QComboBox()
+        self.runs_status_filter.addItem("全部状态", None)
+        for status in ("queued", "in_progress", "completed"):
+            self.runs_status_filter.addItem(status, status)
+        self.runs_status_filter.currentIndexChanged.connect(self.apply_runs_filters)
+        
+        self.runs_conclusion_filter = QComboBox()
+        self.runs_conclusion_filter.addItem("全部结论", None)
+        for conclusion in ("success", "failure", "cancelled"):
+            self.runs_conclusion_filter.addItem(conclusion, conclusion)
+        self.runs_conclusion_filter.currentIndexChanged.connect(self.apply_runs_filters)
+        
         runs_actions_layout.addWidget(refresh_runs_btn)
+        runs_actions_layout.addWidget(self.failed_jobs_only_checkbox)
+        runs_actions_layout.addWidget(self.runs_repo_filter)
+        runs_actions_layout.addWidget(self.runs_status_filter)
+        runs_actions_layout.addWidget(self.runs_conclusion_filter)
         runs_actions_layout.addStretch()
         
         layout.addWidget(runs_actions_group)
         
+        # 日志全文搜索
+        log_search_group = QGroupBox("日志搜索")
+        log_search_layout = QHBoxLayout(log_search_group)
+        
+        self.log_search_input = QLineEdit()
+        self.log_search_input.setPlaceholderText("输入错误信息，在已缓存的运行日志中搜索")
+        self.log_search_input.returnPressed.connect(self.search_run_logs)
+        
+        log_search_btn = QPushButton("🔍 搜索日志")
+        log_search_btn.clicked.connect(self.search_run_logs)
+        
+        if not self.log_indexer:
+            self.log_search_input.setPlaceholderText("未启用日志索引（需要启用日志缓存）")
+            self.log_search_input.setEnabled(False)
+            log_search_btn.setEnabled(False)
+            
+        log_search_layout.addWidget(self.log_search_input)
+        log_search_layout.addWidget(log_search_btn)
+        
+        layout.addWidget(log_search_group)
+        
         # 工作流运行列表
         runs_group = QGroupBox("工作流运行记录")
         runs_layout = QVBoxLayout(runs_group)
         
-        self.runs_table = QTableWidget()
-        self.runs_table.setColumnCount(8)
-        self.runs_table.setHorizontalHeaderLabels([
-            "运行ID", "工作流名称", "仓库", "分支", "状态", "结论", "开始时间", "操作"
-        ])
+        self.runs_model = WorkflowRunsTableModel(self.workflow_manager, parent=self)
+        self.runs_table = QTableView()
+        self.runs_table.setModel(self.runs_model)
+        self.runs_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.runs_table.verticalHeader().setDefaultSectionSize(40)
         
-        # 设置列宽
+        # 操作列按钮由委托绘制，不为每行创建控件
+        self.runs_actions_delegate = RunActionsDelegate(self.runs_table)
+        self.runs_actions_delegate.action_triggered.connect(self.on_run_action)
+        self.runs_table.setItemDelegateForColumn(WorkflowRunsTableModel.ACTIONS_COLUMN, self.runs_actions_delegate)
+        self.runs_table.setMouseTracking(True)
+        
+        # 设置列宽（按内容调整会遍历所有已加载行，改为交互式）
         header = self.runs_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # 运行ID
+        header.setSectionResizeMode(QHeaderView.Interactive)
         header.setSectionResizeMode(1, QHeaderView.Stretch)  # 工作流名称
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # 仓库
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # 分支
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # 状态
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 结论
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # 开始时间
         header.setSectionResizeMode(7, QHeaderView.Fixed)  # 操作
+        for column, width in ((0, 110), (2, 180), (3, 100), (4, 90), (5, 90), (6, 150)):
+            self.runs_table.setColumnWidth(column, width)
         self.runs_table.setColumnWidth(7, 320)  # 进一步增加操作列宽度
         
         runs_layout.addWidget(self.runs_table)
@@ -633,6 +975,17 @@ class MainWindow(QMainWindow):
             # 初始化数据库
             self.db_manager.init_database()
             
+            # 所有写操作经单写线程批量提交
+            self.db_manager.start_writer()
+            
+            # 定时在线备份
+            if self.config.is_backup_enabled():
+                self.db_manager.start_backup_scheduler(
+                    self.config.get_backup_interval(),
+                    self.config.get_backup_path(),
+                    self.config.get_backup_keep()
+                )
+            
             # 设置工作流管理器的数据库管理器
             self.workflow_manager.set_database_manager(self.db_manager)
             
@@ -672,9 +1025,182 @@ class MainWindow(QMainWindow):
             workflow_count = len(self.workflow_manager.get_all_configs())
             self.workflow_count_label.setText(str(workflow_count))
             
+            # 更新条件请求缓存命中情况
+            cache_stats = self.github_manager.get_cache_stats()
+            self.api_cache_label.setText(
+                f"命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']} "
+                f"({cache_stats['hit_rate']:.0%})"
+            )
+            
+            # 更新API配额
+            self.refresh_rate_limit_status()
+            self.refresh_token_pool_status()
+            self.refresh_poller_status()
+            self.refresh_log_cache_status()
+            self.refresh_log_index_status()
+            self.refresh_backup_status()
+            self.refresh_retention_status()
+            self.refresh_run_stats()
+            
         except Exception as e:
             self.log_message(f"刷新状态失败: {str(e)}", "ERROR")
             
+    def refresh_rate_limit_status(self):
+        """刷新API配额显示"""
+        state = self.github_manager.get_rate_limit_state()
+        if state['remaining'] is None:
+            self.rate_limit_label.setText("未知")
+            self.rate_limit_label.setStyleSheet("")
+            return
+            
+        text = f"剩余 {state['remaining']}/{state['limit']}"
+        if state['reset_at']:
+            text += f"，{datetime.fromtimestamp(state['reset_at']).strftime('%H:%M:%S')} 重置"
+        if state['projected_exhaustion']:
+            text += f"，预计 {datetime.fromtimestamp(state['projected_exhaustion']).strftime('%H:%M:%S')} 耗尽"
+        self.rate_limit_label.setText(text)
+        
+        if state['limit'] and state['remaining'] < state['limit'] * 0.1:
+            self.rate_limit_label.setStyleSheet("color: red;")
+        else:
+            self.rate_limit_label.setStyleSheet("color: green;")
+            
+    def refresh_token_pool(self):
+        """用所有用户的Token刷新只读请求Token池"""
+        tokens = self.user_manager.get_all_tokens()
+        self.github_manager.set_token_pool(tokens)
+        self.workflow_manager.set_token_pool(tokens)
+        self.refresh_token_pool_status()
+        
+    def refresh_poller_status(self):
+        """刷新状态轮询显示"""
+        if not self.run_poller:
+            self.poller_label.setText("未启动")
+            return
+            
+        stats = self.run_poller.get_stats()
+        self.poller_label.setText(
+            f"跟踪 {stats['tracked_runs']} 个运行，{stats['requests_per_minute']} 次请求/分钟"
+        )
+        
+    def refresh_log_cache_status(self):
+        """刷新日志缓存显示"""
+        log_cache = self.workflow_manager.log_cache
+        if not log_cache:
+            self.log_cache_label.setText("未启用")
+            return
+            
+        stats = log_cache.get_stats()
+        self.log_cache_label.setText(
+            f"{stats['entries']} 项，{stats['bytes'] / 1024 / 1024:.1f}/{stats['max_bytes'] / 1024 / 1024:.0f} MB，"
+            f"命中 {stats['hits']} / 未命中 {stats['misses']}，淘汰 {stats['evictions']}"
+        )
+        
+    @staticmethod
+    def format_duration(seconds):
+        """把秒数格式化为 1h 02m / 3m 05s / 42s"""
+        if seconds is None:
+            return "-"
+        seconds = int(round(seconds))
+        if seconds >= 3600:
+            return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+        if seconds >= 60:
+            return f"{seconds // 60}m {seconds % 60:02d}s"
+        return f"{seconds}s"
+        
+    def refresh_run_stats(self):
+        """刷新运行统计表和汇总"""
+        dimension = self.run_stats_dimension.currentData()
+        stats = self.workflow_manager.get_run_stats(dimension)
+        if dimension == 'day':
+            stats = sorted(stats, key=lambda item: item['key'], reverse=True)[:30]
+        else:
+            stats = sorted(stats, key=lambda item: item['runs'], reverse=True)
+            
+        self.run_stats_table.setRowCount(len(stats))
+        for row, item in enumerate(stats):
+            rate = item['success_rate']
+            values = (item['name'], item['runs'], item['success'], item['failure'], item['cancelled'],
+                      "-" if rate is None else f"{rate:.0%}",
+                      self.format_duration(item['avg_queued']), self.format_duration(item['avg_duration']))
+            for column, value in enumerate(values):
+                self.run_stats_table.setItem(row, column, QTableWidgetItem(str(value)))
+                
+        # 每条运行都有日期，汇总按日期维度累加
+        days = self.workflow_manager.get_run_stats('day')
+        total = sum(item['runs'] for item in days)
+        if not total:
+            self.run_stats_summary_label.setText("暂无运行记录")
+            return
+        success = sum(item['success'] for item in days)
+        finished = sum(item['runs'] - item['conclusions'].get('', 0) for item in days)
+        queued_runs = sum(item['queued_runs'] for item in days)
+        duration_runs = sum(item['duration_runs'] for item in days)
+        self.run_stats_summary_label.setText(
+            f"共 {total} 次运行，成功率 {success / finished if finished else 0:.0%}，"
+            f"平均排队 {self.format_duration(sum(item['queued_seconds'] for item in days) / queued_runs if queued_runs else None)}，"
+            f"平均耗时 {self.format_duration(sum(item['duration_seconds'] for item in days) / duration_runs if duration_runs else None)}"
+        )
+        
+    def refresh_backup_status(self):
+        """刷新数据库备份显示"""
+        status = self.db_manager.get_backup_status()
+        if status['running']:
+            self.backup_label.setText("正在备份…")
+            self.backup_label.setStyleSheet("")
+            return
+            
+        backups = self.db_manager.list_backups(self.config.get_backup_path())
+        text = "未启用" if not status['scheduled'] else "已启用"
+        if backups:
+            latest = datetime.fromtimestamp(os.path.getmtime(backups[0])).strftime('%Y-%m-%d %H:%M:%S')
+            text = f"{len(backups)} 份，最近 {latest}"
+        if status['last_error']:
+            self.backup_label.setText(f"{text}，上次备份失败: {status['last_error']}")
+            self.backup_label.setStyleSheet("color: red;")
+        else:
+            self.backup_label.setText(text)
+            self.backup_label.setStyleSheet("")
+            
+    def refresh_retention_status(self):
+        """刷新数据归档显示"""
+        if not self.retention_manager:
+            self.retention_label.setText("未启用")
+            return
+            
+        archive = self.db_manager.get_archive_stats()
+        stats = self.retention_manager.get_stats()
+        text = f"已归档 {archive.get('runs', 0)} 条运行、{archive.get('logs', 0)} 条日志"
+        if stats['running']:
+            text += "，正在归档…"
+        elif stats['last_run_at']:
+            last = datetime.fromtimestamp(stats['last_run_at']).strftime('%Y-%m-%d %H:%M:%S')
+            text += f"，上次清理 {last}"
+        self.retention_label.setText(text)
+        
+    def refresh_log_index_status(self):
+        """刷新日志索引显示"""
+        log_index = self.workflow_manager.log_index
+        if not log_index or not self.log_indexer:
+            self.log_index_label.setText("未启用")
+            return
+            
+        stats = log_index.get_stats()
+        pending = self.log_indexer.get_stats()['pending']
+        text = f"{stats['runs']} 个运行，{stats['files']} 个日志文件，{stats['lines']} 行"
+        if pending:
+            text += f"，待索引 {pending}"
+        self.log_index_label.setText(text)
+        
+    def refresh_token_pool_status(self):
+        """刷新Token池显示"""
+        stats = self.github_manager.get_token_pool_stats()
+        known = [s['remaining'] for s in stats if s['remaining'] is not None]
+        text = f"{len(stats)} 个Token"
+        if known:
+            text += f"，已知剩余配额合计 {sum(known)}"
+        self.token_pool_label.setText(text)
+            
     def test_connections(self):
         """测试连接"""
         try:
@@ -705,6 +1231,11 @@ class MainWindow(QMainWindow):
                 self.github_status_label.setText("已连接")
                 self.github_status_label.setStyleSheet("color: green;")
                 self.log_message("GitHub连接正常")
+                
+                # 同步API配额
+                if self.config.is_rate_limit_check_enabled():
+                    self.github_manager.check_rate_limit()
+                    self.refresh_rate_limit_status()
             else:
                 self.github_status_label.setText("未连接")
                 self.github_status_label.setStyleSheet("color: red;")
@@ -750,21 +1281,8 @@ class MainWindow(QMainWindow):
                 
                 self.log_message(f"工作流触发成功: {repo}/{workflow}")
                 
-                # 后台获取运行信息
-                import threading
-                import pytz
-                from PyQt5.QtCore import QTimer
-                
-                trigger_time = datetime.now(pytz.UTC)
-                thread = threading.Thread(
-                    target=self.workflow_manager.get_triggered_run_info,
-                    args=(repo, workflow, trigger_time, None)
-                )
-                thread.daemon = True
-                thread.start()
-                
-                # 使用QTimer延迟6秒后刷新运行列表，避免SQLite线程问题
-                QTimer.singleShot(6000, self.load_workflow_runs)
+                # 后台关联运行，找到后通过信号刷新运行列表
+                self.start_run_correlation(result)
             else:
                 self.log_message(f"工作流触发失败: {repo}/{workflow}", "ERROR")
                 QMessageBox.critical(self, "错误", "工作流触发失败")
@@ -773,6 +1291,125 @@ class MainWindow(QMainWindow):
             self.log_message(f"触发工作流失败: {str(e)}", "ERROR")
             QMessageBox.critical(self, "错误", f"触发工作流失败: {str(e)}")
             
+    def start_run_correlation(self, result, config_id=None):
+        """在后台线程中关联刚触发的运行"""
+        import threading
+        
+        trigger_time = datetime.fromisoformat(result['triggered_at'])
+        thread = threading.Thread(
+            target=self.workflow_manager.get_triggered_run_info,
+            args=(result['repo'], result['workflow'], trigger_time, config_id),
+            kwargs={
+                'branch': result.get('branch', 'main'),
+                'correlation_id': result.get('correlation_id'),
+                'on_found': self.run_correlated.emit
+            }
+        )
+        thread.daemon = True
+        thread.start()
+        
+    def on_run_correlated(self, run):
+        """关联到触发的运行后刷新运行列表（记录已写入数据库，无需再同步）"""
+        self.log_message(f"已找到触发的运行: {run.get('name', '')} #{run.get('run_number', run.get('id'))}")
+        self.display_workflow_runs()
+        if self.run_poller:
+            self.run_poller.add_run(str(run['id']), (run.get('repository') or {}).get('full_name'),
+                                    run.get('status'))
+        
+    def start_webhook_server(self):
+        """按配置启动Webhook接收服务"""
+        if not self.config.is_webhook_enabled():
+            return
+            
+        from webhook_server import WebhookServer
+        
+        self.webhook_server = WebhookServer(
+            self.config.get_webhook_secret(),
+            self.db_manager,
+            host=self.config.get_webhook_host(),
+            port=self.config.get_webhook_port(),
+            on_event=self.webhook_event.emit
+        )
+        if self.webhook_server.start():
+            self.log_message(f"Webhook服务已启动，端口: {self.webhook_server.port}")
+        else:
+            self.log_message("Webhook服务启动失败，仅使用轮询同步", "ERROR")
+            self.webhook_server = None
+            
+    def on_webhook_event(self, event, run_id):
+        """Webhook写入运行记录后直接刷新表格"""
+        self.log_message(f"收到Webhook事件 {event}: {run_id}")
+        self.refresh_run_row(run_id)
+        
+    def start_run_poller(self):
+        """按配置启动运行状态轮询，刷新间隔作为轮询间隔上限"""
+        if not self.config.is_auto_refresh_enabled():
+            return
+            
+        from run_poller import RunPoller
+        
+        self.run_poller = RunPoller(
+            self.workflow_manager.github_manager,
+            self.db_manager,
+            max_interval=self.config.get_refresh_interval(),
+            on_update=self.run_polled.emit
+        )
+        self.run_poller.start()
+        self.refresh_poller_status()
+        
+    def start_log_indexer(self):
+        """启动日志后台索引线程"""
+        if self.log_indexer:
+            self.log_indexer.start()
+            
+    def start_retention_manager(self):
+        """按配置启动数据保留策略，旧运行记录和系统日志分批移到归档库"""
+        if not self.config.is_retention_enabled() or not self.db_manager.archive_path:
+            return
+            
+        from retention import RetentionManager
+        
+        self.retention_manager = RetentionManager(
+            self.db_manager,
+            run_days=self.config.get_retention_run_days(),
+            runs_per_config=self.config.get_retention_runs_per_config(),
+            log_days=self.config.get_retention_log_days(),
+            batch_size=self.config.get_retention_batch_size(),
+            interval_hours=self.config.get_retention_interval()
+        )
+        self.retention_manager.start()
+        self.refresh_retention_status()
+        
+    def on_runs_synced(self, synced_count):
+        """同步写入提交后刷新运行列表"""
+        if synced_count > 0:
+            self.log_message(f"静默同步完成，更新了 {synced_count} 个运行记录")
+            self.display_workflow_runs()
+            self.refresh_run_stats()
+            
+    def on_run_polled(self, run_id):
+        """轮询到运行状态变化后刷新对应行"""
+        self.refresh_run_row(run_id)
+        self.refresh_poller_status()
+        
+    def closeEvent(self, event):
+        """关闭窗口时停止后台服务"""
+        if self.run_poller:
+            self.run_poller.stop()
+            self.run_poller = None
+        if self.webhook_server:
+            self.webhook_server.stop()
+            self.webhook_server = None
+        if self.log_indexer:
+            self.log_indexer.stop()
+        if self.retention_manager:
+            self.retention_manager.stop()
+            self.retention_manager = None
+        self.db_manager.stop_backup_scheduler()
+        # 提交写队列中剩余的写操作
+        self.db_manager.stop_writer()
+        super().closeEvent(event)
+        
     def list_workflows(self):
         """列出工作流"""
         try:
@@ -921,8 +1558,8 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "警告", "请填写用户名和Token")
                 return
                 
-            # 测试Token
-            if self.github_manager.test_token(token):
+            # 测试Token（手动测试不使用缓存结果）
+            if self.github_manager.test_token(token, use_cache=False):
                 self.log_message(f"Token测试成功: {username}")
                 QMessageBox.information(self, "成功", "Token测试成功")
             else:
@@ -939,6 +1576,9 @@ class MainWindow(QMainWindow):
             users = self.user_manager.get_all_users()
             self.user_table.setRowCount(len(users))
             
+            # 所有用户的Token共同分摊只读请求
+            self.refresh_token_pool()
+            
             for i, user in enumerate(users):
                 self.user_table.setItem(i, 0, QTableWidgetItem(str(user['id'])))
                 self.user_table.setItem(i, 1, QTableWidgetItem(user['username']))
@@ -947,6 +1587,11 @@ class MainWindow(QMainWindow):
                 token_status = "有效" if self.user_manager.test_user_token(user['id']) else "无效"
                 status_item = QTableWidgetItem(token_status)
                 status_item.setForeground(QColor("green") if token_status == "有效" else QColor("red"))
+                token_info = self.user_manager.get_user_token_info(user['id'])
+                if token_info:
+                    scopes = ", ".join(token_info['scopes']) or "无"
+                    expires_at = token_info.get('expires_at') or "永不过期"
+                    status_item.setToolTip(f"权限范围: {scopes}\n过期时间: {expires_at}")
                 self.user_table.setItem(i, 2, status_item)
                 
                 self.user_table.setItem(i, 3, QTableWidgetItem(user['created_at']))
@@ -1047,21 +1692,8 @@ class MainWindow(QMainWindow):
                 
                 self.log_message(f"保存的工作流触发成功: {config['name']}")
                 
-                # 后台获取运行信息
-                import threading
-                import pytz
-                from PyQt5.QtCore import QTimer
-                
-                trigger_time = datetime.now(pytz.UTC)
-                thread = threading.Thread(
-                    target=self.workflow_manager.get_triggered_run_info,
-                    args=(config['repo'], config['workflow'], trigger_time, config['id'])
-                )
-                thread.daemon = True
-                thread.start()
-                
-                # 使用QTimer延迟6秒后刷新运行列表，避免SQLite线程问题
-                QTimer.singleShot(6000, self.load_workflow_runs)
+                # 后台关联运行，找到后通过信号刷新运行列表
+                self.start_run_correlation(result, config['id'])
             else:
                 self.log_message(f"保存的工作流触发失败: {config['name']}", "ERROR")
                 QMessageBox.critical(self, "错误", "工作流触发失败")
@@ -1156,91 +1788,38 @@ class MainWindow(QMainWindow):
 
     def load_workflow_runs(self):
         """加载工作流运行记录"""
+        # 先尝试同步运行信息，然后加载运行记录
+        self.sync_workflow_runs_silent()
+        self.display_workflow_runs()
+        
+    def display_workflow_runs(self):
+        """从数据库重新加载运行记录第一页（不访问GitHub API），其余页随滚动加载"""
         try:
-            # 先尝试同步运行信息
-            self.sync_workflow_runs_silent()
-            
-            # 然后加载运行记录
-            runs = self.workflow_manager.get_workflow_runs_from_db()
-            self.runs_table.setRowCount(len(runs))
-            
-            for i, run in enumerate(runs):
-                self.runs_table.setItem(i, 0, QTableWidgetItem(str(run.get('run_id', ''))))
-                self.runs_table.setItem(i, 1, QTableWidgetItem(run.get('workflow_name', '未知')))
-                self.runs_table.setItem(i, 2, QTableWidgetItem(run.get('repo', '')))
-                self.runs_table.setItem(i, 3, QTableWidgetItem(run.get('branch', '')))
-                
-                # 状态列
-                status = run.get('status', 'unknown')
-                status_item = QTableWidgetItem(status)
-                if status == 'completed':
-                    status_item.setForeground(QColor("green"))
-                elif status == 'in_progress':
-                    status_item.setForeground(QColor("blue"))
-                elif status == 'failed':
-                    status_item.setForeground(QColor("red"))
-                self.runs_table.setItem(i, 4, status_item)
-                
-                # 结论列
-                conclusion = run.get('conclusion', '')
-                conclusion_item = QTableWidgetItem(conclusion)
-                if conclusion == 'success':
-                    conclusion_item.setForeground(QColor("green"))
-                elif conclusion == 'failure':
-                    conclusion_item.setForeground(QColor("red"))
-                elif conclusion == 'cancelled':
-                    conclusion_item.setForeground(QColor("orange"))
-                self.runs_table.setItem(i, 5, conclusion_item)
-                
-                # 开始时间
-                created_at = run.get('created_at', '')
-                if created_at:
-                    # 格式化时间显示
-                    try:
-                        from datetime import datetime
-                        dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        formatted_time = dt.strftime('%Y-%m-%d %H:%M:%S')
-                        self.runs_table.setItem(i, 6, QTableWidgetItem(formatted_time))
-                    except:
-                        self.runs_table.setItem(i, 6, QTableWidgetItem(created_at))
-                else:
-                    self.runs_table.setItem(i, 6, QTableWidgetItem(''))
-                
-                # 操作按钮
-                button_layout = QHBoxLayout()
-                button_layout.setContentsMargins(0, 0, 0, 0)
-                button_layout.setSpacing(10)
-                
-                # 取消运行按钮
-                cancel_btn = QPushButton("❌ 取消")
-                cancel_btn.setStyleSheet("background-color: #dc3545; font-size: 13px; font-weight: 600; padding: 1px 16px; min-width: 70px; min-height: 32px; border-radius: 4px;")
-                cancel_btn.setToolTip("取消运行")
-                cancel_btn.clicked.connect(lambda checked, run_id=run.get('run_id'): self.cancel_workflow_run(run_id))
-                button_layout.addWidget(cancel_btn)
-                
-                # 浏览器查看按钮
-                if run.get('html_url'):
-                    open_browser_btn = QPushButton("🌐 查看")
-                    open_browser_btn.setStyleSheet("background-color: #28a745; font-size: 13px; font-weight: 600; padding: 1px 16px; min-width: 70px; min-height: 32px; border-radius: 4px;")
-                    open_browser_btn.setToolTip("在浏览器中打开")
-                    open_browser_btn.clicked.connect(lambda checked, run_id=run.get('run_id'): self.open_run_in_browser(run_id))
-                    button_layout.addWidget(open_browser_btn)
-                
-                # 查看日志按钮
-                view_logs_btn = QPushButton("📋 日志")
-                view_logs_btn.setStyleSheet("background-color: #007bff; font-size: 13px; font-weight: 600; padding: 1px 16px; min-width: 70px; min-height: 32px; border-radius: 4px;")
-                view_logs_btn.setToolTip("查看日志")
-                view_logs_btn.clicked.connect(lambda checked, run_id=run.get('run_id'): self.view_run_logs(run_id))
-                button_layout.addWidget(view_logs_btn)
-                
-                button_widget = QWidget()
-                button_widget.setLayout(button_layout)
-                self.runs_table.setCellWidget(i, 7, button_widget)
-                
+            self.runs_model.reload()
         except Exception as e:
             self.log_message(f"加载工作流运行记录失败: {str(e)}", "ERROR")
             
-
+    def apply_runs_filters(self):
+        """按仓库、状态、结论筛选运行记录"""
+        self.runs_model.set_filters(
+            repo=self.runs_repo_filter.text().strip(),
+            status=self.runs_status_filter.currentData(),
+            conclusion=self.runs_conclusion_filter.currentData()
+        )
+        
+    def refresh_run_row(self, run_id):
+        """只刷新已加载的单条记录；新出现的运行需要重新加载第一页"""
+        if not self.runs_model.update_run(run_id):
+            self.display_workflow_runs()
+            
+    def on_run_action(self, action, run_id):
+        """处理运行记录操作列按钮"""
+        if action == 'cancel':
+            self.cancel_workflow_run(run_id)
+        elif action == 'browser':
+            self.open_run_in_browser(run_id)
+        elif action == 'logs':
+            self.view_run_logs(run_id)
             
     def open_run_in_browser(self, run_id):
         """在浏览器中打开指定运行"""
@@ -1262,18 +1841,26 @@ class MainWindow(QMainWindow):
             self.log_message(f"打开运行URL失败: {str(e)}", "ERROR")
             QMessageBox.critical(self, "错误", f"打开运行URL失败: {str(e)}")
             
-    def view_run_logs(self, run_id):
-        """查看指定运行的日志"""
+    def view_run_logs(self, run_id, focus=None):
+        """查看指定运行的日志，focus 为 (日志文件名, 行号) 时打开后定位到该行"""
         try:
             # 检查是否是临时run_id
             if run_id.startswith('triggered_'):
                 QMessageBox.warning(self, "警告", f"无法获取临时运行ID的日志: {run_id}\n请等待运行信息同步或手动刷新。")
                 return
                 
-            logs = self.workflow_manager.get_run_logs(run_id)
+            if self.failed_jobs_only_checkbox.isChecked():
+                logs = self.workflow_manager.get_failed_job_logs(run_id)
+            else:
+                logs = self.workflow_manager.get_run_logs(run_id)
             if logs:
                 self.log_message(f"获取到运行日志: {run_id}")
-                self.show_run_logs(logs)
+                try:
+                    self.show_run_logs(logs, focus)
+                finally:
+                    # 释放按需解码的日志归档
+                    if hasattr(logs, 'close'):
+                        logs.close()
             else:
                 self.log_message(f"未找到日志: {run_id}", "ERROR")
                 QMessageBox.critical(self, "错误", f"未找到日志: {run_id}")
@@ -1281,19 +1868,19 @@ class MainWindow(QMainWindow):
             self.log_message(f"获取运行日志失败: {str(e)}", "ERROR")
             QMessageBox.critical(self, "错误", f"获取运行日志失败: {str(e)}")
             
-    def show_run_logs(self, logs):
+    def show_run_logs(self, logs, focus=None):
         """显示运行日志"""
         try:
             # 检查日志格式
-            if isinstance(logs, dict):
+            if isinstance(logs, Mapping):
                 # 多文件日志，使用新的查看器
                 if len(logs) > 1:
                     # 多个文件，使用多文件查看器
-                    viewer = MultiFileLogViewer(logs, self)
+                    viewer = MultiFileLogViewer(logs, self, focus)
                     viewer.exec_()
                 else:
                     # 单个文件，显示内容
-                    filename = list(logs.keys())[0]
+                    filename = next(iter(logs))
                     content = logs[filename]
                     self.show_single_log(filename, content)
             elif isinstance(logs, str):
@@ -1356,6 +1943,30 @@ class MainWindow(QMainWindow):
             self.log_message(f"显示日志失败: {str(e)}", "ERROR")
             QMessageBox.critical(self, "错误", f"显示日志失败: {str(e)}")
     
+    def search_run_logs(self):
+        """在已索引的运行日志中搜索输入的文本"""
+        try:
+            text = self.log_search_input.text().strip()
+            if not text:
+                return
+                
+            start = time.perf_counter()
+            matches = self.workflow_manager.search_run_logs(text)
+            elapsed = (time.perf_counter() - start) * 1000
+            
+            run_count = len({match['run_id'] for match in matches})
+            self.log_message(f"日志搜索 \"{text}\": {len(matches)} 行，{run_count} 个运行，用时 {elapsed:.0f} ms")
+            if not matches:
+                QMessageBox.information(self, "日志搜索", f"已索引的日志中没有找到: {text}")
+                return
+                
+            dialog = LogSearchDialog(text, matches, elapsed, self)
+            dialog.exec_()
+            
+        except Exception as e:
+            self.log_message(f"搜索日志失败: {str(e)}", "ERROR")
+            QMessageBox.critical(self, "错误", f"搜索日志失败: {str(e)}")
+            
     def copy_to_clipboard(self, text):
         """复制文本到剪贴板"""
         try:
@@ -1421,66 +2032,35 @@ class MainWindow(QMainWindow):
             self.github_manager.set_token(user_token)
             self.workflow_manager.set_github_token(user_token)
             
-            # 同步每个配置的最新运行信息
-            synced_count = 0
-            for config in configs:
-                try:
-                    # 获取该配置的最新运行
-                    latest_run = self.github_manager.get_latest_workflow_run(config['repo'], config['workflow'])
-                    if latest_run:
-                        # 更新或插入运行记录
-                        self.db_manager.insert_workflow_run(
-                            config_id=config['id'],
-                            run_id=str(latest_run['id']),
-                            status=latest_run.get('status', 'unknown'),
-                            html_url=latest_run.get('html_url'),
-                            conclusion=latest_run.get('conclusion'),
-                            logs_url=latest_run.get('logs_url'),
-                            workflow_name=latest_run.get('name'),
-                            repo=config['repo'],
-                            branch=config['branch'],
-                            trigger_user=latest_run.get('actor', {}).get('login')
-                        )
-                        synced_count += 1
-                        
-                        # 同时更新现有运行的状态
-                        self.update_existing_runs_status(config['repo'], config['workflow'])
-                        
-                except Exception as e:
-                    self.log_message(f"静默同步配置 {config['name']} 失败: {str(e)}", "ERROR")
-                    continue
+            # 上一次同步尚未结束时跳过本次
+            if self.sync_thread and self.sync_thread.is_alive():
+                return
+                
+            # 增量同步：只拉取新运行和未完成运行的状态，只写入有变化的记录。
+            # 网络请求（包括后台请求的限速等待）在后台线程中进行，写入由写线程提交，
+            # 提交后经 runs_synced 信号回到界面线程刷新
+            import threading
             
-            if synced_count > 0:
-                self.log_message(f"静默同步完成，更新了 {synced_count} 个运行记录")
+            self.sync_thread = threading.Thread(
+                target=self.workflow_manager.sync_workflow_runs,
+                args=(configs,),
+                kwargs={'on_written': self.runs_synced.emit},
+                name="sync-runs"
+            )
+            self.sync_thread.daemon = True
+            self.sync_thread.start()
             
         except Exception as e:
             self.log_message(f"静默同步运行信息失败: {str(e)}", "ERROR")
-            
-    def update_existing_runs_status(self, repo: str, workflow: str):
-        """更新现有运行的状态"""
-        try:
-            # 获取该workflow的最近几个运行
-            runs = self.github_manager.list_workflow_runs(repo, workflow, per_page=5)
-            
-            for run in runs:
-                run_id = str(run['id'])
-                # 更新数据库中的运行状态
-                self.db_manager.update_workflow_run_status(
-                    run_id,
-                    run.get('status', 'unknown'),
-                    run.get('conclusion')
-                )
-                
-        except Exception as e:
-            self.log_message(f"更新运行状态失败: {str(e)}", "ERROR")
 
 class MultiFileLogViewer(QDialog):
     """多文件日志查看器"""
     
-    def __init__(self, logs_data, parent=None):
+    def __init__(self, logs_data, parent=None, focus=None):
         super().__init__(parent)
-        self.logs_data = logs_data  # 格式: { 'filename': 'content', ... }
+        self.logs_data = logs_data  # 格式: { 'filename': 'content', ... }，内容在选中时才解码
         self.current_file = None
+        self.focus = focus  # (文件名, 行号)，打开后定位到该行
         self.init_ui()
         
     def clean_ansi_escape_codes(self, text):
@@ -1589,10 +2169,27 @@ class MultiFileLogViewer(QDialog):
                 item.setForeground(QColor("#7f8c8d"))
             self.file_list.addItem(item)
         
-        # 默认选择第一个文件
+        # 默认选择第一个文件，指定了定位行时选择该文件
         if self.file_list.count() > 0:
-            self.file_list.setCurrentRow(0)
-            self.on_file_selected(self.file_list.item(0))
+            row = 0
+            if self.focus:
+                matches = self.file_list.findItems(self.focus[0], Qt.MatchExactly)
+                if matches:
+                    row = self.file_list.row(matches[0])
+            self.file_list.setCurrentRow(row)
+            self.on_file_selected(self.file_list.item(row))
+            if self.focus and self.current_file == self.focus[0]:
+                self.scroll_to_line(self.focus[1])
+                
+    def scroll_to_line(self, line):
+        """定位并选中指定行（从1开始）"""
+        block = self.log_text.document().findBlockByNumber(line - 1)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        self.log_text.setTextCursor(cursor)
+        self.log_text.ensureCursorVisible()
     
     def on_file_selected(self, item):
         """文件选择事件"""
@@ -1682,6 +2279,61 @@ class MultiFileLogViewer(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "导出失败", f"导出日志失败: {str(e)}")
 
+class LogSearchDialog(QDialog):
+    """日志搜索结果"""
+    
+    HEADERS = ["运行ID", "仓库", "工作流", "结论", "日志文件", "行号", "内容"]
+    
+    def __init__(self, text, matches, elapsed, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.matches = matches
+        self.elapsed = elapsed
+        self.init_ui()
+        
+    def init_ui(self):
+        self.setWindowTitle(f"日志搜索 - {self.text}")
+        self.resize(1100, 600)
+        
+        layout = QVBoxLayout(self)
+        
+        run_count = len({match['run_id'] for match in self.matches})
+        info_label = QLabel(f"{len(self.matches)} 行匹配，涉及 {run_count} 个运行（用时 {self.elapsed:.0f} ms），双击打开日志并定位到该行")
+        info_label.setStyleSheet("font-weight: bold; color: #2c3e50;")
+        layout.addWidget(info_label)
+        
+        self.results_table = QTableWidget(len(self.matches), len(self.HEADERS))
+        self.results_table.setHorizontalHeaderLabels(self.HEADERS)
+        self.results_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.results_table.verticalHeader().setVisible(False)
+        for row, match in enumerate(self.matches):
+            values = (match['run_id'], match['repo'], match.get('workflow_name') or '',
+                      match.get('conclusion') or match.get('status') or '', match['job'],
+                      str(match['line']), match['content'])
+            for column, value in enumerate(values):
+                self.results_table.setItem(row, column, QTableWidgetItem(value))
+        self.results_table.cellDoubleClicked.connect(self.open_match)
+        
+        header = self.results_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(6, QHeaderView.Stretch)
+        for column, width in ((0, 110), (1, 160), (2, 140), (3, 80), (4, 180), (5, 60)):
+            self.results_table.setColumnWidth(column, width)
+        layout.addWidget(self.results_table)
+        
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+    def open_match(self, row, column):
+        """打开匹配行所在运行的日志"""
+        match = self.matches[row]
+        self.parent().view_run_logs(match['run_id'], (match['job'], match['line']))
+        
 def setup_application_icon(app):
     """设置应用程序图标"""
     try:
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据保留模块
+
+按配置的保留策略（保留天数、每个配置保留的运行条数）把旧的运行记录和系统日志
+分批移到附加的归档库，主库只保留近期数据；删除后用 incremental_vacuum 归还空间。
+归档库中的数据仍可通过 archive.<表名> 查询，运行统计也包含已归档的运行。
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable
+
+from database import DatabaseManager
+
+# 启动后延迟执行第一次清理（秒），避开启动时的同步
+RETENTION_START_DELAY = 60
+
+# 回收空闲页前等待写队列清空的最长时间（秒），超时则留到下次执行
+VACUUM_IDLE_WAIT = 30
+
+class RetentionManager:
+    """保留策略执行器
+    
+    后台线程每隔 interval_hours 小时执行一次：每批移动 batch_size 行，
+    每批一个写事务，批与批之间暂停 batch_pause 秒，让其他写操作穿插执行。
+    run_days / runs_per_config / log_days 为0表示不按该条件清理。
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, run_days: int = 90, runs_per_config: int = 0,
+                 log_days: int = 30, batch_size: int = 500, interval_hours: float = 6.0,
+                 vacuum_pages: int = 2000, batch_pause: float = 0.05):
+        self.db_manager = db_manager
+        self.run_days = run_days
+        self.runs_per_config = runs_per_config
+        self.log_days = log_days
+        self.batch_size = batch_size
+        self.interval = interval_hours * 3600
+        self.vacuum_pages = vacuum_pages
+        self.batch_pause = batch_pause
+        self.vacuum_ready = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {'runs_archived': 0, 'logs_archived': 0, 'pages_freed': 0,
+                      'last_run_at': None, 'running': False}
+        self.logger = logging.getLogger(__name__)
+        
+    def start(self):
+        """启动清理线程"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self.thread.start()
+        self.logger.info(f"数据保留策略已启动: 运行保留 {self.run_days} 天，"
+                         f"每个配置保留 {self.runs_per_config or '不限'} 条，系统日志保留 {self.log_days} 天")
+                         
+    def stop(self):
+        """停止清理线程（当前批次提交后退出）"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+            self.thread = None
+        self.logger.info("数据保留策略已停止")
+        
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """获取清理统计"""
+        return dict(self.stats)
+        
+    def _run(self):
+        if self.stop_event.wait(RETENTION_START_DELAY):
+            return
+        while not self.stop_event.is_set():
+            self.run_once()
+            self.stop_event.wait(self.interval)
+            
+    def run_once(self) -> Dict[str, int]:
+        """执行一次保留策略，返回本次移动的运行数、日志数和归还的页数"""
+        result = {'runs': 0, 'logs': 0, 'pages': 0}
+        self.stats['running'] = True
+        try:
+            db = self.db_manager
+            # 首次执行时把已有数据库转换为增量回收模式（一次VACUUM，在本线程中执行）
+            if not self.vacuum_ready:
+                self.vacuum_ready = db.enable_incremental_vacuum()
+            if self.run_days:
+                # 运行时间是GitHub返回的UTC时间（如 2026-01-01T10:00:00Z），截止时间用相同格式
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=self.run_days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+                result['runs'] += self._drain(db.archive_runs_before, cutoff)
+            if self.runs_per_config:
+                for config in db.get_all_workflow_configs():
+                    result['runs'] += self._drain(db.archive_config_runs, config['id'], self.runs_per_config)
+            if self.log_days:
+                # 系统日志按本地时间写入（insert_system_log）
+                cutoff = (datetime.now() - timedelta(days=self.log_days)).isoformat()
+                result['logs'] += self._drain(db.archive_system_logs_before, cutoff)
+                
+            # 回收占用写线程，只在写队列空闲时执行；忙时留到下次，空闲页不会丢失
+            if self.vacuum_ready and self._wait_for_idle_writer():
+                result['pages'] = db.incremental_vacuum(self.vacuum_pages)
+            if result['runs'] or result['logs'] or result['pages']:
+                self.logger.info(f"数据保留: 归档 {result['runs']} 条运行记录、{result['logs']} 条系统日志，"
+                                 f"归还 {result['pages']} 页")
+                                 
+            self.stats['runs_archived'] += result['runs']
+            self.stats['logs_archived'] += result['logs']
+            self.stats['pages_freed'] += result['pages']
+            self.stats['last_run_at'] = time.time()
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"执行数据保留策略失败: {str(e)}")
+            return result
+        finally:
+            self.stats['running'] = False
+            
+    def _wait_for_idle_writer(self) -> bool:
+        """等待写队列清空，最多 VACUUM_IDLE_WAIT 秒；线程停止或超时返回False"""
+        deadline = time.monotonic() + VACUUM_IDLE_WAIT
+        while self.db_manager.pending_writes():
+            if time.monotonic() >= deadline or self.stop_event.wait(0.1):
+                return False
+        return True
+        
+    def _drain(self, archive: Callable[..., int], *args) -> int:
+        """反复调用 archive(*args, limit) 直到不足一批或线程停止，返回移动的总行数"""
+        total = 0
+        while True:
+            moved = archive(*args, limit=self.batch_size)
+            total += moved
+            if moved < self.batch_size or self.stop_event.wait(self.batch_pause):
+                return total
+                
\ No newline at end of file
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+触发-运行关联模块
+
+workflow_dispatch 接口只返回204，不返回运行ID。本模块在触发后以指数退避
+轮询运行列表，按触发者、分支、创建时间（以及可选的关联ID）找出本次触发
+产生的运行，找到后立即回调。
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable
+from datetime import datetime, timedelta, timezone
+
+from github_manager import GitHubManager, format_created_filter
+
+class RunCorrelator:
+    """触发-运行关联器
+    
+    同一工作流被并发触发时，已关联的运行ID会被记录，后续关联只在未被
+    认领的运行中按创建时间从早到晚选择，避免两次触发匹配到同一个运行。
+    若工作流声明了关联ID输入（并在 run-name 中引用），则按运行标题精确匹配。
+    """
+    
+    def __init__(self, github_manager: GitHubManager, initial_delay: float = 0.5,
+                 max_delay: float = 8.0, timeout: float = 120.0, clock_skew: float = 5.0):
+        self.github_manager = github_manager
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.clock_skew = clock_skew
+        self.claimed = {}
+        self.actors = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        
+    def _actor(self) -> Optional[str]:
+        """当前Token对应的用户名（按Token缓存）"""
+        token = self.github_manager.token
+        if token not in self.actors:
+            user_info = self.github_manager.get_user_info()
+            if not user_info:
+                return None
+            self.actors[token] = user_info.get('login')
+        return self.actors[token]
+        
+    @staticmethod
+    def _created_at(run: Dict[str, Any]) -> Optional[datetime]:
+        created_at = run.get('created_at')
+        if not created_at:
+            return None
+        return datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        
+    def _matches(self, run: Dict[str, Any], ref: str, actor: Optional[str],
+                 since: datetime, correlation_id: Optional[str]) -> bool:
+        """判断运行是否由本次触发产生"""
+        if run.get('event') not in (None, 'workflow_dispatch'):
+            return False
+        if correlation_id:
+            title = f"{run.get('display_title') or ''} {run.get('name') or ''}"
+            return correlation_id in title
+            
+        created_at = self._created_at(run)
+        if created_at is None or created_at < since:
+            return False
+        if ref and run.get('head_branch') not in (None, ref):
+            return False
+        if actor:
+            run_actor = (run.get('triggering_actor') or run.get('actor') or {}).get('login')
+            if run_actor and run_actor != actor:
+                return False
+        return True
+        
+    def _claim(self, key: str, runs: list, ref: str, actor: Optional[str],
+               since: datetime, correlation_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """在候选运行中认领最早的未被认领的匹配项"""
+        candidates = [run for run in runs if self._matches(run, ref, actor, since, correlation_id)]
+        candidates.sort(key=lambda run: (run.get('created_at') or '', run.get('id') or 0))
+        
+        with self.lock:
+            claimed = self.claimed.setdefault(key, {})
+            # 清理超时的认领记录
+            expired = time.time() - self.timeout * 2
+            for run_id in [rid for rid, at in claimed.items() if at < expired]:
+                del claimed[run_id]
+                
+            for run in candidates:
+                if run['id'] not in claimed:
+                    claimed[run['id']] = time.time()
+                    return run
+        return None
+        
+    def correlate(self, repo: str, workflow: str, ref: str, trigger_time: datetime,
+                  correlation_id: str = None,
+                  on_found: Callable[[Dict[str, Any]], None] = None) -> Optional[Dict[str, Any]]:
+        """轮询直到找到本次触发产生的运行，超时返回None"""
+        try:
+            if trigger_time.tzinfo is None:
+                trigger_time = trigger_time.replace(tzinfo=timezone.utc)
+            # 允许本机与GitHub之间存在少量时钟偏差
+            since = trigger_time - timedelta(seconds=self.clock_skew)
+            actor = None if correlation_id else self._actor()
+            key = f"{repo}/{workflow}"
+            
+            deadline = time.monotonic() + self.timeout
+            delay = self.initial_delay
+            attempts = 0
+            
+            while True:
+                time.sleep(delay)
+                attempts += 1
+                
+                # 用户正在等待结果，按交互优先级调度
+                runs = list(self.github_manager.iter_workflow_runs(
+                    repo, workflow, per_page=20,
+                    stop_when=GitHubManager.created_before(since),
+                    event='workflow_dispatch',
+                    branch=ref,
+                    actor=actor,
+                    created=format_created_filter(since)
+                ))
+                
+                run = self._claim(key, runs, ref, actor, since, correlation_id)
+                if run:
+                    self.logger.info(f"已关联触发的运行: {repo}/{workflow} -> {run['id']} (轮询 {attempts} 次)")
+                    if on_found:
+                        on_found(run)
+                    return run
+                    
+                if time.monotonic() + delay > deadline:
+                    self.logger.warning(f"未能在 {self.timeout} 秒内关联触发的运行: {repo}/{workflow}")
+                    return None
+                delay = min(delay * 2, self.max_delay)
+                
+        except Exception as e:
+            self.logger.error(f"关联触发的运行失败: {str(e)}")
+            return None
+            
\ No newline at end of file
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行状态轮询模块
+
+后台线程维护一个按“下次轮询时间”排序的优先队列（heapq），只轮询
+queued / in_progress 等未完成的运行；运行完成后不再轮询。
+"""
+
+import time
+import heapq
+import logging
+import threading
+import statistics
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable
+
+from database import DatabaseManager
+from github_manager import GitHubManager
+
+class RunPoller:
+    """自适应运行状态轮询器
+    
+    轮询间隔随运行时长增加而放宽；若同一工作流已有历史耗时，接近其
+    中位耗时时收紧到最小间隔。配置的刷新间隔（ui.refresh_interval）
+    作为间隔上限。
+    """
+    
+    def __init__(self, github_manager: GitHubManager, db_manager: DatabaseManager,
+                 max_interval: float = 30.0, min_interval: float = 2.0,
+                 on_update: Callable[[str], None] = None):
+        self.github_manager = github_manager
+        self.db_manager = db_manager
+        self.max_interval = max(max_interval, min_interval)
+        self.min_interval = min_interval
+        self.on_update = on_update
+        self.queue = []
+        self.runs = {}
+        self.abandoned = set()
+        self.durations = {}
+        self.request_times = deque()
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.logger = logging.getLogger(__name__)
+        
+    def start(self):
+        """启动轮询线程"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="run-poller", daemon=True)
+        self.thread.start()
+        self.logger.info("运行状态轮询已启动")
+        
+    def stop(self):
+        """停止轮询线程"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        self.logger.info("运行状态轮询已停止")
+        
+    def add_run(self, run_id: str, repo: str, status: str = None):
+        """加入需要跟踪的运行（已在队列中则忽略），立即安排一次轮询"""
+        if status == 'completed' or not repo:
+            return
+        with self.condition:
+            if run_id in self.runs or run_id in self.abandoned:
+                return
+            self.runs[run_id] = {'repo': repo, 'status': status, 'started_at': None, 'workflow': None}
+            self._schedule(run_id, time.time())
+            
+    def _schedule(self, run_id: str, at: float):
+        self.sequence += 1
+        heapq.heappush(self.queue, (at, self.sequence, run_id))
+        self.condition.notify_all()
+        
+    def get_requests_per_minute(self) -> int:
+        """最近60秒内发出的请求数"""
+        cutoff = time.time() - 60
+        with self.condition:
+            while self.request_times and self.request_times[0] < cutoff:
+                self.request_times.popleft()
+            return len(self.request_times)
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """获取轮询统计"""
+        with self.condition:
+            tracked = len(self.runs)
+            next_at = self.queue[0][0] if self.queue else None
+        return {
+            'tracked_runs': tracked,
+            'requests_per_minute': self.get_requests_per_minute(),
+            'next_poll_in': max(0.0, next_at - time.time()) if next_at else None
+        }
+        
+    def _median_duration(self, key) -> Optional[float]:
+        samples = self.durations.get(key)
+        return statistics.median(samples) if samples else None
+        
+    def _interval(self, run: Dict[str, Any]) -> float:
+        """计算下次轮询间隔"""
+        now = time.time()
+        age = now - run['started_at'] if run['started_at'] else 0.0
+        # 每运行一分钟，间隔放宽一个最小间隔
+        interval = self.min_interval * (1 + age / 60.0)
+        
+        median = self._median_duration((run['repo'], run['workflow']))
+        if median and run['status'] == 'in_progress':
+            remaining = median - age
+            if abs(remaining) <= max(10.0, median * 0.1):
+                # 接近历史中位耗时，收紧间隔
+                interval = self.min_interval
+            elif remaining > 0:
+                # 距预计结束还早，不要跨过预计结束时间太多
+                interval = min(interval, max(self.min_interval, remaining / 2))
+                
+        return min(max(interval, self.min_interval), self.max_interval)
+        
+    @staticmethod
+    def _timestamp(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        
+    def _reload_from_database(self):
+        """把数据库中未完成的运行加入队列（同步或Webhook新增的运行）"""
+        for row in self.db_manager.get_active_workflow_runs():
+            self.add_run(row['run_id'], row.get('repo'), row.get('status'))
+            
+    def _run(self):
+        try:
+            next_reload = 0.0
+            
+            while True:
+                with self.condition:
+                    if not self.running:
+                        break
+                        
+                now = time.time()
+                if now >= next_reload:
+                    self._reload_from_database()
+                    next_reload = now + self.max_interval
+                    
+                with self.condition:
+                    if not self.running:
+                        break
+                    wait = next_reload - time.time()
+                    if self.queue:
+                        wait = min(wait, self.queue[0][0] - time.time())
+                    if wait > 0:
+                        self.condition.wait(wait)
+                        continue
+                    if not self.queue or self.queue[0][0] > time.time():
+                        continue
+                    _, _, run_id = heapq.heappop(self.queue)
+                    run = self.runs.get(run_id)
+                    
+                if run:
+                    self._poll(run_id, run)
+                    
+        except Exception as e:
+            self.logger.error(f"运行状态轮询异常退出: {str(e)}")
+        finally:
+            self.db_manager.release_connection()
+                
+    def _poll(self, run_id: str, run: Dict[str, Any]):
+        """轮询一个运行并在状态变化时写入数据库"""
+        with self.condition:
+            self.request_times.append(time.time())
+            
+        with self.github_manager.background_requests():
+            data = self.github_manager.get_workflow_run(run['repo'], run_id)
+            
+        with self.condition:
+            if data is None:
+                # 请求失败，按上限间隔重试；连续失败多次（如运行已被删除）则不再跟踪
+                run['failures'] = run.get('failures', 0) + 1
+                if run['failures'] >= 5:
+                    del self.runs[run_id]
+                    self.abandoned.add(run_id)
+                else:
+                    self._schedule(run_id, time.time() + self.max_interval)
+                return
+                
+            run['failures'] = 0
+                
+            status = data.get('status')
+            changed = status != run['status']
+            run['status'] = status
+            run['workflow'] = data.get('name')
+            run['started_at'] = self._timestamp(data.get('run_started_at') or data.get('created_at'))
+            
+            if status == 'completed':
+                del self.runs[run_id]
+                finished_at = self._timestamp(data.get('updated_at'))
+                if run['started_at'] and finished_at:
+                    samples = self.durations.setdefault((run['repo'], run['workflow']), deque(maxlen=20))
+                    samples.append(finished_at - run['started_at'])
+            else:
+                self._schedule(run_id, time.time() + self._interval(run))
+                
+        if changed:
+            self.db_manager.update_workflow_run_status(
+                run_id, status, data.get('conclusion'),
+                data.get('updated_at') if status == 'completed' else None,
+                data.get('run_started_at')
+            )
+            if self.on_update:
+                self.on_update(run_id)
+                
\ No newline at end of file
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""测试公共夹具：临时数据库"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, RUN_STATS_COLUMNS
+
+@pytest.fixture
+def db(tmp_path):
+    """已初始化并启动写线程的临时数据库"""
+    manager = DatabaseManager(str(tmp_path / "test.db"))
+    manager.init_database()
+    manager.start_writer()
+    yield manager
+    manager.close()
+    
+@pytest.fixture
+def archive_db(tmp_path):
+    """附加了归档库的临时数据库"""
+    manager = DatabaseManager(str(tmp_path / "test.db"), archive_path=str(tmp_path / "archive.db"))
+    manager.init_database()
+    manager.start_writer()
+    yield manager
+    manager.close()
+    
+def make_run(run_id, **fields):
+    """构造 upsert_runs 接受的运行记录"""
+    run = {'run_id': str(run_id), 'status': 'completed', 'conclusion': 'success', 'repo': 'o/r',
+           'workflow_name': 'CI', 'branch': 'main', 'queued_at': '2026-03-01T10:00:00Z',
+           'started_at': '2026-03-01T10:00:30Z', 'completed_at': '2026-03-01T10:05:30Z', 'run_attempt': 1}
+    run.update(fields)
+    return run
+    
+def stats_snapshot(db):
+    """运行统计表中非零的行（与全量重建比较）"""
+    rows = db.execute_query("SELECT * FROM run_stats WHERE runs != 0")
+    return sorted(tuple(row[column] for column in ('dimension', 'key', 'conclusion') + RUN_STATS_COLUMNS)
+                  for row in rows)
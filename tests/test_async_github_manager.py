@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""异步GitHub API管理器的测试（本地 aiohttp 服务模拟分页接口）"""
+
+import asyncio
+
+from aiohttp import web
+
+from async_github_manager import AsyncGitHubManager
+from github_manager import RateLimiter, ResponseCache, TokenPool
+
+async def serve_pages(handler_routes):
+    app = web.Application()
+    for path, handler in handler_routes:
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+    
+def paged(key, pages):
+    """按 page 参数返回第N页，非最后一页时带 Link: rel=next"""
+    async def handler(request):
+        page = int(request.query.get('page', 1))
+        body = {key: pages[page - 1]} if key else pages[page - 1]
+        headers = {}
+        if page < len(pages):
+            headers['Link'] = f'<{request.url.with_query(page=page + 1)}>; rel="next"'
+        return web.json_response(body, headers=headers)
+    return handler
+    
+def test_list_methods_follow_all_pages():
+    async def scenario():
+        runner, base_url = await serve_pages([
+            ('/repos/o/r/actions/workflows', paged('workflows', [[{'id': 1}, {'id': 2}], [{'id': 3}]])),
+            ('/user/repos', paged(None, [[{'name': 'a'}], [{'name': 'b'}], [{'name': 'c'}]])),
+        ])
+        try:
+            limiter = RateLimiter()
+            limiter.enabled = False
+            async with AsyncGitHubManager(response_cache=ResponseCache(), rate_limiter=limiter) as manager:
+                manager.base_url = base_url
+                manager.set_token("token")
+                workflows = await manager.list_workflows('o/r')
+                repositories = await manager.list_repositories()
+        finally:
+            await runner.cleanup()
+        return workflows, repositories
+        
+    workflows, repositories = asyncio.run(scenario())
+    assert [item['id'] for item in workflows] == [1, 2, 3]
+    assert [item['name'] for item in repositories] == ['a', 'b', 'c']
+    
+def test_missing_run_does_not_deny_token_for_repo():
+    async def repository(request):
+        return web.json_response({'full_name': 'o/r'})
+        
+    async def missing_run(request):
+        return web.json_response({'message': 'Not Found'}, status=404)
+        
+    async def scenario():
+        runner, base_url = await serve_pages([
+            ('/repos/o/r', repository),
+            ('/repos/o/r/actions/runs/{run_id}', missing_run),
+        ])
+        try:
+            limiter = RateLimiter()
+            limiter.enabled = False
+            pool = TokenPool(limiter)
+            pool.set_tokens(["token-a", "token-b"])
+            async with AsyncGitHubManager(response_cache=ResponseCache(), rate_limiter=limiter,
+                                          token_pool=pool) as manager:
+                manager.base_url = base_url
+                manager.set_token("token-a")
+                runs = [await manager.get_workflow_run('o/r', '404') for _ in range(3)]
+        finally:
+            await runner.cleanup()
+        return runs, pool
+        
+    runs, pool = asyncio.run(scenario())
+    assert runs == [None, None, None]
+    assert sorted(pool.candidates('o/r')) == ['token-a', 'token-b']
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""数据库写线程、批量写入、运行统计触发器和 RunRecord 的测试"""
+
+import threading
+
+from database import RunRecord, RUN_LIST_FIELDS
+from conftest import make_run, stats_snapshot
+
+def test_writer_commits_writes_from_many_threads(db):
+    def insert(prefix):
+        for index in range(50):
+            db.upsert_runs([make_run(f"{prefix}-{index}")], wait=False)
+            
+    threads = [threading.Thread(target=insert, args=(prefix,)) for prefix in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert db.flush_writes(timeout=10)
+    assert db.execute_query("SELECT COUNT(*) AS n FROM workflow_runs")[0]['n'] == 200
+    
+def test_writer_propagates_errors_to_future(db):
+    future = db.submit_write(lambda connection: connection.execute("INSERT INTO missing_table VALUES (1)"))
+    try:
+        future.result(timeout=5)
+    except Exception as e:
+        assert "missing_table" in str(e)
+    else:
+        raise AssertionError("写入不存在的表应当失败")
+    # 失败的批次不影响后续写入
+    assert db.upsert_runs([make_run(1)]) == 1
+    
+def test_upsert_runs_counts_only_changed_rows(db):
+    assert db.upsert_runs([make_run(1), make_run(2)]) == 2
+    assert db.upsert_runs([make_run(1), make_run(2)]) == 0
+    assert db.upsert_runs([make_run(1, conclusion='failure')]) == 1
+    assert db.get_workflow_run_by_run_id('1')['conclusion'] == 'failure'
+    
+def test_upsert_runs_keeps_existing_optional_fields(db):
+    db.upsert_runs([make_run(1, branch='main')])
+    db.upsert_runs([make_run(1, branch=None, status='completed', conclusion='failure')])
+    run = db.get_workflow_run_by_run_id('1')
+    assert run['branch'] == 'main'
+    assert run['conclusion'] == 'failure'
+    
+def test_run_stats_triggers_match_full_rebuild(db):
+    db.upsert_runs([make_run(index, repo=f"o/r{index % 3}", conclusion=('success', 'failure')[index % 2],
+                             status=('completed', 'in_progress')[index % 5 == 0]) for index in range(40)])
+    db.update_workflow_run_status('5', 'completed', 'cancelled', '2026-03-01T11:00:00Z')
+    db.execute_update("DELETE FROM workflow_runs WHERE run_id IN ('1', '2')")
+    db.execute_update("UPDATE workflow_runs SET repo = 'o/moved' WHERE run_id = '3'")
+    db.flush_writes()
+    incremental = stats_snapshot(db)
+    assert db.rebuild_run_stats()
+    assert stats_snapshot(db) == incremental
+    
+    by_repo = {row['key']: row for row in db.get_run_stats('repo')}
+    assert by_repo['o/moved']['runs'] == 1
+    assert by_repo['o/moved']['conclusions'] == {'failure': 1}
+    
+def test_run_record_behaves_like_dict(db):
+    db.upsert_runs([make_run(1)])
+    run = db.get_workflow_run_by_run_id('1')
+    assert isinstance(run, RunRecord)
+    assert run['repo'] == 'o/r' and run.get('missing', 'default') == 'default'
+    assert 'status' in run and 'missing' not in run
+    run.update({'status': 'queued', 'note': 'x'})
+    assert run['status'] == 'queued' and run['note'] == 'x'
+    assert dict(run)['run_id'] == '1'
+    
+def test_run_record_interns_low_cardinality_strings(db):
+    db.upsert_runs([make_run(1), make_run(2)])
+    first, second = db.get_workflow_runs()
+    assert first['repo'] is second['repo']
+    assert first['status'] is second['status']
+    
+def test_run_record_page_loads_other_columns_lazily(db):
+    db.upsert_runs([make_run(1, logs_url='https://example/logs')])
+    runs, cursor = db.get_workflow_runs_page(page_size=10)
+    assert cursor is None
+    run = runs[0]
+    assert set(run.keys()) == set(RUN_LIST_FIELDS)
+    assert run['logs_url'] == 'https://example/logs'
+    assert run['started_at'] == '2026-03-01T10:00:30Z'
+    
+def test_runs_without_config_keep_their_repo(db):
+    user_id = db.insert_user("alice", "token")
+    config_id = db.insert_workflow_config(user_id, "CI", "o/config-repo", "ci.yml")
+    db.upsert_runs([make_run(1, repo='o/r', config_id=None),
+                    make_run(2, repo='o/other', config_id=config_id)])
+    runs = {run['run_id']: run for run in db.get_workflow_runs()}
+    assert runs['1']['repo'] == 'o/r'
+    assert runs['2']['repo'] == 'o/other'
+    assert runs['2']['config_name'] == 'CI'
+    assert db.get_workflow_runs(config_id)[0]['repo'] == 'o/other'
+    
+def test_run_record_first_duplicate_column_wins():
+    build = RunRecord.builder(['run_id', 'repo', 'repo'])
+    assert build(('1', 'o/run', 'o/config'))['repo'] == 'o/run'
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""GitHubManager 只读请求的测试（本地HTTP服务模拟GitHub接口）"""
+
+import json
+import threading
+from contextlib import contextmanager
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from github_manager import GitHubManager, RateLimiter, ResponseCache
+
+class RoutedHandler(BaseHTTPRequestHandler):
+    """按 server.routes[(路径, Token)] 返回状态码，未列出的请求返回404"""
+    
+    def log_message(self, format, *args):
+        pass
+        
+    def do_GET(self):
+        token = (self.headers.get('Authorization') or '').replace('token ', '')
+        status = self.server.routes.get((self.path.split('?')[0], token), 404)
+        self.server.requests.append((self.path.split('?')[0], token))
+        body = json.dumps({'id': 1} if status == 200 else {'message': 'Not Found'}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        
+@contextmanager
+def pooled_manager(routes, tokens=("token-a", "token-b")):
+    """指向本地服务、设置了Token池的 GitHubManager"""
+    httpd = HTTPServer(('127.0.0.1', 0), RoutedHandler)
+    httpd.routes = routes
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        limiter = RateLimiter()
+        limiter.enabled = False
+        manager = GitHubManager(response_cache=ResponseCache(), rate_limiter=limiter)
+        manager.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        manager.set_token(tokens[0])
+        manager.set_token_pool(list(tokens))
+        yield manager, httpd
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        
+def test_read_request_returns_readable_response_when_all_tokens_denied():
+    with pooled_manager({}) as (manager, httpd):
+        url = f"{manager.base_url}/repos/o/r/actions/runs/1/logs"
+        response = manager._read_request('GET', url, repo='o/r', stream=True)
+        try:
+            assert response.status_code == 404
+            assert response.json() == {"message": "Not Found"}
+        finally:
+            response.close()
+            
+def test_missing_run_does_not_deny_token_for_repo():
+    routes = {('/repos/o/r', 'token-a'): 200, ('/repos/o/r', 'token-b'): 200}
+    with pooled_manager(routes) as (manager, httpd):
+        for _ in range(3):
+            assert manager.get_workflow_run('o/r', '404') is None
+        # 运行不存在不是无权访问：两个Token仍轮流使用，仓库探测结果在TTL内复用
+        assert sorted(manager.token_pool.candidates('o/r')) == ['token-a', 'token-b']
+        assert all(not stats['denied_repos'] for stats in manager.get_token_pool_stats())
+        assert httpd.requests.count(('/repos/o/r', 'token-a')) <= 1
+        
+def test_repo_level_denial_is_recorded():
+    routes = {('/repos/o/r', 'token-b'): 200, ('/repos/o/r/actions/runs/1', 'token-b'): 200}
+    with pooled_manager(routes) as (manager, httpd):
+        manager.rate_limiter.update('token-a', {'X-RateLimit-Remaining': '5000'}, 200)
+        manager.rate_limiter.update('token-b', {'X-RateLimit-Remaining': '10'}, 200)
+        assert manager.get_workflow_run('o/r', '1') == {'id': 1}
+        assert manager.token_pool.candidates('o/r') == ['token-b']
+        
+def test_list_workflow_run_jobs_distinguishes_failure_from_no_jobs():
+    routes = {('/repos/o/r/actions/runs/1/jobs', 'token-a'): 200,
+              ('/repos/o/r/actions/runs/2/jobs', 'token-a'): 500}
+    with pooled_manager(routes, tokens=("token-a",)) as (manager, httpd):
+        assert manager.list_workflow_run_jobs('o/r', '1') == []
+        assert manager.list_workflow_run_jobs('o/r', '2') is None
+        
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""日志全文索引的测试"""
+
+import io
+import zipfile
+
+from log_cache import LogCache, ARCHIVE_MEMBER
+from log_index import LogIndex, LogIndexWorker, JOB_MEMBER_PREFIX
+
+def test_repo_filter_applies_before_limit(tmp_path):
+    index = LogIndex(str(tmp_path / "index.db"))
+    try:
+        index.index_entry('o/target', '1', 1, 'logs.zip', [('build.txt', "error: disk full\n")])
+        # 之后索引的其他仓库有大量匹配，按rowid倒序排在前面
+        index.index_entry('o/noisy', '2', 1, 'logs.zip',
+                          [('build.txt', "".join(f"error: flaky {n}\n" for n in range(50)))])
+        
+        assert len(index.search("error", limit=10)) == 10
+        results = index.search("error", limit=10, repo='O/Target')
+        assert [(row['repo'], row['run_id'], row['content']) for row in results] == \
+            [('o/target', '1', 'error: disk full')]
+    finally:
+        index.close()
+        
+def indexed_worker(tmp_path):
+    cache = LogCache(str(tmp_path / "cache"))
+    index = LogIndex(str(tmp_path / "index.db"))
+    worker = LogIndexWorker(cache, index)
+    # 不启动线程，直接调用 index_pending
+    worker.running = True
+    return cache, index, worker
+    
+def zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+    
+def test_archive_only_replaces_job_logs_of_its_attempt(tmp_path):
+    cache, index, worker = indexed_worker(tmp_path)
+    try:
+        cache.put('o/r', '1', 1, b"error: attempt one\n", member=f"{JOB_MEMBER_PREFIX}11")
+        cache.put('o/r', '1', 2, b"error: attempt two\n", member=f"{JOB_MEMBER_PREFIX}22")
+        assert worker.index_pending() == 2
+        
+        cache.put('o/r', '1', 2, zip_bytes({'build.txt': "error: attempt two\n"}), compress=False)
+        assert worker.index_pending() == 1
+        assert index.indexed_keys() == {('o/r', '1', 1, f"{JOB_MEMBER_PREFIX}11"),
+                                        ('o/r', '1', 2, ARCHIVE_MEMBER)}
+        results = index.search("error", limit=10)
+        assert sorted((row['attempt'], row['content']) for row in results) == \
+            [(1, 'error: attempt one'), (2, 'error: attempt two')]
+    finally:
+        cache.close()
+        index.close()
+        
+def test_evicted_cache_entries_are_pruned_from_index(tmp_path):
+    cache, index, worker = indexed_worker(tmp_path)
+    try:
+        cache.put('o/r', '1', 1, b"error: gone\n", member=f"{JOB_MEMBER_PREFIX}11")
+        cache.put('o/r', '2', 1, b"error: kept\n", member=f"{JOB_MEMBER_PREFIX}22")
+        assert worker.index_pending() == 2
+        
+        cache.invalidate('o/r', '1')
+        worker.index_pending()
+        assert index.indexed_keys() == {('o/r', '2', 1, f"{JOB_MEMBER_PREFIX}22")}
+        assert [row['content'] for row in index.search("error", limit=10)] == ['error: kept']
+        assert worker.get_stats()['pruned_entries'] == 1
+    finally:
+        cache.close()
+        index.close()
+        
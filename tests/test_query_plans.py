@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""热点查询的查询计划测试"""
+
+from conftest import make_run
+
+def test_hot_queries_use_indexes(db):
+    assert db.check_query_plans() == []
+    
+def test_hot_queries_use_indexes_with_statistics(db):
+    # ANALYZE 后查询规划器按统计信息选择计划，结果仍不能退化为全表扫描
+    db.upsert_runs([make_run(str(run_id), repo=f"o/r{run_id % 5}") for run_id in range(1, 201)])
+    db.flush_writes()
+    db.connection.execute("ANALYZE")
+    assert db.check_query_plans() == []
+    
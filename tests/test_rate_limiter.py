@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""速率限制调度器的测试"""
+
+import github_manager
+from github_manager import RateLimiter
+
+NOW = 1_000_000.0
+
+def make_limiter(monkeypatch, **kwargs):
+    """剩余配额扣除保留后为1000，距重置1000秒，即后台请求每秒放行一个"""
+    monkeypatch.setattr(github_manager.time, 'time', lambda: NOW)
+    limiter = RateLimiter(reserve=100, burst=2, **kwargs)
+    limiter.seed('token', {'limit': 5000, 'remaining': 1100, 'reset': NOW + 1000})
+    return limiter
+    
+def test_concurrent_background_requests_are_spaced(monkeypatch):
+    limiter = make_limiter(monkeypatch)
+    delays = [limiter.get_delay('token', background=True) for _ in range(6)]
+    # 桶内两个令牌立即放行，之后每个请求都预订下一个令牌，等待时间依次增加一秒
+    assert delays == [0.0, 0.0, 1.0, 2.0, 3.0, 4.0]
+    
+def test_requests_over_max_wait_do_not_reserve(monkeypatch):
+    limiter = make_limiter(monkeypatch, max_wait=1.5)
+    assert [limiter.get_delay('token', background=True) for _ in range(3)] == [0.0, 0.0, 1.0]
+    assert limiter.get_delay('token', background=True) == 2.0
+    assert not limiter.acquire('token', background=True)
+    # 被拒绝的请求没有预订令牌，等待时间不再增加
+    assert limiter.get_delay('token', background=True) == 2.0
+    
+def test_interactive_requests_are_not_throttled(monkeypatch):
+    limiter = make_limiter(monkeypatch)
+    assert all(limiter.get_delay('token') == 0.0 for _ in range(10))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""归档与保留策略的测试"""
+
+import time
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import retention
+from database import DatabaseManager
+from retention import RetentionManager
+from conftest import make_run, stats_snapshot
+
+def test_archive_moves_old_completed_runs_and_keeps_stats(archive_db):
+    db = archive_db
+    db.upsert_runs([make_run(index, queued_at='2025-01-01T10:00:00Z') for index in range(30)]
+                   + [make_run('active', status='in_progress', conclusion=None, queued_at='2025-01-01T10:00:00Z')])
+    before = stats_snapshot(db)
+    
+    moved = 0
+    while True:
+        batch = db.archive_runs_before('2025-06-01', limit=7)
+        moved += batch
+        if batch < 7:
+            break
+    assert moved == 30
+    assert db.get_archive_stats()['runs'] == 30
+    remaining = db.execute_query("SELECT run_id FROM workflow_runs")
+    assert [row['run_id'] for row in remaining] == ['active']
+    
+    # 统计仍覆盖已归档的运行，并与全量重建一致
+    assert stats_snapshot(db) == before
+    assert db.rebuild_run_stats()
+    assert stats_snapshot(db) == before
+    assert db.get_workflow_run_by_run_id('3')['repo'] == 'o/r'
+    
+def test_rearchiving_a_run_replaces_the_archived_copy(archive_db):
+    db = archive_db
+    db.upsert_runs([make_run(1, queued_at='2025-01-01T10:00:00Z')])
+    assert db.archive_runs_before('2025-06-01') == 1
+    db.upsert_runs([make_run(1, conclusion='failure', queued_at='2025-01-01T10:00:00Z')])
+    assert db.archive_runs_before('2025-06-01') == 1
+    assert db.get_archive_stats()['runs'] == 1
+    assert db.get_workflow_run_by_run_id('1')['conclusion'] == 'failure'
+    snapshot = stats_snapshot(db)
+    assert db.rebuild_run_stats()
+    assert stats_snapshot(db) == snapshot
+    
+def test_archive_config_runs_keeps_newest(archive_db):
+    db = archive_db
+    user_id = db.insert_user("alice", "token")
+    config_id = db.insert_workflow_config(user_id, "CI", "o/r", "ci.yml")
+    db.upsert_runs([make_run(index, config_id=config_id, queued_at=f"2026-01-{index + 10}T00:00:00Z")
+                    for index in range(10)])
+    assert db.archive_config_runs(config_id, keep=4) == 6
+    remaining = sorted(row['run_id'] for row in db.execute_query("SELECT run_id FROM workflow_runs"))
+    assert remaining == ['6', '7', '8', '9']
+    
+def test_archive_config_runs_keeps_newest_by_run_time_after_backfill(archive_db):
+    db = archive_db
+    user_id = db.insert_user("alice", "token")
+    config_id = db.insert_workflow_config(user_id, "CI", "o/r", "ci.yml")
+    # 先同步到新运行，之后回填的旧运行写入时间更晚、id更大
+    db.upsert_runs([make_run('new', config_id=config_id, queued_at='2026-09-01T10:00:00Z')])
+    db.upsert_runs([make_run('old', config_id=config_id, queued_at='2025-01-01T10:00:00Z')])
+    db.execute_update("UPDATE workflow_runs SET created_at = '2026-09-01T10:05:00' WHERE run_id = 'new'")
+    db.execute_update("UPDATE workflow_runs SET created_at = '2026-10-01T00:00:00' WHERE run_id = 'old'")
+    assert db.archive_config_runs(config_id, keep=1) == 1
+    remaining = [row['run_id'] for row in db.execute_query("SELECT run_id FROM workflow_runs")]
+    assert remaining == ['new']
+    
+def test_archive_config_runs_uses_config_run_time_index(archive_db):
+    plan = archive_db.execute_query("""
+        EXPLAIN QUERY PLAN SELECT COALESCE(queued_at, created_at), id FROM workflow_runs WHERE config_id = ?
+        ORDER BY COALESCE(queued_at, created_at) DESC, id DESC LIMIT 1 OFFSET ?
+    """, (1, 4))
+    details = " ".join(row['detail'] for row in plan)
+    assert "idx_workflow_runs_config_run_time" in details
+    assert "TEMP B-TREE" not in details
+    
+def test_retention_manager_archives_logs_and_frees_pages(archive_db):
+    db = archive_db
+    for index in range(200):
+        db.execute_update("INSERT INTO system_logs (level, message, created_at) VALUES ('INFO', ?, ?)",
+                          ('x' * 2000, '2025-01-01T00:00:00'))
+    db.flush_writes()
+    manager = RetentionManager(db, run_days=0, log_days=30, batch_size=50, batch_pause=0)
+    result = manager.run_once()
+    assert result['logs'] == 200
+    assert result['pages'] > 0
+    assert db.get_archive_stats()['logs'] == 200
+    assert db.execute_query("PRAGMA main.freelist_count")[0]['freelist_count'] == 0
+    
+def test_vacuum_waits_for_idle_writer(archive_db, monkeypatch):
+    db = archive_db
+    for index in range(200):
+        db.execute_update("INSERT INTO system_logs (level, message, created_at) VALUES ('INFO', ?, ?)",
+                          ('x' * 2000, '2025-01-01T00:00:00'))
+    manager = RetentionManager(db, run_days=0, log_days=30, batch_size=50, batch_pause=0)
+    
+    # 写队列忙时只归档不回收，空闲页留到下次执行
+    monkeypatch.setattr(retention, 'VACUUM_IDLE_WAIT', 0.2)
+    monkeypatch.setattr(db, 'pending_writes', lambda: 1)
+    result = manager.run_once()
+    assert (result['logs'], result['pages']) == (200, 0)
+    freed = db.execute_query("PRAGMA main.freelist_count")[0]['freelist_count']
+    assert freed > 0
+    
+    monkeypatch.undo()
+    assert manager.run_once()['pages'] == freed
+    assert db.execute_query("PRAGMA main.freelist_count")[0]['freelist_count'] == 0
+    
+def test_archive_uses_github_run_time_not_insert_time(archive_db):
+    db = archive_db
+    # 今天回填的旧运行按GitHub上的运行时间归档；没有 queued_at 的运行按写入时间
+    db.upsert_runs([make_run('backfilled', queued_at='2025-01-01T10:00:00Z'),
+                    make_run('recent', queued_at='2026-09-01T10:00:00Z'),
+                    make_run('legacy', queued_at=None)])
+    db.execute_update("UPDATE workflow_runs SET created_at = '2024-12-01T00:00:00' WHERE run_id = 'legacy'")
+    assert db.archive_runs_before('2025-06-01') == 2
+    remaining = [row['run_id'] for row in db.execute_query("SELECT run_id FROM workflow_runs")]
+    assert remaining == ['recent']
+    
+def test_archive_runs_before_uses_run_time_index(archive_db):
+    plan = archive_db.execute_query("""
+        EXPLAIN QUERY PLAN SELECT id FROM workflow_runs
+        WHERE COALESCE(queued_at, created_at) < ? AND status = 'completed'
+        ORDER BY COALESCE(queued_at, created_at) LIMIT ?
+    """, ('2025-06-01', 500))
+    details = " ".join(row['detail'] for row in plan)
+    assert "idx_workflow_runs_run_time" in details
+    assert "TEMP B-TREE" not in details
+    
+def test_incremental_vacuum_conversion_runs_on_retention_thread(tmp_path):
+    path = str(tmp_path / "old.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE placeholder (x)")
+    connection.commit()
+    connection.close()
+    
+    db = DatabaseManager(path, archive_path=str(tmp_path / "archive.db"))
+    db.init_database()
+    db.start_writer()
+    try:
+        # 初始化时不执行VACUUM转换
+        assert db.execute_query("PRAGMA main.auto_vacuum")[0]['auto_vacuum'] == 0
+        RetentionManager(db, run_days=0, log_days=0).run_once()
+        assert db.execute_query("PRAGMA main.auto_vacuum")[0]['auto_vacuum'] == 2
+    finally:
+        db.close()
+        
+def test_run_cutoff_is_utc_regardless_of_local_timezone(archive_db, monkeypatch):
+    monkeypatch.setenv('TZ', 'Asia/Shanghai')
+    time.tzset()
+    try:
+        boundary = datetime.now(timezone.utc) - timedelta(days=90)
+        stamp = lambda moment: moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+        archive_db.upsert_runs([make_run('inside', queued_at=stamp(boundary + timedelta(hours=2))),
+                                make_run('outside', queued_at=stamp(boundary - timedelta(hours=2)))])
+        result = RetentionManager(archive_db, run_days=90, log_days=0).run_once()
+        assert result['runs'] == 1
+        remaining = [row['run_id'] for row in archive_db.execute_query("SELECT run_id FROM workflow_runs")]
+        assert remaining == ['inside']
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+        
\ No newline at end of file
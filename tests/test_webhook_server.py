@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Webhook服务的测试：用录制事件重放工具向服务发送签名后的事件"""
+
+import json
+
+import pytest
+
+from webhook_server import WebhookServer, load_recorded_payloads, replay_payloads
+
+SECRET = "test-secret"
+
+def run_event(status, attempt=1, conclusion=None):
+    return {'event': 'workflow_run', 'payload': {
+        'action': status,
+        'repository': {'full_name': 'o/r'},
+        'workflow_run': {'id': 42, 'name': 'CI', 'path': '.github/workflows/ci.yml', 'status': status,
+                         'conclusion': conclusion, 'run_attempt': attempt, 'head_branch': 'main',
+                         'created_at': '2026-03-01T10:00:00Z', 'updated_at': '2026-03-01T10:05:00Z'}
+    }}
+    
+def job_event(attempt):
+    return {'event': 'workflow_job', 'payload': {
+        'workflow_job': {'id': 7, 'run_id': 42, 'run_attempt': attempt, 'status': 'in_progress'}
+    }}
+    
+@pytest.fixture
+def server(db):
+    user_id = db.insert_user("alice", "token")
+    db.insert_workflow_config(user_id, "CI", "o/r", "ci.yml")
+    webhook = WebhookServer(SECRET, db, port=0)
+    assert webhook.start()
+    yield webhook
+    webhook.stop()
+    
+def replay(server, tmp_path, events, secret=SECRET):
+    """把事件写成录制文件，再用重放工具按顺序发送"""
+    directory = tmp_path / "payloads"
+    directory.mkdir(exist_ok=True)
+    for path in directory.iterdir():
+        path.unlink()
+    for index, event in enumerate(events):
+        (directory / f"{index:03d}.json").write_text(json.dumps(event), encoding='utf-8')
+    return replay_payloads(f"http://127.0.0.1:{server.port}/", load_recorded_payloads(str(directory)), secret)
+    
+def test_out_of_order_events_do_not_regress_status(server, db, tmp_path):
+    codes = replay(server, tmp_path, [run_event('queued'), run_event('completed', conclusion='success'),
+                                      run_event('in_progress'), job_event(1)])
+    assert codes == [200, 200, 202, 202]
+    run = db.get_workflow_run_by_run_id('42')
+    assert (run['status'], run['conclusion']) == ('completed', 'success')
+    
+def test_rerun_attempt_overrides_completed_run(server, db, tmp_path):
+    codes = replay(server, tmp_path, [
+        run_event('completed', conclusion='failure'),
+        run_event('queued', attempt=2),
+        job_event(2),
+        run_event('completed', attempt=1, conclusion='failure'),
+        run_event('completed', attempt=2, conclusion='success'),
+    ])
+    assert codes == [200, 200, 200, 202, 200]
+    run = db.get_workflow_run_by_run_id('42')
+    assert (run['status'], run['conclusion'], run['run_attempt']) == ('completed', 'success', 2)
+    
+def test_job_event_starts_new_attempt(server, db, tmp_path):
+    assert replay(server, tmp_path, [run_event('completed', conclusion='failure'), job_event(2)]) == [200, 200]
+    run = db.get_workflow_run_by_run_id('42')
+    assert (run['status'], run['conclusion'], run['run_attempt']) == ('in_progress', None, 2)
+    
+def test_invalid_signature_is_rejected(server, db, tmp_path):
+    assert replay(server, tmp_path, [run_event('queued')], secret="wrong") == [401]
+    assert db.get_workflow_run_by_run_id('42') is None
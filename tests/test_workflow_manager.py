@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""增量同步运行记录的测试（本地HTTP服务模拟仓库运行列表接口）"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs, urlencode
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from github_manager import GitHubManager, RateLimiter, ResponseCache
+from workflow_manager import WorkflowManager
+from conftest import make_run
+
+# GitHub对带筛选条件的运行列表每次查询最多返回1000条
+SEARCH_RESULT_LIMIT = 1000
+
+def github_run(run_id, created_at, status='completed', run_attempt=1):
+    return {'id': run_id, 'name': 'CI', 'path': '.github/workflows/ci.yml', 'workflow_id': 7,
+            'status': status, 'conclusion': 'success' if status == 'completed' else None,
+            'head_branch': 'main', 'created_at': created_at, 'updated_at': created_at,
+            'run_started_at': created_at, 'run_attempt': run_attempt, 'actor': {'login': 'alice'}}
+            
+class RunsHandler(BaseHTTPRequestHandler):
+    """按 created（>=时间 或 时间..时间）和 status 筛选 server.runs，按创建时间倒序分页返回"""
+    
+    def log_message(self, format, *args):
+        pass
+        
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.rsplit('/', 1)[-1].isdigit():
+            self._reply(self.server.runs[int(path.rsplit('/', 1)[-1])])
+            return
+            
+        query = {name: values[0] for name, values in parse_qs(urlparse(self.path).query).items()}
+        self.server.requests.append(query)
+        created = query.get('created', '>=')
+        if '..' in created:
+            since, until = created.split('..')
+        else:
+            since, until = created[2:], '9999'
+        runs = [run for run in self.server.runs.values()
+                if since <= run['created_at'] <= until and query.get('status', run['status']) == run['status']]
+        runs.sort(key=lambda run: run['created_at'], reverse=True)
+        
+        per_page, page = int(query.get('per_page', 30)), int(query.get('page', 1))
+        visible = runs[:SEARCH_RESULT_LIMIT] if 'created' in query or 'status' in query else runs
+        headers = {}
+        if page * per_page < len(visible):
+            next_query = urlencode(dict(query, page=page + 1))
+            headers['Link'] = f'<http://{self.headers["Host"]}{path}?{next_query}>; rel="next"'
+        self._reply({'total_count': len(runs), 'workflow_runs': visible[(page - 1) * per_page:page * per_page]},
+                    headers)
+        
+    def _reply(self, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        
+def serve_runs(runs):
+    httpd = HTTPServer(('127.0.0.1', 0), RunsHandler)
+    httpd.runs = runs
+    httpd.requests = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+    
+def workflow_manager(db, httpd):
+    user_id = db.insert_user("alice", "token")
+    db.insert_workflow_config(user_id, "CI", "o/r", "ci.yml")
+    limiter = RateLimiter()
+    limiter.enabled = False
+    manager = WorkflowManager(db)
+    manager.github_manager = GitHubManager(response_cache=ResponseCache(), rate_limiter=limiter)
+    manager.github_manager.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    manager.github_manager.set_token("token")
+    return manager
+    
+def test_sync_picks_up_rerun_of_completed_run_before_cursor(db):
+    httpd = serve_runs({1: github_run(1, '2020-03-01T09:00:00Z'), 2: github_run(2, '2026-03-01T10:00:00Z')})
+    try:
+        manager = workflow_manager(db, httpd)
+        assert manager.sync_workflow_runs() == 2
+        
+        # 重新运行沿用run_id和创建时间，创建时间远早于游标（运行2的创建时间）
+        httpd.runs[1] = github_run(1, '2020-03-01T09:00:00Z', status='in_progress', run_attempt=2)
+        del httpd.requests[:]
+        assert manager.sync_workflow_runs() == 1
+        run = db.get_workflow_run_by_run_id('1')
+        assert (run['status'], run['run_attempt']) == ('in_progress', 2)
+        # 只有游标之后的列表和一页进行中的运行，没有按时间窗口重新列出历史运行
+        assert sorted(query.get('status', 'created') for query in httpd.requests) == ['created', 'in_progress']
+        
+        # 重新运行完成后按未完成运行逐个刷新
+        httpd.runs[1] = github_run(1, '2020-03-01T09:00:00Z', run_attempt=2)
+        assert manager.sync_workflow_runs() == 1
+        assert db.get_workflow_run_by_run_id('1')['status'] == 'completed'
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        
+def test_sync_fetches_all_new_runs_beyond_page_and_result_limits(db):
+    httpd = serve_runs({1: github_run(1, '2026-03-01T09:00:00Z')})
+    try:
+        manager = workflow_manager(db, httpd)
+        assert manager.sync_workflow_runs() == 1
+        
+        # 游标之后新增的运行超过10页，也超过单次查询1000条的上限
+        start = datetime(2026, 3, 2, tzinfo=timezone.utc)
+        for index in range(1150):
+            created = (start + timedelta(minutes=index)).strftime('%Y-%m-%dT%H:%M:%SZ')
+            httpd.runs[100 + index] = github_run(100 + index, created)
+        assert manager.sync_workflow_runs() == 1150
+        assert db.execute_query("SELECT COUNT(*) AS runs FROM workflow_runs")[0]['runs'] == 1151
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        
+def test_failed_job_listing_is_reported_as_error(db, monkeypatch):
+    db.upsert_runs([make_run(1)])
+    manager = WorkflowManager(db)
+    manager.github_manager.set_token("token")
+    monkeypatch.setattr(manager.github_manager, 'list_workflow_run_jobs', lambda repo, run_id: None)
+    logs = manager.get_failed_job_logs('1')
+    assert list(logs) == ['error.txt']
+    assert "失败" in logs['error.txt'] and "没有失败的任务" not in logs['error.txt']
+    
@@ -189,6 +189,16 @@ class UserManager:
             self.logger.error(f"获取用户Token失败: {str(e)}")
             return None
             
+    def get_all_tokens(self) -> List[str]:
+        """获取所有用户的Token（用于只读请求的Token池）"""
+        try:
+            users = self.db_manager.get_all_users()
+            return [user['token'] for user in users if user.get('token')]
+            
+        except Exception as e:
+            self.logger.error(f"获取所有用户Token失败: {str(e)}")
+            return []
+            
     def test_user_token(self, user_id: int) -> bool:
         """测试用户Token有效性"""
         try:
@@ -202,6 +212,19 @@ class UserManager:
             self.logger.error(f"测试用户Token失败: {str(e)}")
             return False
             
+    def get_user_token_info(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """获取用户Token的缓存信息（权限范围、过期时间）"""
+        try:
+            token = self.get_user_token(user_id)
+            if not token:
+                return None
+                
+            return self.github_manager.get_token_info(token)
+            
+        except Exception as e:
+            self.logger.error(f"获取用户Token信息失败: {str(e)}")
+            return None
+            
     def refresh_user_token(self, user_id: int, new_token: str) -> bool:
         """刷新用户Token"""
         try:
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Webhook接收模块
+
+内嵌HTTP服务，接收GitHub的 workflow_run / workflow_job 事件，
+校验 X-Hub-Signature-256 签名后直接写入运行记录，轮询只作为补漏手段。
+也可作为命令行工具重放录制的事件：
+
+    python webhook_server.py replay payloads/ --url http://127.0.0.1:8765/ --secret xxx
+"""
+
+import os
+import sys
+import hmac
+import json
+import hashlib
+import logging
+import threading
+import urllib.error
+import urllib.request
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional, Callable
+
+from database import DatabaseManager
+from workflow_manager import config_matches_run, run_to_record
+
+# 处理的事件类型
+WEBHOOK_EVENTS = ('workflow_run', 'workflow_job', 'ping')
+
+# 运行状态的先后顺序，乱序到达的旧事件不会覆盖新状态
+RUN_STATUS_ORDER = {
+    'requested': 0, 'waiting': 0, 'pending': 0, 'queued': 0,
+    'in_progress': 1,
+    'completed': 2
+}
+
+# 请求体大小上限（GitHub webhook 负载上限为25MB）
+MAX_PAYLOAD_SIZE = 25 * 1024 * 1024
+
+def is_stale_event(existing: Dict[str, Any], status: str, run_attempt: Optional[int]) -> bool:
+    """判断事件是否比已记录的状态旧
+    
+    先比较尝试次数：重新运行沿用 run_id、尝试次数加一并回到 queued / in_progress，
+    更高的尝试次数总是覆盖；同一次尝试内才按状态先后判断。
+    """
+    recorded_attempt = existing.get('run_attempt') or 1
+    attempt = run_attempt or recorded_attempt
+    if attempt != recorded_attempt:
+        return attempt < recorded_attempt
+    return RUN_STATUS_ORDER.get(status, 0) < RUN_STATUS_ORDER.get(existing.get('status'), 0)
+    
+def sign_payload(secret: str, body: bytes) -> str:
+    """计算 X-Hub-Signature-256 头的值"""
+    digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+    
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """校验 X-Hub-Signature-256 签名"""
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature)
+    
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    """Webhook请求处理器"""
+    
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+        
+    def _reply(self, status_code: int, message: str):
+        body = message.encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def do_POST(self):
+        webhook = self.server.webhook
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_PAYLOAD_SIZE:
+            self._reply(400, "invalid payload size")
+            return
+            
+        body = self.rfile.read(length)
+        if not verify_signature(webhook.secret, body, self.headers.get('X-Hub-Signature-256')):
+            webhook.logger.warning("Webhook签名校验失败")
+            self._reply(401, "invalid signature")
+            return
+            
+        event = self.headers.get('X-GitHub-Event', '')
+        try:
+            payload = json.loads(body.decode('utf-8'))
+        except ValueError:
+            self._reply(400, "invalid json")
+            return
+            
+        if webhook.handle_event(event, payload):
+            self._reply(200, "ok")
+        else:
+            self._reply(202, "ignored")
+            
+class WebhookServer:
+    """GitHub Webhook接收服务
+    
+    请求在单个服务线程中按到达顺序处理，使用该线程自己的数据库连接。
+    """
+    
+    def __init__(self, secret: str, db_manager: DatabaseManager, host: str = "127.0.0.1",
+                 port: int = 8765, on_event: Callable[[str, str], None] = None):
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.db_manager = db_manager
+        self.on_event = on_event
+        self.httpd = None
+        self.thread = None
+        self.stats = {'received': 0, 'applied': 0, 'ignored': 0}
+        self.logger = logging.getLogger(__name__)
+        
+    def start(self) -> bool:
+        """在后台线程启动服务"""
+        try:
+            if not self.secret:
+                self.logger.error("未配置Webhook密钥，拒绝启动Webhook服务")
+                return False
+                
+            self.httpd = HTTPServer((self.host, self.port), WebhookRequestHandler)
+            self.httpd.webhook = self
+            # 端口为0时由系统分配
+            self.port = self.httpd.server_address[1]
+            
+            self.thread = threading.Thread(target=self._serve, name="webhook-server", daemon=True)
+            self.thread.start()
+            self.logger.info(f"Webhook服务已启动: http://{self.host}:{self.port}/")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"启动Webhook服务失败: {str(e)}")
+            self.httpd = None
+            return False
+            
+    def _serve(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.db_manager.release_connection()
+                
+    def stop(self):
+        """停止服务"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        self.logger.info("Webhook服务已停止")
+        
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+        
+    def get_stats(self) -> Dict[str, int]:
+        """获取接收统计"""
+        return dict(self.stats)
+        
+    def handle_event(self, event: str, payload: Dict[str, Any]) -> bool:
+        """处理一个事件，返回是否写入了运行记录"""
+        try:
+            self.stats['received'] += 1
+            if event == 'workflow_run':
+                run_id = self._handle_workflow_run(payload)
+            elif event == 'workflow_job':
+                run_id = self._handle_workflow_job(payload)
+            else:
+                run_id = None
+                
+            if run_id is None:
+                self.stats['ignored'] += 1
+                return False
+                
+            self.stats['applied'] += 1
+            if self.on_event:
+                self.on_event(event, run_id)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"处理Webhook事件失败: {str(e)}")
+            return False
+            
+    def _handle_workflow_run(self, payload: Dict[str, Any]) -> Optional[str]:
+        """写入 workflow_run 事件中的运行（仅限已有记录或匹配已保存配置的运行）"""
+        run = payload.get('workflow_run') or {}
+        if not run.get('id'):
+            return None
+            
+        db = self.db_manager
+        run_id = str(run['id'])
+        repo = (payload.get('repository') or {}).get('full_name') or \
+            (run.get('repository') or {}).get('full_name')
+        status = run.get('status', 'unknown')
+        
+        existing = db.get_workflow_run_by_run_id(run_id)
+        if existing:
+            # 乱序到达的旧事件不覆盖已记录的更新状态
+            if is_stale_event(existing, status, run.get('run_attempt')):
+                return None
+            db.upsert_runs([run_to_record(run, existing.get('config_id'), repo)])
+            return run_id
+            
+        config = next((c for c in db.get_all_workflow_configs() if config_matches_run(c, repo, run)), None)
+        if not config:
+            return None
+            
+        db.upsert_runs([run_to_record(run, config['id'], repo, config['branch'])])
+        return run_id
+        
+    def _handle_workflow_job(self, payload: Dict[str, Any]) -> Optional[str]:
+        """任务开始执行时把所属运行（重新运行时为新的尝试）标记为 in_progress"""
+        job = payload.get('workflow_job') or {}
+        if not job.get('run_id') or job.get('status') != 'in_progress':
+            return None
+            
+        db = self.db_manager
+        run_id = str(job['run_id'])
+        existing = db.get_workflow_run_by_run_id(run_id)
+        if not existing or is_stale_event(existing, 'in_progress', job.get('run_attempt')):
+            return None
+        attempt = job.get('run_attempt') or existing.get('run_attempt')
+        if existing.get('status') == 'in_progress' and attempt == existing.get('run_attempt'):
+            return None
+            
+        # 新的尝试同时清空上一次尝试的结论
+        db.upsert_runs([{'run_id': run_id, 'status': 'in_progress', 'run_attempt': attempt}])
+        return run_id
+        
+def load_recorded_payloads(path: str) -> List[Dict[str, Any]]:
+    """读取录制的事件
+    
+    path 可以是单个JSON文件或目录（按文件名排序）。文件内容为
+    {"event": "workflow_run", "payload": {...}}，也可以直接是GitHub负载，
+    此时按 workflow_run / workflow_job 字段推断事件类型。
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.json')]
+    else:
+        files = [path]
+        
+    recorded = []
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if 'event' in data and 'payload' in data:
+            recorded.append({'event': data['event'], 'payload': data['payload']})
+        else:
+            event = next((name for name in WEBHOOK_EVENTS if name in data), 'ping')
+            recorded.append({'event': event, 'payload': data})
+    return recorded
+    
+def replay_payloads(url: str, recorded: List[Dict[str, Any]], secret: str) -> List[int]:
+    """按顺序把录制的事件签名后POST到Webhook服务，返回各请求的状态码"""
+    status_codes = []
+    for item in recorded:
+        body = json.dumps(item['payload']).encode('utf-8')
+        request = urllib.request.Request(url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'X-GitHub-Event': item['event'],
+            'X-Hub-Signature-256': sign_payload(secret, body)
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                status_codes.append(response.status)
+        except urllib.error.HTTPError as e:
+            status_codes.append(e.code)
+    return status_codes
+    
+def main():
+    """命令行入口：重放录制的事件"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="GitHub Webhook事件重放工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    replay = subparsers.add_parser('replay', help="把录制的事件POST到Webhook服务")
+    replay.add_argument('path', help="JSON文件或包含JSON文件的目录")
+    replay.add_argument('--url', default="http://127.0.0.1:8765/")
+    replay.add_argument('--secret', required=True)
+    args = parser.parse_args()
+    
+    status_codes = replay_payloads(args.url, load_recorded_payloads(args.path), args.secret)
+    for index, status_code in enumerate(status_codes, 1):
+        print(f"#{index}: {status_code}")
+    return 0 if all(code < 400 for code in status_codes) else 1
+    
+if __name__ == "__main__":
+    sys.exit(main())
+    
\ No newline at end of file
@@ -4,13 +4,53 @@
 工作流管理模块
 """
 
+import os
 import json
+import uuid
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import zipfile
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
 
-from github_manager import GitHubManager
+from github_manager import GitHubManager, LazyLogArchive
 from database import DatabaseManager
+from run_correlator import RunCorrelator
+from log_cache import LogCache
+from log_index import LogIndex, LogIndexWorker
+
+# 视为失败的任务结论
+FAILED_JOB_CONCLUSIONS = ('failure', 'timed_out')
+
+def config_matches_run(config: Dict[str, Any], repo: str, run: Dict[str, Any]) -> bool:
+    """判断运行是否属于该工作流配置（仓库相同，且工作流ID、文件路径、文件名或名称之一相同）"""
+    workflow = str(config.get('workflow') or '')
+    if not workflow or (config.get('repo') or '').lower() != (repo or '').lower():
+        return False
+        
+    path = (run.get('path') or '').split('@')[0]
+    return workflow in (str(run.get('workflow_id')), path, os.path.basename(path), run.get('name'))
+    
+def run_to_record(run: Dict[str, Any], config_id: Optional[int], repo: str,
+                  default_branch: str = None) -> Dict[str, Any]:
+    """把GitHub返回的运行转换为 DatabaseManager.upsert_runs 接受的记录"""
+    status = run.get('status', 'unknown')
+    return {
+        'config_id': config_id,
+        'run_id': str(run['id']),
+        'status': status,
+        'html_url': run.get('html_url'),
+        'conclusion': run.get('conclusion'),
+        'logs_url': run.get('logs_url'),
+        'workflow_name': run.get('name'),
+        'repo': repo,
+        'branch': run.get('head_branch') or default_branch,
+        'trigger_user': (run.get('actor') or {}).get('login'),
+        'completed_at': run.get('updated_at') if status == 'completed' else None,
+        'run_attempt': run.get('run_attempt'),
+        'queued_at': run.get('created_at'),
+        'started_at': run.get('run_started_at')
+    }
 
 class WorkflowManager:
     """工作流管理器"""
@@ -18,16 +58,56 @@ class WorkflowManager:
     def __init__(self, db_manager: DatabaseManager = None):
         self.github_manager = GitHubManager()
         self.db_manager = db_manager
+        self.max_concurrency = 8
+        self.correlation_input = None
+        self.sync_states = {}
+        self.correlator = RunCorrelator(self.github_manager)
+        self.log_cache = None
+        self.log_index = None
+        self.log_indexer = None
         self.logger = logging.getLogger(__name__)
         
     def set_database_manager(self, db_manager: DatabaseManager):
         """设置数据库管理器"""
         self.db_manager = db_manager
+        self.sync_states = {}
+        
+    def set_log_cache(self, log_cache: Optional[LogCache]):
+        """设置本地日志缓存（None表示不缓存）"""
+        self.log_cache = log_cache
+        
+    def set_log_index(self, log_index: Optional[LogIndex], log_indexer: Optional[LogIndexWorker] = None):
+        """设置日志全文索引及其后台索引线程（None表示不索引）"""
+        self.log_index = log_index
+        self.log_indexer = log_indexer
+        
+    def _notify_log_indexer(self):
+        """日志写入缓存后唤醒后台索引线程"""
+        if self.log_indexer:
+            self.log_indexer.notify()
+            
+    def _log_cache_key(self, run_record: Dict[str, Any]) -> Optional[Tuple[str, str, int]]:
+        """已完成运行的日志缓存键 (仓库, run_id, 尝试次数)，运行未完成或未启用缓存时为None"""
+        if self.log_cache is None or run_record.get('status') != 'completed':
+            return None
+        return run_record['repo'], run_record['run_id'], run_record.get('run_attempt') or 1
         
     def set_github_token(self, token: str):
         """设置GitHub Token"""
         self.github_manager.set_token(token)
         
+    def set_token_pool(self, tokens: List[str]):
+        """设置用于分摊只读请求的Token池"""
+        self.github_manager.set_token_pool(tokens)
+        
+    def set_max_concurrency(self, max_concurrency: int):
+        """设置并发请求上限"""
+        self.max_concurrency = max(1, max_concurrency)
+        
+    def set_correlation_input(self, input_name: str):
+        """设置用于关联触发与运行的输入参数名（为空则按触发者、分支和时间匹配）"""
+        self.correlation_input = input_name or None
+        
     def save_config(self, repo: str, workflow: str, branch: str = "main", 
                    inputs: Dict[str, Any] = None) -> Optional[int]:
         """保存工作流配置"""
@@ -188,6 +268,13 @@ class WorkflowManager:
                 self.logger.error("GitHub连接失败")
                 return None
                 
+            # 工作流声明了关联ID输入时，注入唯一值用于精确匹配运行
+            correlation_id = None
+            if self.correlation_input:
+                correlation_id = uuid.uuid4().hex
+                inputs = dict(inputs or {})
+                inputs[self.correlation_input] = correlation_id
+                
             # 记录触发时间（使用UTC时间）
             import pytz
             trigger_time = datetime.now(pytz.UTC)
@@ -203,6 +290,8 @@ class WorkflowManager:
                     'success': True,
                     'repo': repo,
                     'workflow': workflow,
+                    'branch': branch,
+                    'correlation_id': correlation_id,
                     'triggered_at': trigger_time.isoformat(),
                     'note': '触发成功，运行信息将在后台获取'
                 }
@@ -214,58 +303,29 @@ class WorkflowManager:
             self.logger.error(f"触发工作流失败: {str(e)}")
             return None
             
-    def get_triggered_run_info(self, repo: str, workflow: str, trigger_time: datetime, config_id: int = None):
-        """后台获取刚触发的运行信息"""
+    def get_triggered_run_info(self, repo: str, workflow: str, trigger_time: datetime, config_id: int = None,
+                               branch: str = "main", correlation_id: str = None,
+                               on_found: Callable[[Dict[str, Any]], None] = None):
+        """后台关联刚触发的运行并存储，找到后调用 on_found(run)"""
         try:
-            import time
-            # 等待5秒让GitHub处理
-            time.sleep(5)
+            run_info = self.correlator.correlate(repo, workflow, branch, trigger_time, correlation_id)
             
-            # 直接获取最新的运行（应该是刚触发的）
-            run_info = self.github_manager.get_latest_workflow_run(repo, workflow)
-            
-            if run_info:
-                # 创建独立的数据库连接
-                from database import DatabaseManager
-                temp_db = DatabaseManager()
-                temp_db.init_database()
-                
+            if run_info and self.db_manager:
                 try:
-                    # 存储运行信息到数据库
-                    if config_id:
-                        temp_db.insert_workflow_run(
-                            config_id=config_id,
-                            run_id=str(run_info['id']),
-                            status=run_info.get('status', 'unknown'),
-                            html_url=run_info.get('html_url'),
-                            conclusion=run_info.get('conclusion'),
-                            logs_url=run_info.get('logs_url'),
-                            workflow_name=run_info.get('name'),
-                            repo=repo,
-                            branch=run_info.get('head_branch', 'main'),
-                            trigger_user=run_info.get('actor', {}).get('login')
-                        )
-                        self.logger.info(f"运行信息已存储到数据库: {run_info['id']}")
-                    else:
-                        # 如果没有config_id，也存储到数据库
-                        temp_db.insert_workflow_run(
-                            config_id=None,
-                            run_id=str(run_info['id']),
-                            status=run_info.get('status', 'unknown'),
-                            html_url=run_info.get('html_url'),
-                            conclusion=run_info.get('conclusion'),
-                            logs_url=run_info.get('logs_url'),
-                            workflow_name=run_info.get('name'),
-                            repo=repo,
-                            branch=run_info.get('head_branch', 'main'),
-                            trigger_user=run_info.get('actor', {}).get('login')
-                        )
-                        self.logger.info(f"运行信息已存储到数据库: {run_info['id']}")
+                    # 存储运行信息到数据库（没有config_id时同样存储），使用本线程自己的连接
+                    self.db_manager.upsert_runs([run_to_record(run_info, config_id, repo, branch)])
+                    self.logger.info(f"运行信息已存储到数据库: {run_info['id']}")
                 finally:
-                    temp_db.close()
+                    self.db_manager.release_connection()
+                    
+                if on_found:
+                    on_found(run_info)
+                    
+            return run_info
                     
         except Exception as e:
             self.logger.error(f"后台获取运行信息失败: {str(e)}")
+            return None
             
     def trigger_config_workflow(self, config_id: int) -> bool:
         """触发配置的工作流"""
@@ -302,6 +362,292 @@ class WorkflowManager:
             self.logger.error(f"获取工作流运行记录失败: {str(e)}")
             return []
             
+    def fetch_runs_for_configs(self, configs: List[Dict[str, Any]], 
+                               per_page: int = 5) -> Dict[int, Dict[str, Any]]:
+        """按仓库增量获取多个配置的运行记录
+        
+        同一仓库的所有配置共用 /repos/{repo}/actions/runs 请求，取游标（上次见到的
+        最新创建时间）之后的全部运行；另请求一页 status=in_progress 的运行，发现
+        已完成运行的重新运行（沿用原创建时间，不在游标之后）。上次仍未完成、
+        且不在这两个列表中的运行逐个刷新状态。结果按工作流ID/路径在内存中分发到各配置。
+        仓库首次同步时，在仓库最近一页中找不到运行的配置单独补查一次。
+        
+        返回格式: { config_id: {'latest': run 或 None, 'recent': [新增或刷新的run, ...]} }
+        """
+        try:
+            groups = {}
+            for config in configs:
+                groups.setdefault(config['repo'].lower(), []).append(config)
+                
+            try:
+                from async_github_manager import AsyncGitHubManager
+            except ImportError:
+                self.logger.warning("未安装aiohttp，回退为串行获取运行记录")
+                fetched = self._fetch_repo_runs_serial(groups, per_page)
+            else:
+                fetched = asyncio.run(self._fetch_repo_runs_async(AsyncGitHubManager, groups, per_page))
+                
+            return self._fan_out_runs(groups, *fetched)
+            
+        except Exception as e:
+            self.logger.error(f"批量获取运行记录失败: {str(e)}")
+            return {}
+            
+    def _sync_state(self, key: str) -> Dict[str, Any]:
+        """获取仓库的同步状态（优先使用内存中的副本）"""
+        state = self.sync_states.get(key)
+        if state is None:
+            stored = self.db_manager.get_sync_state(key) if self.db_manager else None
+            cursor = stored.get('cursor') if stored else None
+            state = {
+                'cursor': datetime.fromisoformat(cursor) if cursor else None,
+                'active_run_ids': set(stored['active_run_ids']) if stored else set()
+            }
+            self.sync_states[key] = state
+        return state
+        
+    def _repo_fetch_args(self, key: str, configs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """仓库级请求参数：有游标时取游标之后的全部运行（不截断，否则游标会越过未取到的运行），
+        否则只取最近一页"""
+        cursor = self._sync_state(key)['cursor']
+        return {
+            'repo': configs[0]['repo'],
+            'created_since': cursor,
+            'max_pages': None if cursor else 1
+        }
+        
+    def _rerun_fetch_keys(self, groups: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+        """需要查询进行中运行（发现重新运行）的仓库：已有游标的仓库，首次同步时最近一页已包含"""
+        return [key for key in groups if self._sync_state(key)['cursor']]
+        
+    @staticmethod
+    def _rerun_candidates(repo_runs: Dict[str, Optional[List[Dict[str, Any]]]],
+                          in_progress: Dict[str, Optional[List[Dict[str, Any]]]]) -> Dict[tuple, Dict[str, Any]]:
+        """进行中、但不在游标之后运行列表中的运行（重新运行）: {(仓库键, run_id): run}"""
+        candidates = {}
+        for key, runs in in_progress.items():
+            returned = {str(run['id']) for run in repo_runs.get(key) or []}
+            for run in runs or []:
+                if str(run['id']) not in returned:
+                    candidates[(key, str(run['id']))] = run
+        return candidates
+        
+    def _configs_missing_runs(self, groups: Dict[str, List[Dict[str, Any]]],
+                              repo_runs: Dict[str, Optional[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """首次同步的仓库中，在仓库运行列表里没有匹配运行的配置"""
+        missing = []
+        for key, configs in groups.items():
+            runs = repo_runs.get(key)
+            if runs is None or self._sync_state(key)['cursor']:
+                continue
+            missing.extend(
+                config for config in configs
+                if not any(config_matches_run(config, config['repo'], run) for run in runs)
+            )
+        return missing
+        
+    def _active_runs_to_refresh(self, groups: Dict[str, List[Dict[str, Any]]],
+                                repo_runs: Dict[str, Optional[List[Dict[str, Any]]]],
+                                reruns: Dict[tuple, Dict[str, Any]]) -> List[tuple]:
+        """上次未完成、且不在本次仓库运行列表和进行中列表中的运行: [(仓库键, 仓库, run_id), ...]"""
+        pending = []
+        for key, configs in groups.items():
+            returned = {str(run['id']) for run in repo_runs.get(key) or []}
+            returned |= {run_id for (k, run_id) in reruns if k == key}
+            for run_id in sorted(self._sync_state(key)['active_run_ids'] - returned):
+                pending.append((key, configs[0]['repo'], run_id))
+        return pending
+        
+    async def _fetch_repo_runs_async(self, manager_class, groups: Dict[str, List[Dict[str, Any]]],
+                                     per_page: int):
+        """并发获取各仓库的新运行、需要补查的配置以及未完成运行的最新状态"""
+        async with manager_class(self.max_concurrency,
+                                 self.github_manager.response_cache,
+                                 self.github_manager.rate_limiter,
+                                 background=True,
+                                 token_pool=self.github_manager.token_pool) as manager:
+            manager.base_url = self.github_manager.base_url
+            manager.set_token(self.github_manager.token)
+            
+            keys = list(groups)
+            rerun_keys = self._rerun_fetch_keys(groups)
+            fetched, in_progress = await asyncio.gather(
+                manager.gather(
+                    manager.list_repository_runs(**self._repo_fetch_args(key, groups[key])) for key in keys
+                ),
+                manager.gather(
+                    manager.list_repository_runs(groups[key][0]['repo'], status='in_progress', max_pages=1)
+                    for key in rerun_keys
+                )
+            )
+            repo_runs = dict(zip(keys, fetched))
+            reruns = self._rerun_candidates(repo_runs, dict(zip(rerun_keys, in_progress)))
+            
+            missing = self._configs_missing_runs(groups, repo_runs)
+            pending = self._active_runs_to_refresh(groups, repo_runs, reruns)
+            fallback, refreshed = await asyncio.gather(
+                manager.gather(
+                    manager.list_workflow_runs(c['repo'], c['workflow'], per_page=per_page) for c in missing
+                ),
+                manager.gather(manager.get_workflow_run(repo, run_id) for _, repo, run_id in pending)
+            )
+            refreshed = {(key, run_id): run for (key, _, run_id), run in zip(pending, refreshed)}
+            return (repo_runs,
+                    {c['id']: runs or [] for c, runs in zip(missing, fallback)},
+                    {**reruns, **refreshed})
+            
+    def _fetch_repo_runs_serial(self, groups: Dict[str, List[Dict[str, Any]]], per_page: int):
+        """串行获取各仓库的新运行、需要补查的配置以及未完成运行的最新状态"""
+        with self.github_manager.background_requests():
+            repo_runs = {
+                key: self.github_manager.list_repository_runs(**self._repo_fetch_args(key, configs))
+                for key, configs in groups.items()
+            }
+            reruns = self._rerun_candidates(repo_runs, {
+                key: self.github_manager.list_repository_runs(groups[key][0]['repo'], status='in_progress',
+                                                              max_pages=1)
+                for key in self._rerun_fetch_keys(groups)
+            })
+            fallback = {
+                c['id']: self.github_manager.list_workflow_runs(c['repo'], c['workflow'], per_page=per_page)
+                for c in self._configs_missing_runs(groups, repo_runs)
+            }
+            refreshed = {
+                (key, run_id): self.github_manager.get_workflow_run(repo, run_id)
+                for key, repo, run_id in self._active_runs_to_refresh(groups, repo_runs, reruns)
+            }
+        return repo_runs, fallback, {**reruns, **refreshed}
+        
+    def _fan_out_runs(self, groups: Dict[str, List[Dict[str, Any]]],
+                      repo_runs: Dict[str, Optional[List[Dict[str, Any]]]],
+                      fallback_runs: Dict[int, List[Dict[str, Any]]],
+                      refreshed_runs: Dict[tuple, Optional[Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+        """把仓库级运行记录分发到各配置，并推进各仓库的同步状态"""
+        results = {}
+        for key, configs in groups.items():
+            runs = repo_runs.get(key)
+            if runs is None:
+                # 获取失败，不推进同步状态
+                for config in configs:
+                    results[config['id']] = {'latest': None, 'recent': []}
+                continue
+                
+            refreshed = [run for (k, _), run in refreshed_runs.items() if k == key and run]
+            failed = {run_id for (k, run_id), run in refreshed_runs.items() if k == key and not run}
+            candidates = runs + refreshed
+            
+            matched_all = []
+            for config in configs:
+                matched = fallback_runs.get(config['id'])
+                if matched is None:
+                    matched = [run for run in candidates if config_matches_run(config, config['repo'], run)]
+                matched.sort(key=lambda run: run.get('created_at') or '', reverse=True)
+                results[config['id']] = {'latest': matched[0] if matched else None, 'recent': matched}
+                matched_all.extend(matched)
+                
+            fallback = [run for config in configs for run in fallback_runs.get(config['id'], [])]
+            self._advance_sync_state(key, runs + fallback, matched_all, failed)
+        return results
+        
+    def _advance_sync_state(self, key: str, seen: List[Dict[str, Any]],
+                            matched: List[Dict[str, Any]], failed_run_ids: set):
+        """推进游标并更新未完成运行集合，有变化时才写入数据库
+        
+        只跟踪属于某个配置的未完成运行；刷新失败的运行保留到下次同步。
+        """
+        state = self._sync_state(key)
+        cursor = state['cursor']
+        created = [run['created_at'] for run in seen if run.get('created_at')]
+        if created:
+            newest = datetime.fromisoformat(max(created).replace('Z', '+00:00'))
+            cursor = max(cursor, newest) if cursor else newest
+            
+        active = {str(run['id']) for run in matched if run.get('status') != 'completed'}
+        active |= failed_run_ids & state['active_run_ids']
+        
+        if cursor == state['cursor'] and active == state['active_run_ids']:
+            return
+            
+        state['cursor'] = cursor
+        state['active_run_ids'] = active
+        if self.db_manager:
+            self.db_manager.save_sync_state(key, cursor.isoformat() if cursor else None, list(active))
+            
+    def sync_workflow_runs(self, configs: List[Dict[str, Any]] = None,
+                           on_written: Callable[[int], None] = None) -> int:
+        """增量同步所有配置的运行记录，只写入新增或状态变化的运行，返回写入条数
+        
+        指定 on_written 时不等待写入提交（不阻塞调用线程），提交后在写线程中调用
+        on_written(写入条数)，此时返回提交写入的记录数。
+        """
+        try:
+            if not self.db_manager:
+                return 0
+                
+            configs = self.get_all_configs() if configs is None else configs
+            if not configs:
+                return 0
+                
+            # 同一运行可能匹配多个配置，按run_id去重后整批写入，未变化的行不会被改写
+            by_config = {config['id']: config for config in configs}
+            records = {}
+            for config_id, result in self.fetch_runs_for_configs(configs).items():
+                config = by_config[config_id]
+                for run in result['recent']:
+                    record = run_to_record(run, config_id, config['repo'], config['branch'])
+                    records[record['run_id']] = record
+                    
+            if on_written is None:
+                return self.db_manager.upsert_runs(records.values())
+                
+            future = self.db_manager.upsert_runs(records.values(), wait=False)
+            future.add_done_callback(lambda f: None if f.exception() else on_written(f.result()))
+            return len(records)
+            
+        except Exception as e:
+            self.logger.error(f"增量同步运行记录失败: {str(e)}")
+            return 0
+            
+    def backfill_workflow_runs(self, config_id: int, since: datetime = None) -> int:
+        """回填配置的历史运行记录
+        
+        逐页流式拉取并写入数据库，内存占用与历史长度无关。
+        since 指定时只回填该时间之后创建的运行。
+        """
+        try:
+            if not self.db_manager:
+                return 0
+                
+            config = self.get_config(config_id)
+            if not config:
+                self.logger.error(f"工作流配置不存在: {config_id}")
+                return 0
+                
+            stop_when = GitHubManager.created_before(since) if since else None
+            
+            # 每攒满一页提交一次，不在网络请求期间占用写事务
+            count = 0
+            batch = []
+            with self.github_manager.background_requests():
+                for run in self.github_manager.iter_workflow_runs(config['repo'], config['workflow'],
+                                                                  stop_when=stop_when):
+                    batch.append(run_to_record(run, config_id, config['repo'], config['branch']))
+                    if len(batch) >= 100:
+                        self.db_manager.upsert_runs(batch)
+                        count += len(batch)
+                        batch = []
+                        
+            if batch:
+                self.db_manager.upsert_runs(batch)
+                count += len(batch)
+                
+            self.logger.info(f"历史运行记录回填完成: {config['name']} ({count} 条)")
+            return count
+            
+        except Exception as e:
+            self.logger.error(f"回填历史运行记录失败: {str(e)}")
+            return 0
+            
     def get_workflow_runs_from_db(self, config_id: int = None) -> List[Dict[str, Any]]:
         """从数据库获取工作流运行记录"""
         try:
@@ -313,7 +659,47 @@ class WorkflowManager:
         except Exception as e:
             self.logger.error(f"从数据库获取工作流运行记录失败: {str(e)}")
             return []
+            
+    def get_workflow_runs_page(self, cursor: Tuple[str, int] = None, page_size: int = 100,
+                               **filters) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """分页获取运行记录，filters 支持 repo / status / conclusion / config_id"""
+        try:
+            if not self.db_manager:
+                return [], None
+                
+            return self.db_manager.get_workflow_runs_page(cursor, page_size, **filters)
+            
+        except Exception as e:
+            self.logger.error(f"分页获取工作流运行记录失败: {str(e)}")
+            return [], None
     
+    def get_run_stats(self, dimension: str = 'config') -> List[Dict[str, Any]]:
+        """获取运行统计（按配置 config / 仓库 repo / 日期 day），附带成功率和平均排队、运行时长
+        
+        按配置统计时 name 为配置名称，其余维度为仓库名或日期。
+        """
+        try:
+            stats = self.db_manager.get_run_stats(dimension)
+            names = {}
+            if dimension == 'config':
+                names = {str(config['id']): config['name'] for config in self.db_manager.get_all_workflow_configs()}
+                
+            for item in stats:
+                conclusions = item['conclusions']
+                finished = sum(count for conclusion, count in conclusions.items() if conclusion)
+                item['name'] = names.get(item['key'], item['key'])
+                item['success'] = conclusions.get('success', 0)
+                item['failure'] = sum(conclusions.get(c, 0) for c in FAILED_JOB_CONCLUSIONS)
+                item['cancelled'] = conclusions.get('cancelled', 0)
+                item['success_rate'] = item['success'] / finished if finished else None
+                item['avg_queued'] = item['queued_seconds'] / item['queued_runs'] if item['queued_runs'] else None
+                item['avg_duration'] = item['duration_seconds'] / item['duration_runs'] if item['duration_runs'] else None
+            return stats
+            
+        except Exception as e:
+            self.logger.error(f"获取运行统计失败: {str(e)}")
+            return []
+            
     def refresh_workflow_run_status(self, run_id: str) -> Optional[Dict[str, Any]]:
         """刷新工作流运行状态"""
         try:
@@ -326,10 +712,13 @@ class WorkflowManager:
             run_info = self.github_manager.get_workflow_run(run_record['repo'], run_id)
             if run_info:
                 # 更新数据库
+                status = run_info.get('status', 'unknown')
                 self.db_manager.update_workflow_run_status(
                     run_id, 
-                    run_info.get('status', 'unknown'),
-                    run_info.get('conclusion')
+                    status,
+                    run_info.get('conclusion'),
+                    run_info.get('updated_at') if status == 'completed' else None,
+                    run_info.get('run_started_at')
                 )
                 
                 return {
@@ -390,11 +779,26 @@ class WorkflowManager:
                 self.logger.error(f"工作流运行记录不存在: {run_id}")
                 return None
                 
+            # 已完成运行的日志不会再变化，优先读取本地缓存
+            cache_key = self._log_cache_key(run_record)
+            if cache_key:
+                cached = self.log_cache.open(*cache_key)
+                if cached:
+                    try:
+                        logs = LazyLogArchive(cached)
+                        self.logger.info(f"从本地缓存读取运行日志: {run_id}")
+                        return logs
+                    except zipfile.BadZipFile:
+                        cached.close()
+                        self.log_cache.invalidate(cache_key[0], run_id)
+                        
             # 获取日志
             logs = self.github_manager.get_workflow_run_logs(run_record['repo'], run_id)
             
             if logs:
                 self.logger.info(f"获取工作流运行日志成功: {run_id}")
+                if cache_key and self.log_cache.put_file(*cache_key, logs.fileobj):
+                    self._notify_log_indexer()
             else:
                 self.logger.warning(f"工作流运行日志为空: {run_id}")
                 
@@ -404,6 +808,100 @@ class WorkflowManager:
             self.logger.error(f"获取工作流运行日志失败: {str(e)}")
             return None
     
+    def get_run_jobs(self, run_id: str) -> List[Dict[str, Any]]:
+        """获取工作流运行的任务列表"""
+        try:
+            run_record = self.db_manager.get_workflow_run_by_run_id(run_id)
+            if not run_record:
+                self.logger.error(f"工作流运行记录不存在: {run_id}")
+                return []
+                
+            return self.github_manager.list_workflow_run_jobs(run_record['repo'], run_id) or []
+            
+        except Exception as e:
+            self.logger.error(f"获取运行任务列表失败: {str(e)}")
+            return []
+            
+    def get_failed_job_logs(self, run_id: str) -> Optional[dict]:
+        """只获取失败任务的日志
+        返回格式: { '任务名.txt': '内容...' }
+        """
+        try:
+            if run_id.startswith('triggered_'):
+                self.logger.warning(f"无法获取临时运行ID的日志: {run_id}")
+                return {"error.txt": "无法获取临时运行ID的日志，请等待运行信息同步或手动刷新。"}
+                
+            run_record = self.db_manager.get_workflow_run_by_run_id(run_id)
+            if not run_record:
+                self.logger.error(f"工作流运行记录不存在: {run_id}")
+                return None
+                
+            cache_key = self._log_cache_key(run_record)
+            jobs = None
+            if cache_key:
+                cached = self.log_cache.get(*cache_key, member="jobs.json")
+                jobs = json.loads(cached.decode('utf-8')) if cached else None
+            if jobs is None:
+                jobs = self.github_manager.list_workflow_run_jobs(run_record['repo'], run_id)
+                if jobs is None:
+                    # 请求失败不能当作没有失败的任务
+                    self.logger.error(f"获取运行任务列表失败: {run_id}")
+                    return {"error.txt": f"获取运行 {run_id} 的任务列表失败，请检查网络连接和Token权限后重试。"}
+                if cache_key and jobs:
+                    summary = [{k: job.get(k) for k in ('id', 'name', 'conclusion')} for job in jobs]
+                    self.log_cache.put(*cache_key, json.dumps(summary).encode('utf-8'), member="jobs.json")
+                    
+            failed_jobs = [job for job in jobs if job.get('conclusion') in FAILED_JOB_CONCLUSIONS]
+            
+            if not failed_jobs:
+                self.logger.info(f"运行没有失败的任务: {run_id}")
+                return {"info.txt": f"运行 {run_id} 共 {len(jobs)} 个任务，没有失败的任务。"}
+                
+            logs = {}
+            for job in failed_jobs:
+                member = f"job/{job['id']}"
+                cached = self.log_cache.get(*cache_key, member=member) if cache_key else None
+                if cached is not None:
+                    content = cached.decode('utf-8', errors='ignore')
+                else:
+                    content = self.github_manager.get_job_logs(run_record['repo'], job['id'])
+                    if cache_key and content is not None:
+                        self.log_cache.put(*cache_key, content.encode('utf-8'), member=member)
+                        self._notify_log_indexer()
+                if content is not None:
+                    filename = f"{job.get('name', job['id'])}.txt".replace('/', '_')
+                    logs[filename] = content
+                    
+            self.logger.info(f"获取失败任务日志成功: {run_id} ({len(logs)}/{len(jobs)} 个任务)")
+            return logs
+            
+        except Exception as e:
+            self.logger.error(f"获取失败任务日志失败: {str(e)}")
+            return None
+            
+    def search_run_logs(self, text: str, limit: int = 200, repo: str = None) -> List[Dict[str, Any]]:
+        """在已索引的运行日志中搜索文本
+        
+        返回匹配行 [{run_id, repo, job, line, content, workflow_name, status, conclusion, created_at}]，
+        最近索引的在前；运行记录已不在数据库中的匹配行仍会返回（运行信息为空）。
+        """
+        try:
+            if not self.log_index:
+                self.logger.warning("未启用日志全文索引")
+                return []
+                
+            matches = self.log_index.search(text, limit, repo)
+            runs = self.db_manager.get_workflow_runs_by_run_ids({match['run_id'] for match in matches})
+            for match in matches:
+                run = runs.get(match['run_id']) or {}
+                for key in ('workflow_name', 'status', 'conclusion', 'created_at'):
+                    match[key] = run.get(key)
+            return matches
+            
+        except Exception as e:
+            self.logger.error(f"搜索运行日志失败: {str(e)}")
+            return []
+            
     def open_workflow_run_in_browser(self, run_id: str) -> bool:
         """在浏览器中打开工作流运行"""
         try: